@@ -0,0 +1,266 @@
+"""Measure API throughput and latency percentiles for read, search, create and bundle requests.
+
+Runs against a live server (default http://localhost:8000) backed by a
+Postgres loaded with scripts/load_seed.py --synthetic. Resource ids are
+sampled from the database, then every scenario sends --requests requests
+from --concurrency threads after a short warm-up:
+
+  read         GET Patient/{id}, Encounter/{id}, Observation/{id} in turn
+  search       selective searches (Patient?name, Encounter?subject&status, Observation?subject&code)
+  create       POST Observation for a sampled encounter
+  bundle       GET Observation?subject=Patient/{id}, the whole record of a patient
+
+Writes the result as JSON (--output). With --compare, exits 1 when a
+scenario's p95 latency or throughput regressed by more than --tolerance
+against an earlier result.
+
+Usage: python scripts/bench_api.py [--base-url http://localhost:8000] [--requests 2000] [--concurrency 8]
+                                   [--output bench_api.json] [--compare baseline.json --tolerance 0.15]
+"""
+import argparse
+import itertools
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+from sqlalchemy import text
+
+from src.domain.fhir.observation.specs import COMMON_LOINC_CODES
+from src.infrastructure.db.session import engine
+
+# (method, path, json body) built from the sampled ids
+Request = Tuple[str, str, Optional[dict]]
+SCENARIOS = ["read", "search", "create", "bundle"]
+TABLES = {"Patient": "fhir.patient", "Encounter": "fhir.encounter", "Observation": "fhir.observation"}
+
+
+def sample_ids(sample_size: int, seed: int) -> Dict[str, List[dict]]:
+    """Random rows per table using TABLESAMPLE, so large tables are not scanned"""
+    columns = {
+        "Patient": "id, name_family",
+        "Encounter": "id, subject_patient_id, status",
+        "Observation": "id, subject_patient_id, code_code",
+    }
+    samples = {}
+    with engine.connect() as conn:
+        conn.execute(text("SELECT setseed(:seed)"), {"seed": (seed % 1000) / 1000})
+        for name, table in TABLES.items():
+            estimate = conn.execute(
+                text("SELECT greatest(reltuples, 0) FROM pg_class WHERE oid = CAST(:table AS regclass)"), {"table": table}
+            ).scalar() or 0
+            rows = []
+            if estimate > sample_size * 10:
+                percent = min(100.0, sample_size * 300.0 / estimate)
+                rows = conn.execute(text(
+                    f"SELECT {columns[name]} FROM {table} TABLESAMPLE BERNOULLI ({percent}) REPEATABLE ({seed}) LIMIT :n"
+                ), {"n": sample_size}).mappings().all()
+            if not rows:
+                rows = conn.execute(
+                    text(f"SELECT {columns[name]} FROM {table} ORDER BY random() LIMIT :n"), {"n": sample_size}
+                ).mappings().all()
+            samples[name] = [{k: str(v) for k, v in row.items()} for row in rows]
+    return samples
+
+def dataset_size() -> Dict[str, int]:
+    with engine.connect() as conn:
+        return {
+            name: int(conn.execute(
+                text("SELECT greatest(reltuples, 0) FROM pg_class WHERE oid = CAST(:table AS regclass)"), {"table": table}
+            ).scalar() or 0)
+            for name, table in TABLES.items()
+        }
+
+
+def build_requests(scenario: str, samples: Dict[str, List[dict]], rng: random.Random) -> Callable[[], Request]:
+    patients, encounters, observations = samples["Patient"], samples["Encounter"], samples["Observation"]
+
+    if scenario == "read":
+        targets = itertools.cycle(
+            [("Patient", patients), ("Encounter", encounters), ("Observation", observations)]
+        )
+        def read():
+            resource, rows = next(targets)
+            return "GET", f"/api/fhir/{resource}/{rng.choice(rows)['id']}", None
+        return read
+
+    if scenario == "search":
+        def search():
+            kind = rng.randrange(3)
+            if kind == 0:
+                return "GET", f"/api/fhir/Patient?name={rng.choice(patients)['name_family']}", None
+            if kind == 1:
+                row = rng.choice(encounters)
+                return "GET", f"/api/fhir/Encounter?subject=Patient/{row['subject_patient_id']}&status={row['status']}", None
+            row = rng.choice(observations)
+            return "GET", f"/api/fhir/Observation?subject=Patient/{row['subject_patient_id']}&code={row['code_code']}", None
+        return search
+
+    if scenario == "create":
+        def create():
+            encounter = rng.choice(encounters)
+            return "POST", "/api/fhir/Observation", {
+                "resourceType": "Observation",
+                "status": "final",
+                "code": {"coding": [{"system": "http://loinc.org", "code": "8867-4", "display": COMMON_LOINC_CODES["8867-4"]}]},
+                "subject": {"reference": f"Patient/{encounter['subject_patient_id']}"},
+                "encounter": {"reference": f"Encounter/{encounter['id']}"},
+                "effectiveDateTime": datetime.now(timezone.utc).isoformat(),
+                "valueQuantity": {"value": rng.randint(55, 110), "unit": "/min", "system": "http://unitsofmeasure.org", "code": "/min"},
+            }
+        return create
+
+    if scenario == "bundle":
+        def bundle():
+            return "GET", f"/api/fhir/Observation?subject=Patient/{rng.choice(patients)['id']}", None
+        return bundle
+
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+
+def run_scenario(
+    base_url: str, headers: dict, next_request: Callable[[], Request], requests: int, concurrency: int, warmup: int
+) -> Dict:
+    lock = threading.Lock()
+    latencies: List[float] = []
+    sizes: List[int] = []
+    errors: Dict[str, int] = {}
+
+    def run(planned: List[Request], record: bool) -> float:
+        pending = iter(planned)
+
+        def worker(_) -> None:
+            with httpx.Client(base_url=base_url, headers=headers, timeout=30.0) as client:
+                while True:
+                    with lock:
+                        request = next(pending, None)
+                    if request is None:
+                        return
+                    method, path, body = request
+                    started = time.perf_counter()
+                    try:
+                        response = client.request(method, path, json=body)
+                        outcome = None if response.status_code < 400 else f"HTTP {response.status_code}"
+                        size = len(response.content)
+                    except httpx.HTTPError as e:
+                        outcome, size = type(e).__name__, 0
+                    elapsed = time.perf_counter() - started
+                    if not record:
+                        continue
+                    with lock:
+                        if outcome is None:
+                            latencies.append(elapsed)
+                            sizes.append(size)
+                        else:
+                            errors[outcome] = errors.get(outcome, 0) + 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(worker, range(concurrency)))
+        return time.perf_counter() - started
+
+    # Requests are drawn up front so the sequence only depends on the seed
+    run([next_request() for _ in range(warmup)], record=False)
+    wall = run([next_request() for _ in range(requests)], record=True)
+
+    result = {"requests": requests, "errors": sum(errors.values()), "error_kinds": errors, "seconds": round(wall, 3)}
+    if latencies:
+        centiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        result.update({
+            "rps": round(len(latencies) / wall, 1),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+            "p50_ms": round(centiles[49] * 1000, 2),
+            "p90_ms": round(centiles[89] * 1000, 2),
+            "p95_ms": round(centiles[94] * 1000, 2),
+            "p99_ms": round(centiles[98] * 1000, 2),
+            "max_ms": round(max(latencies) * 1000, 2),
+            "mean_response_bytes": int(statistics.fmean(sizes)),
+        })
+    return result
+
+
+def compare(result: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Scenarios whose p95 grew or throughput fell by more than tolerance"""
+    regressions = []
+    for name, current in result["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous or "p95_ms" not in previous or "p95_ms" not in current:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} ms -> {current['p95_ms']} ms")
+        if current["rps"] < previous["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['rps']} -> {current['rps']} req/s")
+        if current["errors"] > previous.get("errors", 0):
+            regressions.append(f"{name}: errors {previous.get('errors', 0)} -> {current['errors']}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="admin@fhir.com")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--sample-size", type=int, default=1000, help="ids sampled per resource type")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON result to this file")
+    parser.add_argument("--compare", type=Path, help="earlier result to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    args = parser.parse_args()
+
+    login = httpx.post(f"{args.base_url}/api/auth/login", json={"email": args.email, "password": args.password}, timeout=30.0)
+    if login.status_code != 200:
+        print(f"Login failed ({login.status_code}); run scripts/load_seed.py first", file=sys.stderr)
+        return 1
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    samples = sample_ids(args.sample_size, args.seed)
+    if not all(samples.values()):
+        print("No data to benchmark; run scripts/load_seed.py --synthetic first", file=sys.stderr)
+        return 1
+
+    rng = random.Random(args.seed)
+    result = {
+        "benchmark": "api",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "base_url": args.base_url,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "dataset": dataset_size(),
+        "scenarios": {},
+    }
+    for scenario in args.scenarios:
+        next_request = build_requests(scenario, samples, rng)
+        result["scenarios"][scenario] = run_scenario(
+            args.base_url, headers, next_request, args.requests, args.concurrency, args.warmup
+        )
+        print(f"{scenario}: {json.dumps(result['scenarios'][scenario])}", file=sys.stderr)
+
+    report = json.dumps(result, indent=2)
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+
+    if args.compare:
+        regressions = compare(result, json.loads(args.compare.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"FAIL {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Micro-benchmark of per-request overhead in the auth dependency chain.
+
+Compares building PasswordService/JWTService/repository/controller on every
+request (the old wiring) against resolving them from the application
+container, and times the get_current_user steps with real token verification. The
+user repository is in memory so only Python-side overhead is measured.
+
+Usage: python scripts/bench_auth_deps.py [--number 2000] [--output auth_deps.json]
+"""
+import argparse
+import json
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+from uuid import UUID, uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.domain.auth.controller import AuthController
+from src.domain.auth.entities import User, UserRole
+from src.domain.auth.repositories import UserRepository
+from src.domain.bundle.services import JWTService, PasswordService
+from src.interfaces.api.container import build_container
+
+
+class InMemoryUserRepository(UserRepository):
+    def __init__(self, users: Dict[str, User]):
+        self.users = users
+
+    def get_by_email(self, email: str) -> Optional[User]:
+        return self.users.get(email)
+
+    def get_by_id(self, user_id: UUID) -> Optional[User]:
+        return next((u for u in self.users.values() if u.id == user_id), None)
+
+    def create(self, user: User) -> User:
+        self.users[user.email] = user
+        return user
+
+    def update_password(self, user_id: UUID, hashed_password: str) -> None:
+        pass
+
+
+def per_call_us(fn, number: int) -> float:
+    best = min(timeit.repeat(fn, number=number, repeat=5))
+    return round(best / number * 1e6, 2)
+
+
+def bench_auth_deps(number: int) -> Dict:
+    now = datetime.now(timezone.utc)
+    user = User(uuid4(), "bench@example.com", "", UserRole.CLINICIAN, True, now, now)
+    users = {user.email: user}
+    container = build_container()
+    token = container.jwt_service.create_access_token({"sub": user.email})
+
+    def per_request_construction():
+        repo = InMemoryUserRepository(users)
+        return AuthController(repo, PasswordService(), JWTService())
+
+    def container_lookup():
+        repo = InMemoryUserRepository(users)
+        return AuthController(repo, container.password_service, container.jwt_service)
+
+    # Same steps as deps.get_current_user: verify the token, then look up the user
+    def current_user_per_request_jwt():
+        payload = JWTService().verify_token(token)
+        return InMemoryUserRepository(users).get_by_email(payload["sub"])
+
+    def current_user_container_jwt():
+        payload = container.jwt_service.verify_token(token)
+        return InMemoryUserRepository(users).get_by_email(payload["sub"])
+
+    results = {
+        "auth_controller_per_request_us": per_call_us(per_request_construction, number),
+        "auth_controller_container_us": per_call_us(container_lookup, number),
+        "current_user_per_request_jwt_us": per_call_us(current_user_per_request_jwt, number),
+        "current_user_container_jwt_us": per_call_us(current_user_container_jwt, number),
+    }
+    return {
+        "benchmark": "auth_dependency_chain",
+        "timestamp": now.isoformat(),
+        "python": sys.version.split()[0],
+        "number": number,
+        "results": results,
+        "speedup_auth_controller": round(
+            results["auth_controller_per_request_us"] / results["auth_controller_container_us"], 1
+        ),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--output", help="write the JSON result to this file")
+    args = parser.parse_args()
+
+    report = json.dumps(bench_auth_deps(args.number), indent=2)
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
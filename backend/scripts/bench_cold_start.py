@@ -0,0 +1,115 @@
+"""Measure worker cold start: time to import the ASGI app in a fresh interpreter.
+
+Every run is a new `python -X importtime` process, so nothing is cached
+in sys.modules. Fails (exit 1) when the median import exceeds the budget
+or when a module that is meant to load lazily shows up during import.
+
+Usage: python scripts/bench_cold_start.py [--runs 7] [--budget-ms 800] [--output cold_start.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+APP_MODULE = "src.interfaces.api.main"
+
+# Subsystems that must not be imported until a request needs them
+LAZY_MODULES = [
+    "jose", "passlib", "bcrypt", "cryptography", "alembic", "fhir", "brotli",
+    # Job handlers and the $export writer: only processes that run jobs import them
+    "src.infrastructure.db.job_handlers", "src.infrastructure.db.bulk_export",
+]
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def run_once() -> Tuple[float, Dict[str, int], List[str]]:
+    """Import the app once; return (seconds, cumulative us per import, imported lazy modules)
+
+    Only imports at nesting depth 0 or 1 are kept: the interpreter's own
+    startup plus everything the app module imports directly.
+    """
+    code = (
+        "import sys, time\n"
+        "t = time.perf_counter()\n"
+        f"import {APP_MODULE}\n"
+        "elapsed = time.perf_counter() - t\n"
+        f"lazy = [m for m in {LAZY_MODULES!r} if m in sys.modules]\n"
+        "print(elapsed, ','.join(lazy))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=str(BACKEND_DIR))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    elapsed, _, lazy = result.stdout.strip().partition(" ")
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cum, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1 and name.strip() != APP_MODULE:
+            cumulative[name.strip()] = int(cum)
+    return float(elapsed), cumulative, [m for m in lazy.split(",") if m]
+
+
+def bench_cold_start(runs: int) -> Dict:
+    timings = []
+    modules: Dict[str, int] = {}
+    leaked = set()
+    for _ in range(runs):
+        elapsed, cumulative, lazy = run_once()
+        timings.append(elapsed * 1000)
+        modules = cumulative
+        leaked.update(lazy)
+
+    return {
+        "benchmark": "cold_start_import",
+        "module": APP_MODULE,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "runs": runs,
+        "median_ms": round(statistics.median(timings), 1),
+        "min_ms": round(min(timings), 1),
+        "max_ms": round(max(timings), 1),
+        "top_modules_ms": {
+            name: round(us / 1000, 1)
+            for name, us in sorted(modules.items(), key=lambda m: -m[1])[:15]
+        },
+        "lazy_modules_imported": sorted(leaked),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=800.0)
+    parser.add_argument("--output", help="write the JSON result to this file")
+    args = parser.parse_args()
+
+    result = bench_cold_start(args.runs)
+    result["budget_ms"] = args.budget_ms
+    report = json.dumps(result, indent=2)
+    print(report)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+
+    failed = False
+    if result["median_ms"] > args.budget_ms:
+        print(f"FAIL median import {result['median_ms']} ms exceeds budget {args.budget_ms} ms", file=sys.stderr)
+        failed = True
+    if result["lazy_modules_imported"]:
+        print(f"FAIL lazily loaded modules imported at startup: {result['lazy_modules_imported']}", file=sys.stderr)
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""Exercise every route against the database and fail when one exceeds its query budget.
+
+Runs the app in-process with QUERY_BUDGET_ENABLED and QUERY_BUDGET_RAISE,
+so a route that issues more statements than its @query_budget declares
+raises QueryBudgetExceeded. Needs a migrated database with the seed users.
+
+Usage: python scripts/check_query_budgets.py [--email admin@fhir.com] [--password admin123]
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+os.environ["QUERY_BUDGET_ENABLED"] = "true"
+os.environ["QUERY_BUDGET_RAISE"] = "true"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+
+from src.infrastructure.db.query_budget import QueryBudgetExceeded
+from src.interfaces.api.main import app
+
+PATIENT = {
+    "resourceType": "Patient",
+    "identifier": [{"value": "BUDGET-CHECK"}],
+    "name": [{"family": "Budget", "given": ["Check"]}],
+    "gender": "unknown",
+    "birthDate": "1990-01-01",
+}
+
+
+def run_checks(client: TestClient, headers: dict) -> List[Tuple[str, str]]:
+    results: List[Tuple[str, str]] = []
+
+    def check(name: str, call: Callable):
+        try:
+            response = call()
+        except QueryBudgetExceeded as e:
+            results.append((name, f"over budget: {e}"))
+            return None
+        results.append((name, "ok" if response.status_code < 500 else f"HTTP {response.status_code}"))
+        return response
+
+    check("GET /api/health", lambda: client.get("/api/health"))
+    check("GET /api/auth/me", lambda: client.get("/api/auth/me", headers=headers))
+
+    response = check("POST /api/fhir/Patient", lambda: client.post("/api/fhir/Patient", json=PATIENT, headers=headers))
+    patient = response.json()["id"] if response is not None and response.status_code == 200 else None
+    encounter_body = {
+        "resourceType": "Encounter",
+        "status": "in-progress",
+        "class": [{"coding": [{"code": "AMB"}]}],
+        "subject": {"reference": f"Patient/{patient}"},
+        "period": {"start": "2024-01-01T08:00:00+00:00"},
+    }
+    response = check("POST /api/fhir/Encounter", lambda: client.post("/api/fhir/Encounter", json=encounter_body, headers=headers))
+    encounter = response.json()["id"] if response is not None and response.status_code == 200 else None
+    observation_body = {
+        "resourceType": "Observation",
+        "status": "final",
+        "code": {"coding": [{"system": "http://loinc.org", "code": "8310-5"}]},
+        "subject": {"reference": f"Patient/{patient}"},
+        "encounter": {"reference": f"Encounter/{encounter}"},
+        "effectiveDateTime": "2024-01-01T08:30:00+00:00",
+        "valueQuantity": {"value": 37.0, "unit": "Cel"},
+    }
+    response = check("POST /api/fhir/Observation", lambda: client.post("/api/fhir/Observation", json=observation_body, headers=headers))
+    observation = response.json()["id"] if response is not None and response.status_code == 200 else None
+
+    for resource, resource_id, body, search in [
+        ("Patient", patient, PATIENT, "name=Budget"),
+        ("Encounter", encounter, encounter_body, f"subject=Patient/{patient}"),
+        ("Observation", observation, observation_body, f"subject=Patient/{patient}&code=8310-5"),
+    ]:
+        if resource_id is None:
+            continue
+        check(f"GET /api/fhir/{resource}/{{id}}", lambda: client.get(f"/api/fhir/{resource}/{resource_id}", headers=headers))
+        check(f"GET /api/fhir/{resource}?{search}", lambda: client.get(f"/api/fhir/{resource}?{search}", headers=headers))
+        check(f"PUT /api/fhir/{resource}/{{id}}", lambda: client.put(f"/api/fhir/{resource}/{resource_id}", json=body, headers=headers))
+
+    for resource, resource_id in [("Observation", observation), ("Encounter", encounter), ("Patient", patient)]:
+        if resource_id is not None:
+            check(f"DELETE /api/fhir/{resource}/{{id}}", lambda: client.delete(f"/api/fhir/{resource}/{resource_id}", headers=headers))
+
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--email", default="admin@fhir.com")
+    parser.add_argument("--password", default="admin123")
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        try:
+            login = client.post("/api/auth/login", json={"email": args.email, "password": args.password})
+        except QueryBudgetExceeded as e:
+            print(f"FAIL POST /api/auth/login: over budget: {e}")
+            return 1
+        if login.status_code != 200:
+            print(f"Login failed ({login.status_code}); run scripts/load_seed.py first")
+            return 1
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        results = run_checks(client, headers)
+        try:
+            client.post("/api/auth/logout", headers=headers)
+        except QueryBudgetExceeded as e:
+            results.append(("POST /api/auth/logout", f"over budget: {e}"))
+
+    failures = 0
+    for name, outcome in results:
+        if outcome == "ok":
+            print(f"ok   {name}")
+        else:
+            failures += 1
+            print(f"FAIL {name}: {outcome}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,212 +1,267 @@
-import asyncio
-from sqlalchemy.orm import Session
-from src.infrastructure.db.session import SessionLocal
-from src.infrastructure.db.models.auth import User as UserModel
-from src.infrastructure.db.models.fhir.patient import Patient as PatientModel
-from src.infrastructure.db.models.fhir.encounter import Encounter as EncounterModel
-from src.infrastructure.db.models.fhir.observation import Observation as ObservationModel
+"""Load seed users, sample data and, optionally, a synthetic or NDJSON dataset.
+
+Rows are bulk loaded with COPY and merged with INSERT ... ON CONFLICT DO
+NOTHING (src/infrastructure/db/bulk_load.py), so re-running the script is
+idempotent. Large datasets are split into chunks loaded by --workers
+processes. A chunk commits its patients, encounters and observations in one
+transaction, so foreign keys hold while different resource types load in
+parallel across chunks. NDJSON files are loaded one resource type at a time,
+referenced types first.
+
+Usage:
+  python scripts/load_seed.py
+  python scripts/load_seed.py --synthetic 600000 [--seed 42] [--workers 8] [--chunk-size 2000]
+  python scripts/load_seed.py --input-dir data/synthetic [--workers 8]
+"""
+import argparse
+import gzip
+import itertools
+import json
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+from uuid import NAMESPACE_URL, UUID, uuid5
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
 from src.domain.bundle.services import PasswordService
+from src.domain.fhir.encounter.entities import Encounter
+from src.domain.fhir.observation.entities import Observation
+from src.domain.fhir.patient.entities import Patient
+from src.infrastructure.db.bulk_load import TABLE_COLUMNS, load_batch
+from src.infrastructure.db.partitions import ObservationPartitionManager
+from src.infrastructure.db.session import engine
+from synthetic_data import generate
+
+USERS = [
+    ("admin@fhir.com", "admin123", "admin"),
+    ("clinician@fhir.com", "clinician123", "clinician"),
+    ("readonly@fhir.com", "readonly123", "read_only"),
+]
+
+# Stable ids so the sample rows conflict with themselves on re-runs
+PAT001, PAT002 = uuid5(NAMESPACE_URL, "seed/Patient/PAT001"), uuid5(NAMESPACE_URL, "seed/Patient/PAT002")
+ENC001, ENC002 = uuid5(NAMESPACE_URL, "seed/Encounter/1"), uuid5(NAMESPACE_URL, "seed/Encounter/2")
+
+SAMPLE_RESOURCES = {
+    "Patient": [
+        (PAT001, {
+            "resourceType": "Patient",
+            "identifier": [{"value": "PAT001", "system": "http://hospital.example.com/patients"}],
+            "name": [{"family": "Smith", "given": ["John"]}],
+            "gender": "male",
+            "birthDate": "1985-05-15"
+        }),
+        (PAT002, {
+            "resourceType": "Patient",
+            "identifier": [{"value": "PAT002", "system": "http://hospital.example.com/patients"}],
+            "name": [{"family": "Johnson", "given": ["Jane"]}],
+            "gender": "female",
+            "birthDate": "1990-08-22"
+        }),
+    ],
+    "Encounter": [
+        (ENC001, {
+            "resourceType": "Encounter",
+            "status": "finished",
+            "class": {"code": "AMB", "display": "Ambulatory"},
+            "subject": {"reference": f"Patient/{PAT001}"},
+            "period": {"start": "2024-01-15T09:00:00Z", "end": "2024-01-15T10:00:00Z"},
+            "reasonCode": [{"coding": [{"code": "Z00.00", "display": "Encounter for general adult medical examination"}]}]
+        }),
+        (ENC002, {
+            "resourceType": "Encounter",
+            "status": "in-progress",
+            "class": {"code": "AMB", "display": "Ambulatory"},
+            "subject": {"reference": f"Patient/{PAT002}"},
+            "period": {"start": "2024-01-16T14:00:00Z"},
+            "reasonCode": [{"coding": [{"code": "Z00.00", "display": "Encounter for general adult medical examination"}]}]
+        }),
+    ],
+    "Observation": [
+        (uuid5(NAMESPACE_URL, "seed/Observation/1"), {
+            "resourceType": "Observation",
+            "status": "final",
+            "code": {"coding": [{"code": "8310-5", "display": "Body temperature"}]},
+            "subject": {"reference": f"Patient/{PAT001}"},
+            "encounter": {"reference": f"Encounter/{ENC001}"},
+            "effectiveDateTime": "2024-01-15T09:30:00Z",
+            "valueQuantity": {"value": 98.6, "unit": "°F", "system": "http://unitsofmeasure.org", "code": "[degF]"}
+        }),
+        (uuid5(NAMESPACE_URL, "seed/Observation/2"), {
+            "resourceType": "Observation",
+            "status": "final",
+            "code": {"coding": [{"code": "29463-7", "display": "Body weight"}]},
+            "subject": {"reference": f"Patient/{PAT001}"},
+            "encounter": {"reference": f"Encounter/{ENC001}"},
+            "effectiveDateTime": "2024-01-15T09:35:00Z",
+            "valueQuantity": {"value": 70, "unit": "kg", "system": "http://unitsofmeasure.org", "code": "kg"}
+        }),
+        (uuid5(NAMESPACE_URL, "seed/Observation/3"), {
+            "resourceType": "Observation",
+            "status": "preliminary",
+            "code": {"coding": [{"code": "8310-5", "display": "Body temperature"}]},
+            "subject": {"reference": f"Patient/{PAT002}"},
+            "encounter": {"reference": f"Encounter/{ENC002}"},
+            "effectiveDateTime": "2024-01-16T14:15:00Z",
+            "valueQuantity": {"value": 99.2, "unit": "°F", "system": "http://unitsofmeasure.org", "code": "[degF]"}
+        }),
+    ],
+}
+
+EFFECTIVE_MONTH = re.compile(r'"effectiveDateTime"\s*:\s*"(\d{4})-(\d{2})')
+
+# FHIR resource type -> (table, domain entity used to derive the search columns)
+RESOURCE_TABLES = {
+    "Patient": ("fhir.patient", Patient),
+    "Encounter": ("fhir.encounter", Encounter),
+    "Observation": ("fhir.observation", Observation),
+}
+
+
+def row_from_resource(resource_type: str, resource_id: Any, resource: Dict[str, Any]) -> Dict[str, Any]:
+    """Table row for a FHIR resource, with columns mapped the way the API stores them"""
+    table, entity_cls = RESOURCE_TABLES[resource_type]
+    resource = {k: v for k, v in resource.items() if k != "id"}
+    entity = entity_cls.from_fhir_resource(resource, UUID(str(resource_id)))
+    return {column: getattr(entity, column) for column in TABLE_COLUMNS[table]}
+
 
 def create_seed_data():
-    db = SessionLocal()
-
-    try:
-        password_service = PasswordService()
-
-        # Create users
-        users_data = [
-            {
-                "email": "admin@fhir.com",
-                "hashed_password": password_service.get_password_hash("admin123"),
-                "role": "admin"
-            },
-            {
-                "email": "clinician@fhir.com",
-                "hashed_password": password_service.get_password_hash("clinician123"),
-                "role": "clinician"
-            },
-            {
-                "email": "readonly@fhir.com",
-                "hashed_password": password_service.get_password_hash("readonly123"),
-                "role": "read_only"
-            }
+    password_service = PasswordService()
+    users = [
+        {"id": uuid5(NAMESPACE_URL, f"seed/User/{email}"), "email": email,
+         "hashed_password": password_service.get_password_hash(password), "role": role, "is_active": True}
+        for email, password, role in USERS
+    ]
+    batch = {"auth_user": users}
+    for resource_type, resources in SAMPLE_RESOURCES.items():
+        batch[RESOURCE_TABLES[resource_type][0]] = [
+            row_from_resource(resource_type, resource_id, resource) for resource_id, resource in resources
         ]
 
-        for user_data in users_data:
-            existing_user = db.query(UserModel).filter(UserModel.email == user_data["email"]).first()
-            if not existing_user:
-                user = UserModel(**user_data)
-                db.add(user)
-
-        db.commit()
-
-        # Create sample patients
-        patients_data = [
-            {
-                "identifier_value": "PAT001",
-                "name_family": "Smith",
-                "name_given": "John",
-                "gender": "male",
-                "birth_date": "1985-05-15",
-                "resource": {
-                    "resourceType": "Patient",
-                    "identifier": [{"value": "PAT001", "system": "http://hospital.example.com/patients"}],
-                    "name": [{"family": "Smith", "given": ["John"]}],
-                    "gender": "male",
-                    "birthDate": "1985-05-15"
-                }
-            },
-            {
-                "identifier_value": "PAT002",
-                "name_family": "Johnson",
-                "name_given": "Jane",
-                "gender": "female",
-                "birth_date": "1990-08-22",
-                "resource": {
-                    "resourceType": "Patient",
-                    "identifier": [{"value": "PAT002", "system": "http://hospital.example.com/patients"}],
-                    "name": [{"family": "Johnson", "given": ["Jane"]}],
-                    "gender": "female",
-                    "birthDate": "1990-08-22"
-                }
-            }
-        ]
+    ObservationPartitionManager(engine).ensure_partition(date(2024, 1, 1))
+    with engine.begin() as conn:
+        inserted = load_batch(conn, batch)
+    print(f"Seed data created successfully! (inserted: {inserted})")
 
-        created_patients = []
-        for patient_data in patients_data:
-            existing_patient = db.query(PatientModel).filter(PatientModel.identifier_value == patient_data["identifier_value"]).first()
-            if not existing_patient:
-                patient = PatientModel(**patient_data)
-                db.add(patient)
-                db.flush()  # Get the ID
-                created_patients.append(patient)
-
-        db.commit()
-
-        # Create sample encounters
-        encounters_data = [
-            {
-                "status": "finished",
-                "class_code": "AMB",
-                "subject_patient_id": created_patients[0].id,
-                "period_start": "2024-01-15T09:00:00Z",
-                "period_end": "2024-01-15T10:00:00Z",
-                "reason_code": "Z00.00",
-                "resource": {
-                    "resourceType": "Encounter",
-                    "status": "finished",
-                    "class": {"code": "AMB", "display": "Ambulatory"},
-                    "subject": {"reference": f"Patient/{created_patients[0].id}"},
-                    "period": {
-                        "start": "2024-01-15T09:00:00Z",
-                        "end": "2024-01-15T10:00:00Z"
-                    },
-                    "reasonCode": [{"coding": [{"code": "Z00.00", "display": "Encounter for general adult medical examination"}]}]
-                }
-            },
-            {
-                "status": "in-progress",
-                "class_code": "AMB",
-                "subject_patient_id": created_patients[1].id,
-                "period_start": "2024-01-16T14:00:00Z",
-                "period_end": None,
-                "reason_code": "Z00.00",
-                "resource": {
-                    "resourceType": "Encounter",
-                    "status": "in-progress",
-                    "class": {"code": "AMB", "display": "Ambulatory"},
-                    "subject": {"reference": f"Patient/{created_patients[1].id}"},
-                    "period": {
-                        "start": "2024-01-16T14:00:00Z"
-                    },
-                    "reasonCode": [{"coding": [{"code": "Z00.00", "display": "Encounter for general adult medical examination"}]}]
-                }
-            }
-        ]
 
-        created_encounters = []
-        for encounter_data in encounters_data:
-            encounter = EncounterModel(**encounter_data)
-            db.add(encounter)
-            db.flush()  # Get the ID
-            created_encounters.append(encounter)
-
-        db.commit()
-
-        # Create sample observations
-        observations_data = [
-            {
-                "status": "final",
-                "code_code": "8310-5",
-                "subject_patient_id": created_patients[0].id,
-                "encounter_id": created_encounters[0].id,
-                "effective_datetime": "2024-01-15T09:30:00Z",
-                "value_quantity_value": 98.6,
-                "value_quantity_unit": "°F",
-                "value_string": None,
-                "resource": {
-                    "resourceType": "Observation",
-                    "status": "final",
-                    "code": {"coding": [{"code": "8310-5", "display": "Body temperature"}]},
-                    "subject": {"reference": f"Patient/{created_patients[0].id}"},
-                    "encounter": {"reference": f"Encounter/{created_encounters[0].id}"},
-                    "effectiveDateTime": "2024-01-15T09:30:00Z",
-                    "valueQuantity": {"value": 98.6, "unit": "°F", "system": "http://unitsofmeasure.org", "code": "[degF]"}
-                }
-            },
-            {
-                "status": "final",
-                "code_code": "29463-7",
-                "subject_patient_id": created_patients[0].id,
-                "encounter_id": created_encounters[0].id,
-                "effective_datetime": "2024-01-15T09:35:00Z",
-                "value_quantity_value": 70,
-                "value_quantity_unit": "kg",
-                "value_string": None,
-                "resource": {
-                    "resourceType": "Observation",
-                    "status": "final",
-                    "code": {"coding": [{"code": "29463-7", "display": "Body weight"}]},
-                    "subject": {"reference": f"Patient/{created_patients[0].id}"},
-                    "encounter": {"reference": f"Encounter/{created_encounters[0].id}"},
-                    "effectiveDateTime": "2024-01-15T09:35:00Z",
-                    "valueQuantity": {"value": 70, "unit": "kg", "system": "http://unitsofmeasure.org", "code": "kg"}
-                }
-            },
-            {
-                "status": "preliminary",
-                "code_code": "8310-5",
-                "subject_patient_id": created_patients[1].id,
-                "encounter_id": created_encounters[1].id,
-                "effective_datetime": "2024-01-16T14:15:00Z",
-                "value_quantity_value": 99.2,
-                "value_quantity_unit": "°F",
-                "value_string": None,
-                "resource": {
-                    "resourceType": "Observation",
-                    "status": "preliminary",
-                    "code": {"coding": [{"code": "8310-5", "display": "Body temperature"}]},
-                    "subject": {"reference": f"Patient/{created_patients[1].id}"},
-                    "encounter": {"reference": f"Encounter/{created_encounters[1].id}"},
-                    "effectiveDateTime": "2024-01-16T14:15:00Z",
-                    "valueQuantity": {"value": 99.2, "unit": "°F", "system": "http://unitsofmeasure.org", "code": "[degF]"}
-                }
-            }
-        ]
+def _init_worker():
+    # Connections inherited from the parent must not be shared with it
+    engine.dispose(close=False)
+
+def _load_synthetic_chunk(offset: int, patients: int, seed: int, end_date: date, years: int) -> Dict[str, int]:
+    batch = {"fhir.patient": [], "fhir.encounter": [], "fhir.observation": []}
+    for record in generate(patients, seed, end_date=end_date, years=years, offset=offset):
+        batch["fhir.patient"].append(record.patient)
+        batch["fhir.encounter"].extend(record.encounters)
+        batch["fhir.observation"].extend(record.observations)
+    with engine.begin() as conn:
+        return load_batch(conn, batch)
+
+def _load_ndjson_chunk(resource_type: str, lines: List[str]) -> Dict[str, int]:
+    rows = []
+    for line in lines:
+        resource = json.loads(line)
+        rows.append(row_from_resource(resource_type, resource["id"], resource))
+    with engine.begin() as conn:
+        return load_batch(conn, {RESOURCE_TABLES[resource_type][0]: rows})
+
+
+def _run_bounded(pool: ProcessPoolExecutor, calls: Iterator[tuple], limit: int) -> Iterator[Dict[str, int]]:
+    """Submit (fn, *args) calls keeping at most limit in flight, yielding results in order"""
+    pending = deque()
+    for fn, *args in calls:
+        pending.append(pool.submit(fn, *args))
+        if len(pending) >= limit:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _report(totals: Dict[str, int], started: float) -> None:
+    elapsed = time.perf_counter() - started
+    rates = ", ".join(f"{table} {count} ({count / elapsed:.0f}/s)" for table, count in totals.items())
+    print(f"[{elapsed:7.1f}s] inserted {rates}")
 
-        for observation_data in observations_data:
-            observation = ObservationModel(**observation_data)
-            db.add(observation)
+def load_synthetic_data(patients: int, seed: int, workers: int, chunk_size: int, end_date: date, years: int):
+    """Generate and load patients in chunks of chunk_size across worker processes"""
+    window_start = datetime.combine(end_date - timedelta(days=365 * years), dt_time.min, tzinfo=timezone.utc)
+    months = (end_date.year - window_start.year) * 12 + end_date.month - window_start.month
+    # Create every monthly partition first; rows must not pile up in the default partition
+    ObservationPartitionManager(engine).ensure_partitions(window_start, months)
 
-        db.commit()
-        print("Seed data created successfully!")
+    totals = {"fhir.patient": 0, "fhir.encounter": 0, "fhir.observation": 0}
+    started = time.perf_counter()
+    calls = (
+        (_load_synthetic_chunk, offset, min(chunk_size, patients - offset), seed, end_date, years)
+        for offset in range(0, patients, chunk_size)
+    )
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        for inserted in _run_bounded(pool, calls, workers * 2):
+            for table, count in inserted.items():
+                totals[table] += count
+            _report(totals, started)
+    print("Synthetic data loaded successfully!")
+
+
+def _ndjson_chunks(path: Path, chunk_size: int) -> Iterator[List[str]]:
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        lines = (line for line in f if line.strip())
+        while chunk := list(itertools.islice(lines, chunk_size)):
+            yield chunk
+
+def _observation_months(path: Path) -> List[date]:
+    """Months covered by an Observation file, read without parsing whole resources"""
+    opener = gzip.open if path.suffix == ".gz" else open
+    months = set()
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            match = EFFECTIVE_MONTH.search(line)
+            if match:
+                months.add(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+def load_ndjson(input_dir: Path, workers: int, chunk_size: int):
+    """Load <Type>.ndjson[.gz] files from input_dir, one resource type after the other"""
+    started = time.perf_counter()
+    totals: Dict[str, int] = {}
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        for resource_type in RESOURCE_TABLES:
+            paths = [p for p in (input_dir / f"{resource_type}.ndjson", input_dir / f"{resource_type}.ndjson.gz") if p.exists()]
+            for path in paths:
+                if resource_type == "Observation":
+                    manager = ObservationPartitionManager(engine)
+                    for month in _observation_months(path):
+                        manager.ensure_partition(month)
+                # All chunks of a type finish before the next type references them
+                calls = ((_load_ndjson_chunk, resource_type, chunk) for chunk in _ndjson_chunks(path, chunk_size))
+                for inserted in _run_bounded(pool, calls, workers * 2):
+                    for table, count in inserted.items():
+                        totals[table] = totals.get(table, 0) + count
+                _report(totals, started)
+    print("NDJSON data loaded successfully!")
 
-    except Exception as e:
-        print(f"Error creating seed data: {e}")
-        db.rollback()
-    finally:
-        db.close()
 
 if __name__ == "__main__":
-    create_seed_data()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--synthetic", type=int, metavar="PATIENTS", help="generate and load this many synthetic patients")
+    parser.add_argument("--input-dir", type=Path, help="load <Type>.ndjson[.gz] files written by scripts/synthetic_data.py")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", type=date.fromisoformat, default=date(2025, 1, 1))
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--chunk-size", type=int, default=2000, help="patients (or NDJSON lines) per transaction")
+    args = parser.parse_args()
 
+    create_seed_data()
+    if args.synthetic:
+        load_synthetic_data(args.synthetic, args.seed, args.workers, args.chunk_size, args.end_date, args.years)
+    if args.input_dir:
+        load_ndjson(args.input_dir, args.workers, args.chunk_size * 20)
@@ -0,0 +1,18 @@
+from src.config.settings import settings
+from src.infrastructure.db.partitions import maintain_partitions
+from src.infrastructure.db.session import engine
+
+
+def main():
+    # The same work as the scheduled partitions job, run now
+    result = maintain_partitions(engine)
+    for name in result["created"]:
+        print(f"Created partition {name}")
+    for name in result["split"]:
+        print(f"Created partition {name} from rows in the default partition")
+    for name in result["retired"]:
+        print(f"Retired partition {name} ({settings.OBSERVATION_RETENTION_ACTION})")
+    print("Partition maintenance done")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+from src.infrastructure.db.purge import TombstonePurger
+from src.infrastructure.db.session import engine
+
+
+def purge_tombstones():
+    # Same throttled batches as the in-process purger; safe to run next to it (SKIP LOCKED)
+    totals = TombstonePurger(engine).run_once()
+    for step, rows in totals.items():
+        if rows:
+            print(f"{step}: {rows} rows")
+
+    print("Tombstone purge done")
+
+if __name__ == "__main__":
+    purge_tombstones()
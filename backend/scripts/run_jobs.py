@@ -0,0 +1,38 @@
+"""Run background jobs in a dedicated process instead of (or next to) the app processes.
+
+Claims from the same job table as the in-process runners (set JOB_WORKERS=0
+on the app to leave every job to this process). Stops on Ctrl+C / SIGTERM;
+running jobs are requeued at their next progress report.
+
+Usage: python scripts/run_jobs.py [--workers 4]
+"""
+import argparse
+import signal
+import threading
+
+from src.config.settings import settings
+from src.infrastructure.db.job_handlers import build_job_runner
+from src.infrastructure.db.session import engine, replica_router
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=max(settings.JOB_WORKERS, 1))
+    args = parser.parse_args()
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+
+    # $export reads from a replica when one is healthy
+    replica_router.start(settings.REPLICA_HEALTH_CHECK_SECONDS)
+    runner = build_job_runner(engine, args.workers)
+    runner.start()
+    print(f"Job runner started with {args.workers} workers")
+    stopped.wait()
+    runner.stop()
+    replica_router.stop()
+    print("Job runner stopped")
+
+if __name__ == "__main__":
+    main()
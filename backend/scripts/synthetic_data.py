@@ -0,0 +1,318 @@
+"""Generate a reproducible synthetic FHIR dataset (Patients, Encounters, Observations).
+
+Output is deterministic for a given --seed and --patients, so benchmark runs
+on different machines or commits load exactly the same data. Patients get
+a demographic profile and per-patient vital sign baselines; each encounter
+records a subset of the vitals in COMMON_LOINC_CODES around that baseline.
+Roughly 4 encounters and 17 observations are generated per patient.
+
+Writes one NDJSON file per resource type (FHIR bulk data format) to
+--output-dir. scripts/load_seed.py uses generate() directly to load the
+database without the intermediate files.
+
+Usage: python scripts/synthetic_data.py --patients 100000 [--seed 42] [--output-dir data/synthetic] [--gzip]
+"""
+import argparse
+import gzip
+import json
+import math
+import random
+import sys
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src.domain.fhir.observation.specs import COMMON_LOINC_CODES
+
+IDENTIFIER_SYSTEM = "http://hospital.example.com/patients"
+LOINC_SYSTEM = "http://loinc.org"
+UCUM_SYSTEM = "http://unitsofmeasure.org"
+ICD10_SYSTEM = "http://hl7.org/fhir/sid/icd-10"
+ACT_CODE_SYSTEM = "http://terminology.hl7.org/CodeSystem/v3-ActCode"
+
+GENDERS = [("female", 0.505), ("male", 0.485), ("other", 0.005), ("unknown", 0.005)]
+FAMILY_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+    "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee",
+    "Santoso", "Wijaya", "Saputra", "Hidayat", "Kusuma", "Pratama", "Nugroho", "Siregar", "Lubis", "Hasibuan",
+]
+GIVEN_NAMES = {
+    "female": ["Mary", "Jane", "Linda", "Sarah", "Emily", "Siti", "Dewi", "Putri", "Ayu", "Rina", "Maria", "Anna"],
+    "male": ["John", "James", "Robert", "Michael", "David", "Budi", "Agus", "Andi", "Rizky", "Eko", "Ahmad", "Daniel"],
+}
+ENCOUNTER_CLASSES = [
+    (("AMB", "ambulatory"), 0.70),
+    (("EMER", "emergency"), 0.12),
+    (("IMP", "inpatient encounter"), 0.10),
+    (("VR", "virtual"), 0.05),
+    (("HH", "home health"), 0.03),
+]
+ENCOUNTER_STATUSES = [("finished", 0.90), ("cancelled", 0.04), ("in-progress", 0.03), ("planned", 0.03)]
+REASON_CODES = [
+    (("Z00.00", "Encounter for general adult medical examination"), 0.35),
+    (("I10", "Essential (primary) hypertension"), 0.15),
+    (("E11.9", "Type 2 diabetes mellitus without complications"), 0.10),
+    (("J06.9", "Acute upper respiratory infection, unspecified"), 0.12),
+    (("R50.9", "Fever, unspecified"), 0.08),
+    (("M54.5", "Low back pain"), 0.08),
+    (("R07.9", "Chest pain, unspecified"), 0.06),
+    (("K21.9", "Gastro-esophageal reflux disease without esophagitis"), 0.06),
+]
+OBSERVATION_STATUSES = [("final", 0.93), ("amended", 0.03), ("preliminary", 0.03), ("entered-in-error", 0.01)]
+
+# LOINC code -> (UCUM unit, chance it is recorded at an encounter, decimals)
+VITALS = {
+    "8310-5": ("Cel", 0.85, 1),
+    "29463-7": ("kg", 0.60, 1),
+    "8302-2": ("cm", 0.20, 0),
+    "8867-4": ("/min", 0.95, 0),
+    "9279-1": ("/min", 0.70, 0),
+    "8480-6": ("mm[Hg]", 0.85, 0),
+    "8462-4": ("mm[Hg]", 0.85, 0),
+}
+# Planned and cancelled encounters never recorded vitals
+RECORDS_VITALS = {"finished", "in-progress"}
+
+
+@dataclass
+class SyntheticPatient:
+    """One patient with its encounters and observations, as table rows with FHIR resources"""
+    patient: Dict[str, Any]
+    encounters: List[Dict[str, Any]] = field(default_factory=list)
+    observations: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _weighted(rng: random.Random, choices: List[Tuple[Any, float]]) -> Any:
+    return rng.choices([c for c, _ in choices], weights=[w for _, w in choices])[0]
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    """Knuth's method; fine for the small means used here"""
+    limit, k, p = math.exp(-mean), 0, rng.random()
+    while p > limit:
+        k += 1
+        p *= rng.random()
+    return k
+
+def _uuid(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+def _timestamp(value: datetime) -> str:
+    return value.isoformat().replace("+00:00", "Z")
+
+
+def _baseline(rng: random.Random, gender: str, age: int) -> Dict[str, float]:
+    """Per-patient vital sign baseline; encounters add noise around it"""
+    if age < 18:
+        height = 50 + age * 6.5 + rng.gauss(0, 6)
+    else:
+        height = rng.gauss(176 if gender == "male" else 163, 7)
+    bmi = rng.gauss(17 + min(age, 18) * 0.2 if age < 18 else 26, 4 if age >= 18 else 2)
+    hypertension = 0.4 * max(age - 40, 0)
+    return {
+        "8310-5": rng.gauss(36.8, 0.25),
+        "29463-7": max(bmi, 14) * (height / 100) ** 2,
+        "8302-2": height,
+        "8867-4": rng.gauss(72 + max(12 - age, 0) * 3, 8),
+        "9279-1": rng.gauss(16 + max(12 - age, 0), 1.5),
+        "8480-6": rng.gauss(115 + hypertension, 12),
+        "8462-4": rng.gauss(75 + hypertension / 3, 8),
+    }
+
+def _vital_value(rng: random.Random, code: str, baseline: float, encounter_class: str) -> float:
+    acute = encounter_class in ("EMER", "IMP")
+    if code == "8310-5":
+        fever = rng.uniform(0.8, 2.5) if acute and rng.random() < 0.3 else 0
+        return baseline + rng.gauss(0, 0.3) + fever
+    if code == "29463-7":
+        return baseline * rng.gauss(1, 0.02)
+    if code == "8302-2":
+        return baseline + rng.gauss(0, 0.5)
+    if code == "8867-4":
+        return baseline + rng.gauss(0, 6) + acute * rng.uniform(5, 25)
+    if code == "9279-1":
+        return baseline + rng.gauss(0, 1.5) + acute * rng.uniform(0, 6)
+    return baseline + rng.gauss(0, 8 if code == "8480-6" else 5)
+
+
+def _patient(rng: random.Random, index: int, reference_date: date) -> Tuple[Dict[str, Any], int]:
+    patient_id = _uuid(rng)
+    gender = _weighted(rng, GENDERS)
+    # Adult-heavy age distribution with a paediatric tail
+    age = int(rng.triangular(0, 95, 45)) if rng.random() > 0.18 else rng.randint(0, 17)
+    birth_date = reference_date - timedelta(days=age * 365 + rng.randint(0, 364))
+    family = rng.choice(FAMILY_NAMES)
+    given = rng.choice(GIVEN_NAMES.get(gender) or GIVEN_NAMES["female"] + GIVEN_NAMES["male"])
+    identifier = f"SYN{index:09d}"
+    row = {
+        "id": patient_id,
+        "identifier_value": identifier,
+        "name_family": family,
+        "name_given": given,
+        "gender": gender,
+        "birth_date": birth_date.isoformat(),
+        "resource": {
+            "resourceType": "Patient",
+            "identifier": [{"value": identifier, "system": IDENTIFIER_SYSTEM}],
+            "name": [{"family": family, "given": [given]}],
+            "gender": gender,
+            "birthDate": birth_date.isoformat(),
+        },
+    }
+    return row, age
+
+def _encounter(rng: random.Random, patient_id: str, start: datetime) -> Dict[str, Any]:
+    encounter_id = _uuid(rng)
+    (class_code, class_display) = _weighted(rng, ENCOUNTER_CLASSES)
+    status = _weighted(rng, ENCOUNTER_STATUSES)
+    (reason_code, reason_display) = _weighted(rng, REASON_CODES)
+    if class_code == "IMP":
+        end = start + timedelta(days=rng.randint(1, 10), hours=rng.randint(0, 23))
+    else:
+        end = start + timedelta(minutes=rng.choice([15, 20, 30, 45, 60, 90, 120, 240]))
+    period = {"start": _timestamp(start)}
+    if status == "finished":
+        period["end"] = _timestamp(end)
+    return {
+        "id": encounter_id,
+        "status": status,
+        "class_code": class_code,
+        "subject_patient_id": patient_id,
+        "period_start": period["start"],
+        "period_end": period.get("end"),
+        "reason_code": reason_code,
+        "resource": {
+            "resourceType": "Encounter",
+            "status": status,
+            "class": [{"coding": [{"system": ACT_CODE_SYSTEM, "code": class_code, "display": class_display}]}],
+            "subject": {"reference": f"Patient/{patient_id}"},
+            "period": period,
+            "reasonCode": [{"coding": [{"system": ICD10_SYSTEM, "code": reason_code, "display": reason_display}]}],
+        },
+    }
+
+def _observations(
+    rng: random.Random, patient_id: str, encounter: Dict[str, Any], start: datetime, age: int, baseline: Dict[str, float]
+) -> Iterator[Dict[str, Any]]:
+    if encounter["status"] not in RECORDS_VITALS or encounter["class_code"] == "VR":
+        return
+    effective = start + timedelta(minutes=rng.randint(2, 20))
+    blood_pressure = rng.random() < VITALS["8480-6"][1]
+    for code, (unit, chance, decimals) in VITALS.items():
+        if code in ("8480-6", "8462-4"):
+            # Systolic and diastolic are always taken together
+            if not blood_pressure:
+                continue
+        elif rng.random() >= (chance if code != "8302-2" or age < 18 else chance / 2):
+            continue
+        value = round(_vital_value(rng, code, baseline[code], encounter["class_code"]), decimals)
+        if decimals == 0:
+            value = int(value)
+        status = _weighted(rng, OBSERVATION_STATUSES)
+        yield {
+            "id": _uuid(rng),
+            "status": status,
+            "code_code": code,
+            "subject_patient_id": patient_id,
+            "encounter_id": encounter["id"],
+            "effective_datetime": _timestamp(effective),
+            "value_quantity_value": value,
+            "value_quantity_unit": unit,
+            "value_string": None,
+            "resource": {
+                "resourceType": "Observation",
+                "status": status,
+                "category": [{"coding": [{
+                    "system": "http://terminology.hl7.org/CodeSystem/observation-category", "code": "vital-signs",
+                }]}],
+                "code": {"coding": [{"system": LOINC_SYSTEM, "code": code, "display": COMMON_LOINC_CODES[code]}]},
+                "subject": {"reference": f"Patient/{patient_id}"},
+                "encounter": {"reference": f"Encounter/{encounter['id']}"},
+                "effectiveDateTime": _timestamp(effective),
+                "valueQuantity": {"value": value, "unit": unit, "system": UCUM_SYSTEM, "code": unit},
+            },
+        }
+
+
+def generate(
+    patients: int,
+    seed: int = 42,
+    encounters_per_patient: float = 4.0,
+    end_date: date = date(2025, 1, 1),
+    years: int = 5,
+    offset: int = 0,
+) -> Iterator[SyntheticPatient]:
+    """Yield patients offset .. offset + patients - 1 with their encounters and observations
+
+    Each patient draws from its own generator seeded by (seed, index), so the
+    output for patient N does not depend on how many patients come before it
+    and ranges of the dataset can be generated independently.
+    """
+    window_end = datetime.combine(end_date, datetime.min.time(), tzinfo=timezone.utc)
+    window_seconds = int(timedelta(days=365 * years).total_seconds())
+
+    for index in range(offset, offset + patients):
+        rng = random.Random(seed * 1_000_003 + index)
+        patient, age = _patient(rng, index, end_date)
+        record = SyntheticPatient(patient)
+        baseline = _baseline(rng, patient["gender"], age)
+
+        starts = sorted(
+            window_end - timedelta(seconds=rng.randrange(window_seconds))
+            for _ in range(max(_poisson(rng, encounters_per_patient), 1))
+        )
+        for start in starts:
+            # Clinic hours for everything but emergencies
+            if rng.random() > 0.12:
+                start = start.replace(hour=rng.randint(7, 17), minute=rng.choice([0, 15, 30, 45]), second=0)
+            encounter = _encounter(rng, patient["id"], start)
+            record.encounters.append(encounter)
+            record.observations.extend(_observations(rng, patient["id"], encounter, start, age, baseline))
+        yield record
+
+
+def to_fhir(row: Dict[str, Any]) -> Dict[str, Any]:
+    """The stored FHIR resource of a generated row, with its id"""
+    return {"resourceType": row["resource"]["resourceType"], "id": row["id"], **row["resource"]}
+
+
+def write_ndjson(records: Iterator[SyntheticPatient], output_dir: Path, compress: bool = False) -> Dict[str, int]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    suffix = ".ndjson.gz" if compress else ".ndjson"
+    opener = gzip.open if compress else open
+    counts = {"Patient": 0, "Encounter": 0, "Observation": 0}
+    files = {name: opener(output_dir / f"{name}{suffix}", "wt", encoding="utf-8") for name in counts}
+    try:
+        for record in records:
+            for name, rows in (("Patient", [record.patient]), ("Encounter", record.encounters), ("Observation", record.observations)):
+                for row in rows:
+                    files[name].write(json.dumps(to_fhir(row), separators=(",", ":")) + "\n")
+                counts[name] += len(rows)
+    finally:
+        for f in files.values():
+            f.close()
+    return counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--patients", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--encounters-per-patient", type=float, default=4.0, help="mean of a Poisson distribution")
+    parser.add_argument("--end-date", type=date.fromisoformat, default=date(2025, 1, 1))
+    parser.add_argument("--years", type=int, default=5, help="encounters fall in the years before --end-date")
+    parser.add_argument("--output-dir", type=Path, default=Path("data/synthetic"))
+    parser.add_argument("--gzip", action="store_true")
+    args = parser.parse_args()
+
+    records = generate(args.patients, args.seed, args.encounters_per_patient, args.end_date, args.years)
+    counts = write_ndjson(records, args.output_dir, args.gzip)
+    print(json.dumps({"seed": args.seed, "output_dir": str(args.output_dir), **counts}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
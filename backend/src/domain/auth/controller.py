@@ -1,4 +1,6 @@
+from typing import Optional
 from uuid import UUID
+from .entities import User
 from .repositories import UserRepository
 from .view import LoginRequest, TokenResponse, MeResponse
 from ..bundle.services import PasswordService, JWTService
@@ -20,13 +22,33 @@ class AuthController:
         if not user:
             raise ValueError("Invalid credentials")
 
-        if not self.password_service.verify_password(request.password, user.hashed_password):
+        verified, new_hash = self.password_service.verify_and_update(request.password, user.hashed_password)
+        return self._complete_login(user, verified, new_hash)
+
+    async def login_async(self, request: LoginRequest) -> TokenResponse:
+        """Handle user login without blocking the event loop on bcrypt"""
+        user = self.user_repo.get_by_email(request.email)
+        if not user:
+            raise ValueError("Invalid credentials")
+
+        verified, new_hash = await self.password_service.verify_and_update_async(
+            request.password, user.hashed_password
+        )
+        return self._complete_login(user, verified, new_hash)
+
+    def _complete_login(self, user: User, verified: bool, new_hash: Optional[str]) -> TokenResponse:
+        if not verified:
             raise ValueError("Invalid credentials")
 
         if not user.is_active:
             raise ValueError("User is inactive")
 
-        token = self.jwt_service.create_access_token({"sub": user.email})
+        # Transparently upgrade hashes made with a different bcrypt cost
+        if new_hash:
+            self.user_repo.update_password(user.id, new_hash)
+
+        # role lets admission control pick the rate limit without a database lookup
+        token = self.jwt_service.create_access_token({"sub": user.email, "role": user.role.value})
         return TokenResponse(access_token=token, token_type="bearer")
 
     def get_me(self, user_id: UUID) -> MeResponse:
@@ -17,3 +17,7 @@ class UserRepository(ABC):
     @abstractmethod
     def create(self, user: User) -> User:
         pass
+
+    @abstractmethod
+    def update_password(self, user_id: UUID, hashed_password: str) -> None:
+        pass
@@ -1,43 +1,293 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Dict
-
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+from uuid import uuid4
 
 from src.config.settings import settings
 
+# passlib/bcrypt and python-jose (which pulls in cryptography) are imported on
+# first use so they stay off the worker cold-start path
+
+
+class PasswordHashPoolFull(RuntimeError):
+    pass
+
+class PasswordHashPool:
+    """Bounded worker pool for bcrypt so hashing never runs on the event loop"""
+
+    def __init__(self, max_workers: int, max_pending: int):
+        # bcrypt releases the GIL while hashing, so threads verify in parallel
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+        self._lock = threading.Lock()
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.completed = 0
+        self.rejected = 0
+        self.queue_seconds_total = 0.0
+        self.queue_seconds_max = 0.0
+
+    def submit(self, fn: Callable, *args: Any) -> Future:
+        """Queue fn on the pool, or raise PasswordHashPoolFull when saturated"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHashPoolFull("Too many concurrent password verifications")
+
+        enqueued_at = time.perf_counter()
+
+        def run() -> Any:
+            waited = time.perf_counter() - enqueued_at
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+                with self._lock:
+                    self.completed += 1
+                    self.queue_seconds_total += waited
+                    self.queue_seconds_max = max(self.queue_seconds_max, waited)
+
+        return self._executor.submit(run)
+
+    def run(self, fn: Callable, *args: Any) -> Any:
+        return self.submit(fn, *args).result()
+
+    async def run_async(self, fn: Callable, *args: Any) -> Any:
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "queue_seconds_avg": self.queue_seconds_total / self.completed if self.completed else 0.0,
+                "queue_seconds_max": self.queue_seconds_max,
+            }
+
+_password_hash_pool: Optional[PasswordHashPool] = None
+_password_hash_pool_lock = threading.Lock()
+
+def get_password_hash_pool() -> PasswordHashPool:
+    """Process-wide password hashing pool, created on first use"""
+    global _password_hash_pool
+    if _password_hash_pool is None:
+        with _password_hash_pool_lock:
+            if _password_hash_pool is None:
+                _password_hash_pool = PasswordHashPool(
+                    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING
+                )
+    return _password_hash_pool
 
 class PasswordService:
-    def __init__(self):
-        # Use bcrypt_sha256 to avoid bcrypt 72-byte password truncation issue
-        self.pwd_context = CryptContext(schemes=["bcrypt_sha256"], deprecated="auto")
+    def __init__(self, rounds: Optional[int] = None, pool: Optional[PasswordHashPool] = None):
+        from passlib.context import CryptContext
+
+        # Use bcrypt_sha256 to avoid bcrypt 72-byte password truncation issue.
+        # Hashes with a different cost are flagged for rehash by verify_and_update.
+        self.pwd_context = CryptContext(
+            schemes=["bcrypt_sha256"],
+            deprecated="auto",
+            bcrypt_sha256__rounds=rounds or settings.BCRYPT_ROUNDS,
+        )
+        self.pool = pool or get_password_hash_pool()
 
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return self.pwd_context.verify(plain_password, hashed_password)
+        return self.verify_and_update(plain_password, hashed_password)[0]
+
+    def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify on the hash pool; returns (valid, new hash when the cost changed)"""
+        return self.pool.run(self.pwd_context.verify_and_update, plain_password, hashed_password)
+
+    async def verify_and_update_async(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Like verify_and_update, awaiting the pool instead of blocking the event loop"""
+        return await self.pool.run_async(self.pwd_context.verify_and_update, plain_password, hashed_password)
 
     def get_password_hash(self, password: str) -> str:
         return self.pwd_context.hash(password)
 
-class JWTService:
+class JWTKeySet:
+    """Signing key and every key still accepted for verification, indexed by kid
+
+    HS* uses SECRET_KEY. RS*/ES* read PEM files from keys_dir: `<kid>.pem` is a
+    private key (its public half verifies), `<kid>.pub.pem` is a retired key
+    that only verifies. The active kid defaults to the last private key by name.
+    """
+
+    def __init__(self, algorithm: str, secret_key: str, keys_dir: str = "", active_kid: str = ""):
+        from jose import jwk
+
+        self.algorithm = algorithm
+        self.verification_keys: Dict[str, Any] = {}
+        if algorithm.startswith("HS"):
+            self.active_kid = active_kid or "default"
+            self.signing_key = jwk.construct(secret_key, algorithm)
+            self.verification_keys[self.active_kid] = self.signing_key
+            return
+
+        if not keys_dir:
+            raise ValueError(f"{algorithm} requires JWT_KEYS_DIR")
+        signing_keys = {}
+        for path in sorted(Path(keys_dir).glob("*.pem")):
+            kid, _, kind = path.name[:-len(".pem")].partition(".")
+            key = jwk.construct(path.read_text(), algorithm)
+            if kind == "pub":
+                self.verification_keys[kid] = key
+            else:
+                signing_keys[kid] = key
+                self.verification_keys[kid] = key.public_key()
+        if not signing_keys:
+            raise ValueError(f"No private keys found in {keys_dir}")
+
+        self.active_kid = active_kid or max(signing_keys)
+        if self.active_kid not in signing_keys:
+            raise ValueError(f"No private key for kid {self.active_kid}")
+        self.signing_key = signing_keys[self.active_kid]
+
+    def verification_key(self, kid: Optional[str]) -> Any:
+        # Tokens issued before kids were added carry none; try the active key
+        key = self.verification_keys.get(kid or self.active_kid)
+        if key is None:
+            raise ValueError("Unknown signing key")
+        return key
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified token digests, each kept until its token's exp"""
+
+    def __init__(self, max_size: int):
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest: bytes, now: float) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None and entry[0] <= now:
+                del self._entries[digest]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(digest)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, digest: bytes, payload: Dict[str, Any], expires_at: float) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[digest] = (expires_at, payload)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+class TokenRevocationList:
+    """Revoked token ids (jti), each remembered until its token would expire anyway
+
+    Kept in this process only; the API uses the Postgres-backed subclass in
+    src/infrastructure/db/token_revocations.py so every worker sees a logout.
+    """
+
     def __init__(self):
-        self.secret_key = settings.SECRET_KEY
-        self.algorithm = settings.ALGORITHM
+        self._revoked: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        self.remember({jti: expires_at})
+
+    def remember(self, revoked: Dict[str, float]) -> None:
+        """Add jti -> exp entries, dropping the ones that have expired"""
+        now = time.time()
+        with self._lock:
+            self._revoked.update(revoked)
+            for expired in [j for j, exp in self._revoked.items() if exp <= now]:
+                del self._revoked[expired]
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        return jti is not None and jti in self._revoked
+
+    def start(self, interval_seconds: float) -> None:
+        """Nothing to refresh in memory"""
+        pass
+
+    def stop(self) -> None:
+        pass
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+class JWTService:
+    def __init__(
+        self,
+        key_set: Optional[JWTKeySet] = None,
+        revocations: Optional[TokenRevocationList] = None,
+        cache_size: Optional[int] = None,
+    ):
         self.access_token_expire_minutes = settings.ACCESS_TOKEN_EXPIRE_MINUTES
+        self.key_set = key_set or JWTKeySet(
+            settings.ALGORITHM, settings.SECRET_KEY, settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KID
+        )
+        self.algorithm = self.key_set.algorithm
+        self.revocations = revocations if revocations is not None else TokenRevocationList()
+        self.verified_cache = VerifiedTokenCache(
+            settings.JWT_VERIFY_CACHE_SIZE if cache_size is None else cache_size
+        )
 
     def create_access_token(self, data: Dict[str, Any], expires_delta: timedelta = None) -> str:
+        from jose import jwt
+
         to_encode = data.copy()
         if expires_delta:
             expire = datetime.utcnow() + expires_delta
         else:
             expire = datetime.utcnow() + timedelta(minutes=self.access_token_expire_minutes)
         to_encode.update({"exp": expire})
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+        to_encode.setdefault("jti", uuid4().hex)
+        encoded_jwt = jwt.encode(
+            to_encode, self.key_set.signing_key, algorithm=self.algorithm,
+            headers={"kid": self.key_set.active_kid},
+        )
         return encoded_jwt
 
     def verify_token(self, token: str) -> Dict[str, Any]:
+        """Verify a bearer token; repeat calls with the same token skip the decode"""
+        digest = hashlib.sha256(token.encode()).digest()
+        payload = self.verified_cache.get(digest, time.time())
+        if payload is None:
+            payload = self._decode(token)
+            if isinstance(payload.get("exp"), (int, float)):
+                self.verified_cache.put(digest, payload, payload["exp"])
+
+        if self.revocations.is_revoked(payload.get("jti")):
+            raise ValueError("Token revoked")
+        return dict(payload)
+
+    def revoke_token(self, token: str) -> None:
+        """Reject the token from now on, wherever revocations are shared"""
+        payload = self.verify_token(token)
+        if "jti" not in payload or "exp" not in payload:
+            raise ValueError("Token cannot be revoked")
+        self.revocations.revoke(payload["jti"], payload["exp"])
+
+    def _decode(self, token: str) -> Dict[str, Any]:
+        from jose import JWTError, jwt
+
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            return payload
+            key = self.key_set.verification_key(jwt.get_unverified_header(token).get("kid"))
+            return jwt.decode(token, key, algorithms=[self.algorithm])
         except JWTError:
             raise ValueError("Invalid token")
 
@@ -0,0 +1,97 @@
+from typing import Dict, List
+from urllib.parse import urlencode
+
+from src.domain.auth.entities import User
+from src.domain.auth.policies import AuthPolicies
+from src.domain.fhir.changes.entities import Change, parse_cursor
+from src.domain.fhir.changes.repositories import ChangeLogRepository
+from src.domain.fhir.changes.view import (
+    BundleEntry,
+    BundleEntryRequest,
+    BundleLink,
+    ChangeBundle,
+    ChangeFeedRequest,
+)
+from src.domain.fhir.encounter.controller import EncounterController
+from src.domain.fhir.errors import CursorExpired
+from src.domain.fhir.observation.controller import ObservationController
+from src.domain.fhir.patient.controller import PatientController
+
+RESOURCE_TYPES = ("Patient", "Encounter", "Observation")
+
+
+class ChangeFeedController:
+    def __init__(
+        self,
+        change_repo: ChangeLogRepository,
+        patient_controller: PatientController,
+        encounter_controller: EncounterController,
+        observation_controller: ObservationController,
+    ):
+        self.change_repo = change_repo
+        self.loaders = {
+            "Patient": patient_controller.get_patient_resources,
+            "Encounter": encounter_controller.get_encounter_resources,
+            "Observation": observation_controller.get_observation_resources,
+        }
+
+    def list_changes(self, request: ChangeFeedRequest, user: User, base_url: str) -> ChangeBundle:
+        """One page of the change feed after request.cursor, as a history Bundle
+
+        Each changed resource appears once per page with its current state, or
+        as a tombstone (DELETE entry without resource) once deleted. The next
+        link carries the cursor to resume from, also when the page is empty.
+        Raises CursorExpired when the entry the cursor points at was purged:
+        changes after it may be gone too.
+        """
+        if not AuthPolicies.can_read_all_resources(user):
+            raise PermissionError("Insufficient permissions")
+        types = request.types or list(RESOURCE_TYPES)
+        unknown = sorted(set(types) - set(RESOURCE_TYPES))
+        if unknown:
+            raise ValueError(f"Unsupported _type: {', '.join(unknown)}")
+
+        position = parse_cursor(request.cursor)
+        if position != (0, 0):
+            oldest = self.change_repo.oldest_seq()
+            if oldest is not None and position[1] < oldest:
+                raise CursorExpired(request.cursor)
+        changes = self.change_repo.list_since(position, request.count, types)
+
+        # Keep the last change per resource; its position decides the entry order
+        latest: Dict[tuple, Change] = {}
+        for change in changes:
+            key = (change.resource_type, change.resource_id)
+            latest.pop(key, None)
+            latest[key] = change
+
+        current = {}
+        for resource_type, load in self.loaders.items():
+            ids = [c.resource_id for c in latest.values() if c.resource_type == resource_type and c.operation != "delete"]
+            if ids:
+                current[resource_type] = load(ids, user)
+
+        entries: List[BundleEntry] = []
+        for change in latest.values():
+            url = f"{change.resource_type}/{change.resource_id}"
+            if change.operation == "delete":
+                entries.append(BundleEntry(request=BundleEntryRequest(method="DELETE", url=url)))
+                continue
+            resource = current[change.resource_type].get(change.resource_id)
+            if resource is None:
+                # Deleted since; its delete entry follows later in the feed
+                continue
+            entries.append(BundleEntry(
+                fullUrl=url,
+                resource=resource.model_dump(by_alias=True, exclude_none=True, mode="json"),
+                request=BundleEntryRequest(method="POST" if change.operation == "create" else "PUT", url=url),
+            ))
+
+        next_cursor = changes[-1].cursor if changes else request.cursor or "0.0"
+        params = {"cursor": next_cursor, "_count": request.count}
+        if request.types:
+            params["_type"] = ",".join(request.types)
+        return ChangeBundle(
+            link=[BundleLink(relation="next", url=f"{base_url}?{urlencode(params)}")],
+            entry=entries,
+        )
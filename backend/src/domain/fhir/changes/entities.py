@@ -0,0 +1,35 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID
+
+_CURSOR = re.compile(r"^(\d+)\.(\d+)$")
+
+
+@dataclass
+class Change:
+    """One create/update/delete recorded in the change log"""
+    seq: int
+    txid: int
+    resource_type: str
+    resource_id: UUID
+    operation: str  # create, update, delete
+    changed_at: datetime
+
+    @property
+    def cursor(self) -> str:
+        return format_cursor(self.txid, self.seq)
+
+
+def format_cursor(txid: int, seq: int) -> str:
+    return f"{txid}.{seq}"
+
+def parse_cursor(cursor: Optional[str]) -> Tuple[int, int]:
+    """(txid, seq) position of a feed cursor; no cursor starts from the beginning"""
+    if not cursor:
+        return 0, 0
+    match = _CURSOR.match(cursor)
+    if match is None:
+        raise ValueError(f"Invalid change feed cursor: {cursor}")
+    return int(match.group(1)), int(match.group(2))
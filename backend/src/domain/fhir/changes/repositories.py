@@ -0,0 +1,14 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence, Tuple
+from .entities import Change
+
+class ChangeLogRepository(ABC):
+    @abstractmethod
+    def list_since(self, position: Tuple[int, int], limit: int, resource_types: Optional[Sequence[str]] = None) -> List[Change]:
+        """Changes after position (txid, seq) in feed order, from finished transactions only"""
+        pass
+
+    @abstractmethod
+    def oldest_seq(self) -> Optional[int]:
+        """seq of the oldest entry still in the log (older ones were purged); None when empty"""
+        pass
@@ -0,0 +1,28 @@
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class ChangeFeedRequest(BaseModel):
+    cursor: Optional[str] = None
+    count: int = 500
+    types: Optional[List[str]] = None
+
+class BundleLink(BaseModel):
+    relation: str
+    url: str
+
+class BundleEntryRequest(BaseModel):
+    method: str  # POST (created), PUT (updated), DELETE (tombstone)
+    url: str
+
+class BundleEntry(BaseModel):
+    fullUrl: Optional[str] = None
+    resource: Optional[Dict[str, Any]] = None
+    request: BundleEntryRequest
+
+class ChangeBundle(BaseModel):
+    resourceType: str = "Bundle"
+    type: str = "history"
+    link: List[BundleLink] = []
+    entry: List[BundleEntry] = []
@@ -0,0 +1,46 @@
+from typing import List, Optional, Sequence, Type, TypeVar
+
+from pydantic import BaseModel
+
+# _summary / _elements support shared by the resource controllers. Views
+# define SUMMARY_ELEMENTS next to their resource model.
+
+SUMMARY_MODES = ("true", "false", "count", "data")
+
+ResourceT = TypeVar("ResourceT", bound=BaseModel)
+
+
+def element_names(model: Type[BaseModel]) -> List[str]:
+    """Top-level element names of a resource view (FHIR aliases where set)"""
+    return [field.alias or name for name, field in model.model_fields.items() if name not in ("resourceType", "id")]
+
+def requested_elements(
+    model: Type[BaseModel],
+    summary: Optional[str],
+    elements: Optional[Sequence[str]],
+    summary_elements: Sequence[str],
+) -> Optional[List[str]]:
+    """Elements a search should return, or None for the full resource
+
+    _elements wins over _summary. Choice elements may be named without their
+    type suffix (value -> valueQuantity, valueString, ...); unknown names
+    are ignored.
+    """
+    if elements is not None:
+        requested = [name.strip() for name in elements if name.strip()]
+        return [
+            name for name in element_names(model)
+            if any(name == e or (name.startswith(e) and name[len(e):][:1].isupper()) for e in requested)
+        ]
+    if summary == "true":
+        return list(summary_elements)
+    # _summary=data drops only the narrative, which the views don't carry
+    return None
+
+def project(resource: ResourceT, elements: Sequence[str]) -> ResourceT:
+    """Copy of resource with only resourceType, id and the non-empty requested elements set"""
+    keep = {"resourceType", "id", *elements}
+    data = resource.model_dump(by_alias=True)
+    return type(resource).model_validate({
+        key: value for key, value in data.items() if key in keep and value is not None and value != []
+    })
@@ -1,7 +1,9 @@
+from typing import Any, Dict, Iterator, Optional, Sequence
 from uuid import UUID, uuid4
 
 from src.domain.auth.entities import User
 from src.domain.auth.policies import AuthPolicies
+from src.domain.fhir.elements import project, requested_elements
 from src.domain.fhir.encounter.entities import Encounter
 from src.domain.fhir.encounter.repositories import EncounterRepository
 from src.domain.fhir.encounter.view import (
@@ -11,7 +13,9 @@ from src.domain.fhir.encounter.view import (
     EncounterResource,
     EncounterResponse,
     EncounterSearchRequest,
+    SUMMARY_ELEMENTS,
 )
+from src.domain.fhir.errors import ResourceDeleted
 
 
 class EncounterController:
@@ -54,6 +58,8 @@ class EncounterController:
         encounter = self.encounter_repo.get_by_id(encounter_id)
         if not encounter:
             raise ValueError("Encounter not found")
+        if encounter.deleted_at is not None:
+            raise ResourceDeleted("Encounter")
 
         return self._to_encounter_response(encounter)
 
@@ -70,34 +76,58 @@ class EncounterController:
 
         return self._to_encounter_response(created_encounter)
 
-    def search_encounters(self, request: EncounterSearchRequest, user: User) -> Bundle:
-        """Search encounters"""
-        if not AuthPolicies.can_read_all_resources(user):
-            raise PermissionError("Insufficient permissions")
+    def _to_encounter_resource(self, encounter: Encounter) -> EncounterResource:
+        return EncounterResource(**self._to_encounter_response(encounter).model_dump(by_alias=True))
 
+    @staticmethod
+    def _search_filters(request: EncounterSearchRequest) -> Dict[str, Any]:
         subject_uuid = None
         if request.subject:
             try:
                 subject_uuid = UUID(request.subject.split("/")[-1])
             except (ValueError, IndexError):
                 pass
+        return {"status": request.status, "subject": subject_uuid, "date": request.date, "last_updated": request.last_updated}
 
-        encounters = self.encounter_repo.search(
-            status=request.status,
-            subject=subject_uuid,
-            date=request.date
-        )
+    def search_encounters(self, request: EncounterSearchRequest, user: User) -> Bundle:
+        """Search encounters"""
+        if not AuthPolicies.can_read_all_resources(user):
+            raise PermissionError("Insufficient permissions")
 
-        entries = []
-        for encounter in encounters:
-            er = EncounterResource(**self._to_encounter_response(encounter).model_dump())
-            entries.append(BundleEntry(resource=er))
+        encounters = self.encounter_repo.search(**self._search_filters(request))
+        entries = [BundleEntry(resource=self._to_encounter_resource(encounter)) for encounter in encounters]
 
         return Bundle(
             total=len(entries),
             entry=entries
         )
 
+    def get_encounter_resources(self, encounter_ids: Sequence[UUID], user: User) -> Dict[UUID, EncounterResource]:
+        """Current state of several encounters keyed by id; ids that no longer exist are left out"""
+        if not AuthPolicies.can_read_all_resources(user):
+            raise PermissionError("Insufficient permissions")
+        return {encounter.id: self._to_encounter_resource(encounter) for encounter in self.encounter_repo.get_by_ids(encounter_ids)}
+
+    def count_encounters(self, request: EncounterSearchRequest, user: User, mode: str = "accurate") -> Optional[int]:
+        """Bundle.total for a search: None, a planner estimate or an exact count, by _total mode"""
+        if not AuthPolicies.can_read_all_resources(user):
+            raise PermissionError("Insufficient permissions")
+        if mode == "none":
+            return None
+        if mode == "estimate":
+            return self.encounter_repo.estimate_count(**self._search_filters(request))
+        return self.encounter_repo.count(**self._search_filters(request))
+
+    def stream_encounters(self, request: EncounterSearchRequest, user: User) -> Iterator[EncounterResource]:
+        """Search encounters, yielding each resource as its row arrives"""
+        if not AuthPolicies.can_read_all_resources(user):
+            raise PermissionError("Insufficient permissions")
+        elements = requested_elements(EncounterResource, request.summary, request.elements, SUMMARY_ELEMENTS)
+        encounters = self.encounter_repo.iter_search(**self._search_filters(request), sort=request.sort, limit=request.count, elements=elements)
+        if elements is None:
+            return (self._to_encounter_resource(encounter) for encounter in encounters)
+        return (project(self._to_encounter_resource(encounter), elements) for encounter in encounters)
+
     def update_encounter(self, encounter_id: UUID, request: EncounterCreateRequest, user: User) -> EncounterResponse:
         """Update an existing encounter"""
         if not AuthPolicies.can_modify_encounter(user):
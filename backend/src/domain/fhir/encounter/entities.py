@@ -49,6 +49,7 @@ class Encounter:
     resource: Dict[str, Any]
     created_at: datetime
     updated_at: datetime
+    deleted_at: Optional[datetime] = None  # set on tombstones until the purger removes the row
 
     def to_fhir_resource(self) -> Dict[str, Any]:
         """Convert domain entity to FHIR resource"""
@@ -76,8 +77,13 @@ class Encounter:
                 status = EncounterStatus.UNKNOWN
 
         class_code = None
-        if resource.get("class") and resource["class"].get("code"):
-            class_code = resource["class"]["code"]
+        encounter_class = resource.get("class")
+        if isinstance(encounter_class, list) and encounter_class:
+            # R5 shape: list of CodeableConcept
+            codings = encounter_class[0].get("coding") or [{}]
+            class_code = codings[0].get("code")
+        elif isinstance(encounter_class, dict) and encounter_class.get("code"):
+            class_code = encounter_class["code"]
 
         subject_patient_id = None
         if resource.get("subject") and resource["subject"].get("reference"):
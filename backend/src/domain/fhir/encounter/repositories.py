@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Iterator, List, Optional, Sequence
 from uuid import UUID
 from .entities import Encounter
 
@@ -18,9 +18,31 @@ class EncounterRepository(ABC):
 
     @abstractmethod
     async def delete(self, encounter_id: UUID) -> bool:
+        """Tombstone the encounter; True if it exists, even when it was already deleted"""
         pass
 
     @abstractmethod
-    async def search(self, status: Optional[str] = None, subject: Optional[UUID] = None, date: Optional[str] = None) -> List[Encounter]:
+    async def search(self, status: Optional[str] = None, subject: Optional[UUID] = None, date: Optional[str] = None, last_updated: Optional[Sequence[str]] = None) -> List[Encounter]:
         pass
 
+    @abstractmethod
+    def get_by_ids(self, encounter_ids: Sequence[UUID]) -> List[Encounter]:
+        """Existing encounters among the ids, in no particular order"""
+        pass
+
+    @abstractmethod
+    def count(self, status: Optional[str] = None, subject: Optional[UUID] = None, date: Optional[str] = None, last_updated: Optional[Sequence[str]] = None) -> int:
+        pass
+
+    @abstractmethod
+    def estimate_count(self, status: Optional[str] = None, subject: Optional[UUID] = None, date: Optional[str] = None, last_updated: Optional[Sequence[str]] = None) -> int:
+        """Approximate match count from planner statistics"""
+        pass
+
+    @abstractmethod
+    def iter_search(self, status: Optional[str] = None, subject: Optional[UUID] = None, date: Optional[str] = None, last_updated: Optional[Sequence[str]] = None, sort: Optional[Sequence[str]] = None, limit: Optional[int] = None, elements: Optional[Sequence[str]] = None, batch_size: int = 500) -> Iterator[Encounter]:
+        """Yield matches one at a time without loading the whole result
+
+        sort holds _sort tokens ("-date"), limit is _count and elements limits the fields loaded.
+        """
+        pass
@@ -75,6 +75,13 @@ class EncounterResource(BaseModel):
         period: Optional[Period] = None
     location: Optional[List[Location]] = None
 
+# Elements marked isSummary in the FHIR spec, returned for _summary=true
+SUMMARY_ELEMENTS = [
+    "identifier", "status", "class", "priority", "type", "serviceType", "subject", "episodeOfCare",
+    "basedOn", "partOf", "serviceProvider", "participant", "appointment", "actualPeriod",
+    "plannedStartDate", "plannedEndDate", "length", "reason", "diagnosis", "account",
+]
+
 class EncounterCreateRequest(BaseModel):
     resourceType: str = "Encounter"
     identifier: Optional[List[Dict[str, Any]]] = None
@@ -142,6 +149,13 @@ class EncounterSearchRequest(BaseModel):
     status: Optional[str] = None
     subject: Optional[str] = None
     date: Optional[str] = None
+    last_updated: Optional[List[str]] = None  # _lastUpdated, repeatable (ge2024-01-01)
+    # _summary (true|false|count|data) and _elements
+    summary: Optional[str] = None
+    elements: Optional[List[str]] = None
+    # _sort tokens ("-date") and _count page size
+    sort: Optional[List[str]] = None
+    count: Optional[int] = None
 
 class BundleEntry(BaseModel):
     resource: Optional[EncounterResource] = None
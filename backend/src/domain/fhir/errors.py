@@ -0,0 +1,13 @@
+class ResourceDeleted(RuntimeError):
+    """The resource was deleted; its tombstone is kept until the purger removes it (HTTP 410)"""
+
+    def __init__(self, resource_type: str):
+        super().__init__(f"{resource_type} has been deleted")
+        self.resource_type = resource_type
+
+class CursorExpired(RuntimeError):
+    """Change-log entries after a feed cursor were purged; the client must resync (HTTP 410)"""
+
+    def __init__(self, cursor: str):
+        super().__init__(f"Change feed cursor {cursor} is older than the change log retention; resync and start over")
+        self.cursor = cursor
@@ -1,7 +1,10 @@
+from typing import Any, Dict, Iterator, Optional, Sequence
 from uuid import UUID, uuid4
 
 from src.domain.auth.entities import User
 from src.domain.auth.policies import AuthPolicies
+from src.domain.fhir.elements import project, requested_elements
+from src.domain.fhir.errors import ResourceDeleted
 from src.domain.fhir.observation.entities import Observation
 from src.domain.fhir.observation.repositories import ObservationRepository
 from src.domain.fhir.observation.view import (
@@ -11,6 +14,7 @@ from src.domain.fhir.observation.view import (
     ObservationResource,
     ObservationResponse,
     ObservationSearchRequest,
+    SUMMARY_ELEMENTS,
 )
 
 
@@ -26,6 +30,8 @@ class ObservationController:
         observation = self.observation_repo.get_by_id(observation_id)
         if not observation:
             raise ValueError("Observation not found")
+        if observation.deleted_at is not None:
+            raise ResourceDeleted("Observation")
 
         return ObservationResponse(
             resourceType="Observation",
@@ -68,48 +74,72 @@ class ObservationController:
             valueString=created_observation.value_string
         )
 
-    def search_observations(self, request: ObservationSearchRequest, user: User) -> Bundle:
-        """Search observations"""
-        if not AuthPolicies.can_read_all_resources(user):
-            raise PermissionError("Insufficient permissions")
+    @staticmethod
+    def _to_observation_resource(observation: Observation) -> ObservationResource:
+        return ObservationResource(
+            resourceType="Observation",
+            id=str(observation.id),
+            status=observation.status.value if observation.status else None,
+            code={"coding": [{"code": observation.code_code}]} if observation.code_code else None,
+            subject={"reference": f"Patient/{observation.subject_patient_id}"} if observation.subject_patient_id else None,
+            encounter={"reference": f"Encounter/{observation.encounter_id}"} if observation.encounter_id else None,
+            effectiveDateTime=observation.effective_datetime,
+            valueQuantity={
+                "value": observation.value_quantity_value,
+                "unit": observation.value_quantity_unit
+            } if observation.value_quantity_value is not None else None,
+            valueString=observation.value_string
+        )
 
+    @staticmethod
+    def _search_filters(request: ObservationSearchRequest) -> Dict[str, Any]:
         subject_uuid = None
         if request.subject:
             try:
                 subject_uuid = UUID(request.subject.split("/")[-1])
             except (ValueError, IndexError):
                 pass
+        return {"code": request.code, "date": request.date, "subject": subject_uuid, "last_updated": request.last_updated}
 
-        observations = self.observation_repo.search(
-            code=request.code,
-            date=request.date,
-            subject=subject_uuid
-        )
+    def search_observations(self, request: ObservationSearchRequest, user: User) -> Bundle:
+        """Search observations"""
+        if not AuthPolicies.can_read_all_resources(user):
+            raise PermissionError("Insufficient permissions")
 
-        entries = []
-        for observation in observations:
-            entries.append(BundleEntry(
-                resource=ObservationResource(
-                    resourceType="Observation",
-                    id=str(observation.id),
-                    status=observation.status.value if observation.status else None,
-                    code={"coding": [{"code": observation.code_code}]} if observation.code_code else None,
-                    subject={"reference": f"Patient/{observation.subject_patient_id}"} if observation.subject_patient_id else None,
-                    encounter={"reference": f"Encounter/{observation.encounter_id}"} if observation.encounter_id else None,
-                    effectiveDateTime=observation.effective_datetime,
-                    valueQuantity={
-                        "value": observation.value_quantity_value,
-                        "unit": observation.value_quantity_unit
-                    } if observation.value_quantity_value is not None else None,
-                    valueString=observation.value_string
-                )
-            ))
+        observations = self.observation_repo.search(**self._search_filters(request))
+        entries = [BundleEntry(resource=self._to_observation_resource(o)) for o in observations]
 
         return Bundle(
             total=len(entries),
             entry=entries
         )
 
+    def get_observation_resources(self, observation_ids: Sequence[UUID], user: User) -> Dict[UUID, ObservationResource]:
+        """Current state of several observations keyed by id; ids that no longer exist are left out"""
+        if not AuthPolicies.can_read_all_resources(user):
+            raise PermissionError("Insufficient permissions")
+        return {o.id: self._to_observation_resource(o) for o in self.observation_repo.get_by_ids(observation_ids)}
+
+    def count_observations(self, request: ObservationSearchRequest, user: User, mode: str = "accurate") -> Optional[int]:
+        """Bundle.total for a search: None, a planner estimate or an exact count, by _total mode"""
+        if not AuthPolicies.can_read_all_resources(user):
+            raise PermissionError("Insufficient permissions")
+        if mode == "none":
+            return None
+        if mode == "estimate":
+            return self.observation_repo.estimate_count(**self._search_filters(request))
+        return self.observation_repo.count(**self._search_filters(request))
+
+    def stream_observations(self, request: ObservationSearchRequest, user: User) -> Iterator[ObservationResource]:
+        """Search observations, yielding each resource as its row arrives"""
+        if not AuthPolicies.can_read_all_resources(user):
+            raise PermissionError("Insufficient permissions")
+        elements = requested_elements(ObservationResource, request.summary, request.elements, SUMMARY_ELEMENTS)
+        observations = self.observation_repo.iter_search(**self._search_filters(request), sort=request.sort, limit=request.count, elements=elements)
+        if elements is None:
+            return (self._to_observation_resource(o) for o in observations)
+        return (project(self._to_observation_resource(o), elements) for o in observations)
+
     def update_observation(self, observation_id: UUID, request: ObservationCreateRequest, user: User) -> ObservationResponse:
         """Update an existing observation"""
         if not AuthPolicies.can_modify_observation(user):
@@ -52,6 +52,7 @@ class Observation:
     resource: Dict[str, Any]
     created_at: datetime
     updated_at: datetime
+    deleted_at: Optional[datetime] = None  # set on tombstones until the purger removes the row
 
     def to_fhir_resource(self) -> Dict[str, Any]:
         """Convert domain entity to FHIR resource"""
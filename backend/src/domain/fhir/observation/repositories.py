@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Iterator, List, Optional, Sequence
 from uuid import UUID
 from .entities import Observation
 
@@ -18,9 +18,31 @@ class ObservationRepository(ABC):
 
     @abstractmethod
     async def delete(self, observation_id: UUID) -> bool:
+        """Tombstone the observation; True if it exists, even when it was already deleted"""
         pass
 
     @abstractmethod
-    async def search(self, code: Optional[str] = None, date: Optional[str] = None, subject: Optional[UUID] = None) -> List[Observation]:
+    async def search(self, code: Optional[str] = None, date: Optional[str] = None, subject: Optional[UUID] = None, last_updated: Optional[Sequence[str]] = None) -> List[Observation]:
         pass
 
+    @abstractmethod
+    def get_by_ids(self, observation_ids: Sequence[UUID]) -> List[Observation]:
+        """Existing observations among the ids, in no particular order"""
+        pass
+
+    @abstractmethod
+    def count(self, code: Optional[str] = None, date: Optional[str] = None, subject: Optional[UUID] = None, last_updated: Optional[Sequence[str]] = None) -> int:
+        pass
+
+    @abstractmethod
+    def estimate_count(self, code: Optional[str] = None, date: Optional[str] = None, subject: Optional[UUID] = None, last_updated: Optional[Sequence[str]] = None) -> int:
+        """Approximate match count from planner statistics"""
+        pass
+
+    @abstractmethod
+    def iter_search(self, code: Optional[str] = None, date: Optional[str] = None, subject: Optional[UUID] = None, last_updated: Optional[Sequence[str]] = None, sort: Optional[Sequence[str]] = None, limit: Optional[int] = None, elements: Optional[Sequence[str]] = None, batch_size: int = 500) -> Iterator[Observation]:
+        """Yield matches one at a time without loading the whole result
+
+        sort holds _sort tokens ("-date"), limit is _count and elements limits the fields loaded.
+        """
+        pass
@@ -2,6 +2,17 @@ from typing import List, Optional
 from uuid import UUID
 from .entities import Observation
 
+# Common LOINC codes for observations (vital signs)
+COMMON_LOINC_CODES = {
+    "8310-5": "Body temperature",
+    "29463-7": "Body weight",
+    "8302-2": "Body height",
+    "8867-4": "Heart rate",
+    "9279-1": "Respiratory rate",
+    "8480-6": "Systolic blood pressure",
+    "8462-4": "Diastolic blood pressure",
+}
+
 class ObservationSpecs:
     """Business rules and specifications for Observation domain"""
 
@@ -17,17 +28,7 @@ class ObservationSpecs:
     @staticmethod
     def is_valid_code(code: str) -> bool:
         """Validate observation code"""
-        # Common LOINC codes for observations
-        common_codes = [
-            "8310-5",  # Body temperature
-            "29463-7", # Body weight
-            "8302-2",  # Body height
-            "8867-4",  # Heart rate
-            "9279-1",  # Respiratory rate
-            "8480-6",  # Systolic blood pressure
-            "8462-4"   # Diastolic blood pressure
-        ]
-        return code in common_codes
+        return code in COMMON_LOINC_CODES
 
     @staticmethod
     def is_valid_value(value: float, unit: str) -> bool:
@@ -72,6 +72,16 @@ class ObservationResource(BaseModel):
     derivedFrom: Optional[List[Reference]] = None
     component: Optional[List[Dict[str, Any]]] = None
 
+# Elements marked isSummary in the FHIR spec, returned for _summary=true
+SUMMARY_ELEMENTS = [
+    "identifier", "basedOn", "partOf", "status", "category", "code", "subject", "focus",
+    "encounter", "effectiveDateTime", "effectivePeriod", "effectiveTiming", "effectiveInstant",
+    "issued", "performer", "valueQuantity", "valueCodeableConcept", "valueString", "valueBoolean",
+    "valueInteger", "valueRange", "valueRatio", "valueSampledData", "valueTime", "valueDateTime",
+    "valuePeriod", "valueAttachment", "valueReference", "dataAbsentReason", "hasMember",
+    "derivedFrom", "component",
+]
+
 class ObservationCreateRequest(BaseModel):
     resourceType: str = "Observation"
     identifier: Optional[List[Dict[str, Any]]] = None
@@ -169,6 +179,13 @@ class ObservationSearchRequest(BaseModel):
     code: Optional[str] = None
     date: Optional[str] = None
     subject: Optional[str] = None
+    last_updated: Optional[List[str]] = None  # _lastUpdated, repeatable (ge2024-01-01)
+    # _summary (true|false|count|data) and _elements
+    summary: Optional[str] = None
+    elements: Optional[List[str]] = None
+    # _sort tokens ("-date") and _count page size
+    sort: Optional[List[str]] = None
+    count: Optional[int] = None
 
 class BundleEntry(BaseModel):
     resource: Optional[ObservationResource] = None
@@ -1,7 +1,10 @@
+from typing import Dict, Iterator, Optional, Sequence
 from uuid import UUID, uuid4
 
 from src.domain.auth.entities import User
 from src.domain.auth.policies import AuthPolicies
+from src.domain.fhir.elements import project, requested_elements
+from src.domain.fhir.errors import ResourceDeleted
 from src.domain.fhir.patient.entities import Patient
 from src.domain.fhir.patient.repositories import PatientRepository
 from src.domain.fhir.patient.view import (
@@ -11,6 +14,7 @@ from src.domain.fhir.patient.view import (
     PatientResource,
     PatientResponse,
     PatientSearchRequest,
+    SUMMARY_ELEMENTS,
 )
 
 
@@ -44,6 +48,8 @@ class PatientController:
         patient = self.patient_repo.get_by_id(patient_id)
         if not patient:
             raise ValueError("Patient not found")
+        if patient.deleted_at is not None:
+            raise ResourceDeleted("Patient")
 
         return self._to_patient_response(patient)
 
@@ -72,6 +78,10 @@ class PatientController:
 
         return self._to_patient_response(created_patient)
 
+    def _to_patient_resource(self, patient: Patient) -> PatientResource:
+        # Build resource view from stored resource
+        return PatientResource(**self._to_patient_response(patient).model_dump())
+
     def search_patients(self, request: PatientSearchRequest, user: User) -> Bundle:
         """Search patients"""
         if not AuthPolicies.can_read_all_resources(user):
@@ -81,18 +91,39 @@ class PatientController:
             name=request.name,
             identifier=request.identifier
         )
-
-        entries = []
-        for patient in patients:
-            # Build resource view from stored resource
-            pr = PatientResource(**self._to_patient_response(patient).model_dump())
-            entries.append(BundleEntry(resource=pr))
+        entries = [BundleEntry(resource=self._to_patient_resource(patient)) for patient in patients]
 
         return Bundle(
             total=len(entries),
             entry=entries
         )
 
+    def get_patient_resources(self, patient_ids: Sequence[UUID], user: User) -> Dict[UUID, PatientResource]:
+        """Current state of several patients keyed by id; ids that no longer exist are left out"""
+        if not AuthPolicies.can_read_all_resources(user):
+            raise PermissionError("Insufficient permissions")
+        return {patient.id: self._to_patient_resource(patient) for patient in self.patient_repo.get_by_ids(patient_ids)}
+
+    def count_patients(self, request: PatientSearchRequest, user: User, mode: str = "accurate") -> Optional[int]:
+        """Bundle.total for a search: None, a planner estimate or an exact count, by _total mode"""
+        if not AuthPolicies.can_read_all_resources(user):
+            raise PermissionError("Insufficient permissions")
+        if mode == "none":
+            return None
+        if mode == "estimate":
+            return self.patient_repo.estimate_count(name=request.name, identifier=request.identifier, last_updated=request.last_updated)
+        return self.patient_repo.count(name=request.name, identifier=request.identifier, last_updated=request.last_updated)
+
+    def stream_patients(self, request: PatientSearchRequest, user: User) -> Iterator[PatientResource]:
+        """Search patients, yielding each resource as its row arrives"""
+        if not AuthPolicies.can_read_all_resources(user):
+            raise PermissionError("Insufficient permissions")
+        elements = requested_elements(PatientResource, request.summary, request.elements, SUMMARY_ELEMENTS)
+        patients = self.patient_repo.iter_search(name=request.name, identifier=request.identifier, last_updated=request.last_updated, sort=request.sort, limit=request.count, elements=elements)
+        if elements is None:
+            return (self._to_patient_resource(patient) for patient in patients)
+        return (project(self._to_patient_resource(patient), elements) for patient in patients)
+
     def update_patient(self, patient_id: UUID, request: PatientCreateRequest, user: User) -> PatientResponse:
         """Update an existing patient"""
         if not AuthPolicies.can_modify_resources(user):
@@ -34,6 +34,7 @@ class Patient:
     resource: Dict[str, Any]
     created_at: datetime
     updated_at: datetime
+    deleted_at: Optional[datetime] = None  # set on tombstones until the purger removes the row
 
     def to_fhir_resource(self) -> Dict[str, Any]:
         """Convert domain entity to FHIR resource"""
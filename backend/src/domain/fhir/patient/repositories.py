@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Iterator, List, Optional, Sequence
 from uuid import UUID
 from .entities import Patient
 
@@ -18,8 +18,31 @@ class PatientRepository(ABC):
 
     @abstractmethod
     def delete(self, patient_id: UUID) -> bool:
+        """Tombstone the patient; True if it exists, even when it was already deleted"""
         pass
 
     @abstractmethod
-    def search(self, name: Optional[str] = None, identifier: Optional[str] = None) -> List[Patient]:
+    def search(self, name: Optional[str] = None, identifier: Optional[str] = None, last_updated: Optional[Sequence[str]] = None) -> List[Patient]:
+        pass
+
+    @abstractmethod
+    def get_by_ids(self, patient_ids: Sequence[UUID]) -> List[Patient]:
+        """Existing patients among the ids, in no particular order"""
+        pass
+
+    @abstractmethod
+    def count(self, name: Optional[str] = None, identifier: Optional[str] = None, last_updated: Optional[Sequence[str]] = None) -> int:
+        pass
+
+    @abstractmethod
+    def estimate_count(self, name: Optional[str] = None, identifier: Optional[str] = None, last_updated: Optional[Sequence[str]] = None) -> int:
+        """Approximate match count from planner statistics"""
+        pass
+
+    @abstractmethod
+    def iter_search(self, name: Optional[str] = None, identifier: Optional[str] = None, last_updated: Optional[Sequence[str]] = None, sort: Optional[Sequence[str]] = None, limit: Optional[int] = None, elements: Optional[Sequence[str]] = None, batch_size: int = 500) -> Iterator[Patient]:
+        """Yield matches one at a time without loading the whole result
+
+        sort holds _sort tokens ("-date"), limit is _count and elements limits the fields loaded.
+        """
         pass
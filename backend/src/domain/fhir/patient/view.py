@@ -52,6 +52,12 @@ class Reference(BaseModel):
     reference: Optional[str] = None
     display: Optional[str] = None
 
+# Elements marked isSummary in the FHIR spec, returned for _summary=true
+SUMMARY_ELEMENTS = [
+    "identifier", "active", "name", "telecom", "gender", "birthDate", "deceasedBoolean",
+    "deceasedDateTime", "address", "managingOrganization", "link",
+]
+
 class PatientResource(BaseModel):
     resourceType: str = "Patient"
     id: Optional[str] = None
@@ -137,6 +143,13 @@ class PatientResponse(BaseModel):
 class PatientSearchRequest(BaseModel):
     name: Optional[str] = None
     identifier: Optional[str] = None
+    last_updated: Optional[List[str]] = None  # _lastUpdated, repeatable (ge2024-01-01)
+    # _summary (true|false|count|data) and _elements
+    summary: Optional[str] = None
+    elements: Optional[List[str]] = None
+    # _sort tokens ("-date") and _count page size
+    sort: Optional[List[str]] = None
+    count: Optional[int] = None
 
 class BundleEntry(BaseModel):
     resource: Optional[PatientResource] = None
@@ -0,0 +1,78 @@
+from datetime import datetime
+from uuid import UUID
+
+from src.domain.auth.entities import User
+from src.domain.auth.policies import AuthPolicies
+from src.domain.jobs.entities import Job, JobStatus
+from src.domain.jobs.repositories import JobRepository
+from src.domain.jobs.view import ExportManifest, ExportOutput, ExportRequest
+
+EXPORT_JOB = "export"
+PURGE_JOB = "purge"
+PARTITION_JOB = "partitions"  # scheduled by the runners (PARTITION_MAINTENANCE_SECONDS), never requested
+EXPORT_TYPES = ("Patient", "Encounter", "Observation")
+
+
+class JobController:
+    def __init__(self, job_repo: JobRepository):
+        self.job_repo = job_repo
+
+    def start_export(self, request: ExportRequest, user: User) -> Job:
+        """Queue a bulk export of the requested resource types as NDJSON files"""
+        if not AuthPolicies.can_read_all_resources(user):
+            raise PermissionError("Insufficient permissions")
+        types = request.types or list(EXPORT_TYPES)
+        unknown = sorted(set(types) - set(EXPORT_TYPES))
+        if unknown:
+            raise ValueError(f"Unsupported _type: {', '.join(unknown)}")
+        if request.since:
+            try:
+                datetime.fromisoformat(request.since.replace("Z", "+00:00"))
+            except ValueError:
+                raise ValueError(f"Invalid _since value: {request.since}")
+
+        params = {"types": types, "since": request.since, "request": request.request_url}
+        return self.job_repo.enqueue(EXPORT_JOB, params, user.id)
+
+    def start_purge(self, user: User) -> Job:
+        """Queue a purge of every tombstone past its retention"""
+        if not AuthPolicies.can_delete_resources(user):
+            raise PermissionError("Insufficient permissions")
+        return self.job_repo.enqueue(PURGE_JOB, {}, user.id)
+
+    def get_job(self, job_id: UUID, user: User) -> Job:
+        """A job visible to user: their own, or any job for admins; cancelled jobs are gone"""
+        job = self.job_repo.get_by_id(job_id)
+        if not job or job.status == JobStatus.CANCELLED:
+            raise ValueError("Job not found")
+        if job.owner_id != user.id and not AuthPolicies.can_delete_resources(user):
+            raise PermissionError("Insufficient permissions")
+        return job
+
+    def cancel_job(self, job_id: UUID, user: User) -> Job:
+        self.get_job(job_id, user)
+        job = self.job_repo.request_cancel(job_id)
+        if not job:
+            raise ValueError("Job not found")
+        return job
+
+    def export_file(self, job_id: UUID, file_name: str, user: User) -> Job:
+        """The completed export job that produced file_name"""
+        job = self.get_job(job_id, user)
+        files = [output["file"] for output in (job.result or {}).get("output", [])]
+        if job.kind != EXPORT_JOB or job.status != JobStatus.COMPLETED or file_name not in files:
+            raise ValueError("Export file not found")
+        return job
+
+    @staticmethod
+    def export_manifest(job: Job, status_url: str) -> ExportManifest:
+        """Completion manifest of an export job; file URLs live under its status URL"""
+        result = job.result or {}
+        return ExportManifest(
+            transactionTime=result.get("transactionTime", ""),
+            request=job.params.get("request", ""),
+            output=[
+                ExportOutput(type=output["type"], url=f"{status_url}/{output['file']}", count=output.get("count"))
+                for output in result.get("output", [])
+            ],
+        )
@@ -0,0 +1,32 @@
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+@dataclass
+class Job:
+    """A long-running operation executed by the job runner, outside the request"""
+    id: UUID
+    kind: str  # export, purge
+    params: Dict[str, Any]
+    status: JobStatus
+    owner_id: Optional[UUID]
+    attempts: int
+    max_attempts: int
+    progress: float  # 0..1
+    progress_message: Optional[str]
+    result: Optional[Dict[str, Any]]
+    error: Optional[str]
+    cancel_requested: bool
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
@@ -0,0 +1,18 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional
+from uuid import UUID
+from .entities import Job
+
+class JobRepository(ABC):
+    @abstractmethod
+    def enqueue(self, kind: str, params: Dict[str, Any], owner_id: Optional[UUID]) -> Job:
+        pass
+
+    @abstractmethod
+    def get_by_id(self, job_id: UUID) -> Optional[Job]:
+        pass
+
+    @abstractmethod
+    def request_cancel(self, job_id: UUID) -> Optional[Job]:
+        """Cancel a queued job at once; a running job stops at its next progress report"""
+        pass
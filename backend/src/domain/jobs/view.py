@@ -0,0 +1,22 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ExportRequest(BaseModel):
+    types: Optional[List[str]] = None  # _type
+    since: Optional[str] = None  # _since, an instant
+    request_url: str  # kick-off URL, echoed in the manifest
+
+class ExportOutput(BaseModel):
+    type: str
+    url: str
+    count: Optional[int] = None
+
+class ExportManifest(BaseModel):
+    """Bulk Data completion manifest"""
+    transactionTime: str
+    request: str
+    requiresAccessToken: bool = True
+    output: List[ExportOutput] = []
+    error: List[ExportOutput] = []
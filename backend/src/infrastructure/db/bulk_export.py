@@ -0,0 +1,81 @@
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from src.config.settings import settings
+from src.domain.auth.entities import User
+from src.domain.fhir.encounter.controller import EncounterController
+from src.domain.fhir.encounter.view import EncounterSearchRequest
+from src.domain.fhir.observation.controller import ObservationController
+from src.domain.fhir.observation.view import ObservationSearchRequest
+from src.domain.fhir.patient.controller import PatientController
+from src.domain.fhir.patient.view import PatientSearchRequest
+from src.domain.jobs.controller import EXPORT_TYPES
+from src.infrastructure.db.job_queue import JobContext
+from src.infrastructure.db.repositories.auth_repo_sqlalchemy import SQLAlchemyUserRepository
+from src.infrastructure.db.repositories.fhir.encounter_repo_sqlalchemy import SQLAlchemyEncounterRepository
+from src.infrastructure.db.repositories.fhir.observation_repo_sqlalchemy import SQLAlchemyObservationRepository
+from src.infrastructure.db.repositories.fhir.patient_repo_sqlalchemy import SQLAlchemyPatientRepository
+from src.infrastructure.db.session import read_session
+
+# Bulk Data $export: each requested type is streamed through the same search
+# path as GET /fhir/<type> (server-side cursor) into <EXPORT_DIR>/<job id>/<type>.ndjson.
+
+# Resources written between progress reports
+REPORT_EVERY = 1000
+
+
+def export_path(job_id: UUID, file_name: str) -> Path:
+    return Path(settings.EXPORT_DIR) / str(job_id) / file_name
+
+def _streams(db: Session, last_updated: Optional[List[str]], owner: User) -> Dict[str, Callable[[], Iterator[BaseModel]]]:
+    return {
+        "Patient": lambda: PatientController(SQLAlchemyPatientRepository(db)).stream_patients(
+            PatientSearchRequest(last_updated=last_updated), owner
+        ),
+        "Encounter": lambda: EncounterController(SQLAlchemyEncounterRepository(db)).stream_encounters(
+            EncounterSearchRequest(last_updated=last_updated), owner
+        ),
+        "Observation": lambda: ObservationController(SQLAlchemyObservationRepository(db)).stream_observations(
+            ObservationSearchRequest(last_updated=last_updated), owner
+        ),
+    }
+
+def export_resources(context: JobContext) -> Dict[str, Any]:
+    """Job handler: write every requested type as NDJSON and list the files
+
+    Runs with the permissions of the user who started the export, checked
+    again here in case they were deactivated while the job was queued.
+    """
+    types = context.params.get("types") or list(EXPORT_TYPES)
+    since = context.params.get("since")
+    # _since: resources changed after the instant
+    last_updated = [f"gt{since}"] if since else None
+
+    directory = export_path(context.job_id, "")
+    directory.mkdir(parents=True, exist_ok=True)
+    output = []
+    # A replica when one is healthy: an export is a long read
+    with read_session() as db:
+        owner = SQLAlchemyUserRepository(db).get_by_id(context.job.owner_id) if context.job.owner_id else None
+        if owner is None or not owner.is_active:
+            raise PermissionError("The user who started this export is no longer active")
+
+        streams = _streams(db, last_updated, owner)
+        for index, resource_type in enumerate(types):
+            file_name = f"{resource_type}.ndjson"
+            count = 0
+            with open(directory / file_name, "w", encoding="utf-8") as f:
+                for resource in streams[resource_type]():
+                    f.write(resource.model_dump_json(by_alias=True, exclude_none=True))
+                    f.write("\n")
+                    count += 1
+                    if count % REPORT_EVERY == 0:
+                        context.report(index / len(types), f"{resource_type}: {count} resources")
+            output.append({"type": resource_type, "file": file_name, "count": count})
+            context.report((index + 1) / len(types), f"{resource_type}: {count} resources", force=True)
+
+    return {"transactionTime": context.job.started_at.isoformat(), "output": output}
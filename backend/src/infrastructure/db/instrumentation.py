@@ -0,0 +1,124 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.infrastructure.observability.metrics import COUNT_BUCKETS, LabelValues, registry
+from src.infrastructure.observability.tracing import SPAN_KIND_CLIENT, tracer
+
+# Distinct statement shapes tracked before new ones are reported as "other"
+MAX_STATEMENT_LABELS = 500
+MAX_STATEMENT_LENGTH = 300
+# Raw statements remembered with their label; IN lists of every length are
+# distinct statements with one label, so this only bounds memory
+MAX_CACHED_STATEMENTS = 5000
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|(?<!:):\w+\b|%s")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+
+_statement_labels: "OrderedDict[str, str]" = OrderedDict()
+_labels: Set[str] = set()
+_statement_labels_lock = threading.Lock()
+_instrumented: List[Tuple[str, Engine]] = []
+
+
+def normalize_statement(statement: str) -> str:
+    """Collapse parameters, literals and IN lists so one query shape maps to one label"""
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("?", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()[:MAX_STATEMENT_LENGTH]
+
+def _statement_label(statement: str) -> str:
+    # Statements come from SQLAlchemy's compiled cache, so the raw text repeats
+    label = _statement_labels.get(statement)
+    if label is not None:
+        return label
+    label = normalize_statement(statement)
+    with _statement_labels_lock:
+        if label not in _labels:
+            if len(_labels) >= MAX_STATEMENT_LABELS:
+                label = "other"
+            else:
+                _labels.add(label)
+        _statement_labels[statement] = label
+        while len(_statement_labels) > MAX_CACHED_STATEMENTS:
+            _statement_labels.popitem(last=False)
+    return label
+
+def _pool_connections() -> Dict[LabelValues, float]:
+    values = {}
+    for name, engine in _instrumented:
+        pool = engine.pool
+        for state in ("size", "checkedin", "checkedout", "overflow"):
+            # QueuePool exposes these as methods; other pool classes may not
+            reader = getattr(pool, state, None)
+            if callable(reader):
+                values[(name, state)] = reader()
+    return values
+
+
+STATEMENT_DURATION = registry.histogram(
+    "db_statement_duration_seconds", "SQL statement execution time by normalized statement", ("statement",)
+)
+POOL_CONNECTIONS = registry.gauge(
+    "db_pool_connections", "Connection pool state", ("pool", "state"), callback=_pool_connections
+)
+SEARCH_RESULTS = registry.histogram(
+    "fhir_search_results", "Rows returned per repository search", ("resource_type",), COUNT_BUCKETS
+)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None:
+        context._metrics_started_at = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started_at = getattr(context, "_metrics_started_at", None)
+    if started_at is not None:
+        STATEMENT_DURATION.observe(time.perf_counter() - started_at, (_statement_label(statement),))
+
+def instrument_engine(engine: Engine, name: str = "primary") -> None:
+    """Time every statement run on engine and report its pool state"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    _instrumented.append((name, engine))
+
+
+def _start_statement_span(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is None:
+        return
+    span = tracer.start_span(
+        "db.query",
+        {"db.system": conn.dialect.name, "db.statement": _statement_label(statement)},
+        kind=SPAN_KIND_CLIENT,
+    )
+    if span.recording:
+        context._trace_span = span
+
+def _end_statement_span(conn, cursor, statement, parameters, context, executemany) -> None:
+    span = getattr(context, "_trace_span", None)
+    if span is not None:
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.set_attribute("db.rows", cursor.rowcount)
+        span.end()
+
+def _fail_statement_span(exception_context) -> None:
+    span = getattr(exception_context.execution_context, "_trace_span", None)
+    if span is not None:
+        span.record_exception(exception_context.original_exception)
+        span.end()
+
+def trace_engine(engine: Engine) -> None:
+    """Emit a db.query span for every statement run on engine"""
+    event.listen(engine, "before_cursor_execute", _start_statement_span)
+    event.listen(engine, "after_cursor_execute", _end_statement_span)
+    event.listen(engine, "handle_error", _fail_statement_span)
@@ -0,0 +1,23 @@
+from sqlalchemy.engine import Engine
+
+from src.config.settings import settings
+from src.domain.jobs.controller import EXPORT_JOB, PARTITION_JOB, PURGE_JOB
+from src.infrastructure.db.bulk_export import export_resources
+from src.infrastructure.db.job_queue import JobRunner
+from src.infrastructure.db.partitions import partition_job
+from src.infrastructure.db.purge import purge_job
+
+
+def build_job_runner(engine: Engine, workers: int = settings.JOB_WORKERS) -> JobRunner:
+    """A runner with every job kind registered; each kind runs one at a time per runner
+
+    Partition maintenance is scheduled: queued at startup and then every
+    PARTITION_MAINTENANCE_SECONDS, so next months' partitions exist before
+    their observations arrive.
+    """
+    runner = JobRunner(engine, workers)
+    runner.register(EXPORT_JOB, export_resources, concurrency=1)
+    runner.register(PURGE_JOB, purge_job, concurrency=1)
+    runner.register(PARTITION_JOB, partition_job, concurrency=1)
+    runner.schedule(PARTITION_JOB, settings.PARTITION_MAINTENANCE_SECONDS)
+    return runner
@@ -0,0 +1,300 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Engine
+
+from src.config.settings import settings
+from src.infrastructure.db.query_budget import untracked
+from src.infrastructure.observability.metrics import registry
+
+# Postgres-backed job queue. Jobs live in the job table (migration 0006);
+# runners claim them with FOR UPDATE SKIP LOCKED, so runners in the app
+# processes and standalone ones (scripts/run_jobs.py) share the queue with no
+# broker. A runner writes to a job only while it holds it (status running and
+# worker = itself), so a job requeued by the reaper is never finished twice.
+
+logger = logging.getLogger(__name__)
+
+JOBS_FINISHED = registry.counter("jobs_finished_total", "Jobs finished by the runner", ("kind", "status"))
+
+_CLAIM = text("""
+    UPDATE job
+    SET status = 'running', attempts = attempts + 1, worker = :worker,
+        heartbeat_at = now(), started_at = coalesce(started_at, now())
+    WHERE id = (
+      SELECT id FROM job
+      WHERE status = 'queued' AND run_after <= now() AND kind IN :kinds
+      ORDER BY run_after
+      LIMIT 1
+      FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, kind, params, owner_id, attempts, max_attempts, started_at
+""").bindparams(bindparam("kinds", expanding=True))
+
+_REPORT = text("""
+    UPDATE job SET progress = :progress, progress_message = :message, heartbeat_at = now()
+    WHERE id = :id AND worker = :worker AND status = 'running'
+    RETURNING cancel_requested
+""")
+
+_FINISH = text("""
+    UPDATE job
+    SET status = :status, result = CAST(:result AS jsonb), error = :error,
+        progress = CASE WHEN :status = 'completed' THEN 1 ELSE progress END,
+        finished_at = now(), worker = NULL
+    WHERE id = :id AND worker = :worker AND status = 'running'
+""")
+
+# Back to the queue: after a failure with attempts left, or on shutdown (attempt not counted)
+_REQUEUE = text("""
+    UPDATE job
+    SET status = 'queued', error = :error, attempts = attempts - :refund,
+        run_after = now() + make_interval(secs => :delay), worker = NULL
+    WHERE id = :id AND worker = :worker AND status = 'running'
+""")
+
+# Recurring kinds: queued unless a job of the kind is pending or was created within the interval
+_SCHEDULE = text("""
+    INSERT INTO job (kind, max_attempts)
+    SELECT :kind, :max_attempts
+    WHERE NOT EXISTS (
+      SELECT 1 FROM job
+      WHERE kind = :kind
+        AND (status IN ('queued', 'running') OR created_at > now() - make_interval(secs => :every))
+    )
+""")
+# Held while scheduling, so runners in different processes never queue the same kind twice
+_SCHEDULE_LOCK = text("SELECT pg_advisory_xact_lock(hashtext('job-schedule'))")
+SCHEDULE_CHECK_SECONDS = 60.0
+
+# Runners that stopped reporting (crash, OOM kill): retry, or fail once out of attempts
+_REAP = text("""
+    UPDATE job
+    SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+        error = 'runner stopped responding', run_after = now(), worker = NULL,
+        finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE now() END
+    WHERE status = 'running' AND heartbeat_at < now() - make_interval(secs => :stale)
+""")
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job was cancelled"""
+
+class JobInterrupted(Exception):
+    """Raised inside a handler when the runner shuts down; the job is requeued"""
+
+@dataclass
+class ClaimedJob:
+    id: UUID
+    kind: str
+    params: Dict[str, Any]
+    owner_id: Optional[UUID]
+    attempts: int
+    max_attempts: int
+    started_at: Any
+
+
+class JobContext:
+    """What a handler sees of its job: params, progress reporting and cancellation"""
+
+    def __init__(self, runner: "JobRunner", job: ClaimedJob):
+        self._runner = runner
+        self.job = job
+        self._last_report = 0.0
+
+    @property
+    def job_id(self) -> UUID:
+        return self.job.id
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return self.job.params
+
+    @property
+    def engine(self) -> Engine:
+        return self._runner.engine
+
+    def report(self, progress: float, message: Optional[str] = None, force: bool = False) -> None:
+        """Record progress (0..1) and keep the job's heartbeat fresh
+
+        Writes at most once a second unless forced. Raises JobCancelled when
+        the job was cancelled and JobInterrupted when the runner is stopping;
+        handlers call this between units of work, which makes those the
+        points where a job can stop.
+        """
+        if self._runner.stopping:
+            raise JobInterrupted()
+        now = time.monotonic()
+        if not force and now - self._last_report < 1.0:
+            return
+        self._last_report = now
+        with untracked(), self._runner.engine.begin() as conn:
+            row = conn.execute(_REPORT, {
+                "id": self.job.id, "worker": self._runner.worker_id,
+                "progress": min(max(progress, 0.0), 1.0), "message": message,
+            }).first()
+        # No row: the job was reaped and may already run elsewhere
+        if row is None or row.cancel_requested:
+            raise JobCancelled()
+
+
+JobHandler = Callable[[JobContext], Optional[Dict[str, Any]]]
+
+
+class JobRunner:
+    """Runs queued jobs on worker threads
+
+    Each kind has a concurrency limit per runner; a worker only claims kinds
+    with a free slot. Scheduled kinds are queued by worker 0 of every runner. Failed jobs are retried with exponential backoff until
+    max_attempts; ValueError and PermissionError mean the request itself is
+    wrong, so those fail at once.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        workers: int = settings.JOB_WORKERS,
+        poll_seconds: float = settings.JOB_POLL_SECONDS,
+        backoff_seconds: float = settings.JOB_RETRY_BACKOFF_SECONDS,
+        stale_seconds: int = settings.JOB_STALE_SECONDS,
+    ):
+        self.engine = engine
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.backoff_seconds = backoff_seconds
+        self.stale_seconds = stale_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._handlers: Dict[str, JobHandler] = {}
+        self._limits: Dict[str, int] = {}
+        self._active: Dict[str, int] = {}
+        self._claim_lock = threading.Lock()
+        self._schedules: Dict[str, float] = {}
+        self._schedule_due_at = 0.0
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    @property
+    def stopping(self) -> bool:
+        return self._stop.is_set()
+
+    def register(self, kind: str, handler: JobHandler, concurrency: int = 1) -> None:
+        self._handlers[kind] = handler
+        self._limits[kind] = concurrency
+        self._active.setdefault(kind, 0)
+
+    def schedule(self, kind: str, every_seconds: float) -> None:
+        """Queue a registered kind every every_seconds, once across all runners; 0 disables"""
+        if every_seconds > 0:
+            self._schedules[kind] = every_seconds
+
+    def enqueue_due(self) -> List[str]:
+        """Queue the scheduled kinds without a pending or recent job; the kinds queued"""
+        queued = []
+        with untracked(), self.engine.begin() as conn:
+            conn.execute(_SCHEDULE_LOCK)
+            for kind, every_seconds in self._schedules.items():
+                # A statement of its own after the lock, so its snapshot sees jobs another runner just queued
+                params = {"kind": kind, "max_attempts": settings.JOB_MAX_ATTEMPTS, "every": every_seconds}
+                if conn.execute(_SCHEDULE, params).rowcount:
+                    queued.append(kind)
+        return queued
+
+    def _claim(self) -> Optional[ClaimedJob]:
+        # Claims are serialised per runner so a kind's slots can't be overbooked
+        with self._claim_lock:
+            kinds = [kind for kind, limit in self._limits.items() if self._active[kind] < limit]
+            if not kinds:
+                return None
+            with untracked(), self.engine.begin() as conn:
+                row = conn.execute(_CLAIM, {"worker": self.worker_id, "kinds": kinds}).first()
+            if row is None:
+                return None
+            self._active[row.kind] += 1
+            return ClaimedJob(**row._asdict())
+
+    def _update(self, statement, **params) -> None:
+        with untracked(), self.engine.begin() as conn:
+            conn.execute(statement, {"worker": self.worker_id, **params})
+
+    def run_next(self) -> bool:
+        """Claim and run one due job; False when there was nothing to run"""
+        job = self._claim()
+        if job is None:
+            return False
+        try:
+            self._run(job)
+        finally:
+            with self._claim_lock:
+                self._active[job.kind] -= 1
+        return True
+
+    def _run(self, job: ClaimedJob) -> None:
+        try:
+            result = self._handlers[job.kind](JobContext(self, job))
+        except JobCancelled:
+            self._update(_FINISH, id=job.id, status="cancelled", result=None, error=None)
+            self._finished(job, "cancelled")
+        except JobInterrupted:
+            self._update(_REQUEUE, id=job.id, error=None, refund=1, delay=0)
+            logger.info("Job %s (%s) requeued on shutdown", job.id, job.kind)
+        except Exception as e:
+            retryable = not isinstance(e, (ValueError, PermissionError))
+            if retryable and job.attempts < job.max_attempts:
+                delay = self.backoff_seconds * 2 ** (job.attempts - 1)
+                self._update(_REQUEUE, id=job.id, error=str(e), refund=0, delay=delay)
+                logger.warning("Job %s (%s) failed, retrying in %.0fs: %s", job.id, job.kind, delay, e)
+            else:
+                self._update(_FINISH, id=job.id, status="failed", result=None, error=str(e))
+                self._finished(job, "failed")
+                logger.exception("Job %s (%s) failed", job.id, job.kind)
+        else:
+            self._update(_FINISH, id=job.id, status="completed", result=json.dumps(result or {}, default=str), error=None)
+            self._finished(job, "completed")
+
+    @staticmethod
+    def _finished(job: ClaimedJob, status: str) -> None:
+        JOBS_FINISHED.inc((job.kind, status))
+
+    def reap(self) -> int:
+        """Requeue (or fail) running jobs whose runner stopped reporting"""
+        with untracked(), self.engine.begin() as conn:
+            return conn.execute(_REAP, {"stale": self.stale_seconds}).rowcount
+
+    def start(self) -> None:
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._loop, args=(index,), name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop claiming; running handlers are interrupted at their next report and requeued"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _loop(self, index: int) -> None:
+        while not self._stop.is_set():
+            try:
+                if index == 0:
+                    self.reap()
+                    # Checked right after start, then every SCHEDULE_CHECK_SECONDS
+                    if self._schedules and time.monotonic() >= self._schedule_due_at:
+                        self._schedule_due_at = time.monotonic() + SCHEDULE_CHECK_SECONDS
+                        for kind in self.enqueue_due():
+                            logger.info("Queued scheduled %s job", kind)
+                if self.run_next():
+                    continue
+            except Exception:
+                # The database may be briefly unavailable; try again after the poll interval
+                logger.exception("Job runner iteration failed")
+            self._stop.wait(self.poll_seconds)
@@ -0,0 +1,61 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from src.config.settings import settings
+from src.infrastructure.db.base import Base
+from src.infrastructure.db.models import auth, job  # noqa: F401
+from src.infrastructure.db.models.fhir import encounter, observation, patient  # noqa: F401
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Leave objects managed outside the ORM models out of autogenerate"""
+    # Monthly partitions are created by ObservationPartitionManager (manage_partitions.py)
+    if type_ == "table" and name.startswith("observation_"):
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Emit migration SQL without connecting to the database"""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        include_schemas=True,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations against settings.DATABASE_URL"""
+    connectable = create_engine(settings.DATABASE_URL, poolclass=pool.NullPool)
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_schemas=True,
+            include_object=include_object,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
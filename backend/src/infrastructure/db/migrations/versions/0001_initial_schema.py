@@ -0,0 +1,102 @@
+"""initial schema
+
+Schema previously created by init.sql, with fhir.observation partitioned.
+Databases bootstrapped from that older init.sql have the same tables but a
+plain fhir.observation: mark them with `alembic stamp 0001`, then
+`alembic upgrade head`; revision 0008 converts the table.
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-01-06 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pgcrypto")
+    op.execute("CREATE SCHEMA IF NOT EXISTS fhir")
+    op.execute("CREATE SCHEMA IF NOT EXISTS fhir_archive")
+
+    op.execute("""
+        CREATE TABLE auth_user (
+          id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+          email TEXT UNIQUE NOT NULL,
+          hashed_password TEXT NOT NULL,
+          role TEXT CHECK (role IN ('admin', 'clinician', 'read_only')),
+          is_active BOOLEAN DEFAULT TRUE,
+          created_at TIMESTAMPTZ DEFAULT NOW(),
+          updated_at TIMESTAMPTZ DEFAULT NOW()
+        )
+    """)
+    op.execute("""
+        CREATE TABLE fhir.patient (
+          id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+          identifier_value TEXT,
+          name_family TEXT,
+          name_given TEXT,
+          gender TEXT CHECK (gender IN ('male', 'female', 'other', 'unknown')),
+          birth_date DATE,
+          resource JSONB NOT NULL,
+          created_at TIMESTAMPTZ DEFAULT NOW(),
+          updated_at TIMESTAMPTZ DEFAULT NOW()
+        )
+    """)
+    op.execute("""
+        CREATE TABLE fhir.encounter (
+          id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+          status TEXT,
+          class_code TEXT,
+          subject_patient_id UUID REFERENCES fhir.patient(id),
+          period_start TIMESTAMPTZ,
+          period_end TIMESTAMPTZ,
+          reason_code TEXT,
+          resource JSONB NOT NULL,
+          created_at TIMESTAMPTZ DEFAULT NOW(),
+          updated_at TIMESTAMPTZ DEFAULT NOW()
+        )
+    """)
+    op.execute("""
+        CREATE TABLE fhir.observation (
+          id UUID NOT NULL DEFAULT gen_random_uuid(),
+          status TEXT,
+          code_code TEXT,
+          subject_patient_id UUID REFERENCES fhir.patient(id),
+          encounter_id UUID REFERENCES fhir.encounter(id),
+          effective_datetime TIMESTAMPTZ NOT NULL,
+          value_quantity_value NUMERIC,
+          value_quantity_unit TEXT,
+          value_string TEXT,
+          resource JSONB NOT NULL,
+          created_at TIMESTAMPTZ DEFAULT NOW(),
+          updated_at TIMESTAMPTZ DEFAULT NOW(),
+          PRIMARY KEY (id, effective_datetime)
+        ) PARTITION BY RANGE (effective_datetime)
+    """)
+    op.execute("CREATE TABLE fhir.observation_default PARTITION OF fhir.observation DEFAULT")
+
+    op.execute("CREATE INDEX idx_patient_identifier ON fhir.patient(identifier_value)")
+    op.execute("CREATE INDEX idx_patient_name_family ON fhir.patient(name_family)")
+    op.execute("CREATE INDEX idx_patient_name_given ON fhir.patient(name_given)")
+    op.execute("CREATE INDEX idx_encounter_status ON fhir.encounter(status)")
+    op.execute("CREATE INDEX idx_encounter_subject ON fhir.encounter(subject_patient_id)")
+    op.execute("CREATE INDEX idx_encounter_period_start ON fhir.encounter(period_start)")
+    op.execute("CREATE INDEX idx_observation_code ON fhir.observation(code_code)")
+    op.execute("CREATE INDEX idx_observation_subject ON fhir.observation(subject_patient_id)")
+    op.execute("CREATE INDEX idx_observation_effective ON fhir.observation(effective_datetime)")
+    op.execute("CREATE INDEX idx_observation_encounter ON fhir.observation(encounter_id)")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS fhir.observation CASCADE")
+    op.execute("DROP TABLE IF EXISTS fhir.encounter")
+    op.execute("DROP TABLE IF EXISTS fhir.patient")
+    op.execute("DROP TABLE IF EXISTS auth_user")
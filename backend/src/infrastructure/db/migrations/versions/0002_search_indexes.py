@@ -0,0 +1,87 @@
+"""composite indexes for supported search shapes
+
+Each index below backs one supported search combination (see
+tests/test_query_plans.py). Single-column indexes that became a
+prefix of a composite index are dropped to keep write amplification down.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-01-06 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Patient?name= / ?identifier= are substring (ILIKE '%x%') matches, which only trigram indexes serve
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # CONCURRENTLY keeps regular tables writable; it is not supported on the partitioned parent
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_patient_name_family_trgm "
+            "ON fhir.patient USING gin (name_family gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_patient_name_given_trgm "
+            "ON fhir.patient USING gin (name_given gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_patient_identifier_trgm "
+            "ON fhir.patient USING gin (identifier_value gin_trgm_ops)"
+        )
+        # Encounter?subject=X[&date=ge...]
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_encounter_subject_period "
+            "ON fhir.encounter (subject_patient_id, period_start)"
+        )
+        # Encounter?status=X[&date=ge...]
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_encounter_status_period "
+            "ON fhir.encounter (status, period_start)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS fhir.idx_encounter_subject")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS fhir.idx_encounter_status")
+
+    # Observation?subject=X&code=Y[&date=ge...]; covers value columns for vitals charts
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_observation_subject_code_effective "
+        "ON fhir.observation (subject_patient_id, code_code, effective_datetime) "
+        "INCLUDE (value_quantity_value, value_quantity_unit)"
+    )
+    # Observation?subject=X[&date=ge...]
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_observation_subject_effective "
+        "ON fhir.observation (subject_patient_id, effective_datetime)"
+    )
+    # Observation?code=Y[&date=ge...]
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_observation_code_effective "
+        "ON fhir.observation (code_code, effective_datetime)"
+    )
+    op.execute("DROP INDEX IF EXISTS fhir.idx_observation_subject")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_observation_code")
+
+
+def downgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS idx_observation_code ON fhir.observation(code_code)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_observation_subject ON fhir.observation(subject_patient_id)")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_observation_code_effective")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_observation_subject_effective")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_observation_subject_code_effective")
+
+    op.execute("CREATE INDEX IF NOT EXISTS idx_encounter_status ON fhir.encounter(status)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_encounter_subject ON fhir.encounter(subject_patient_id)")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_encounter_status_period")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_encounter_subject_period")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_patient_identifier_trgm")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_patient_name_given_trgm")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_patient_name_family_trgm")
@@ -0,0 +1,73 @@
+"""indexes backing _sort orderings
+
+Every _sort key maps to a btree index ending in id, the tie-breaker, so
+sort + _count reads the first rows off the index instead of sorting every
+match (see SORT_INDEXES in the repositories). Single-column indexes that
+became a prefix of one of these are dropped.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps regular tables writable; it is not supported on the partitioned parent
+    with op.get_context().autocommit_block():
+        # Patient?_sort=family
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_patient_name_family_id "
+            "ON fhir.patient (name_family, id)"
+        )
+        # Patient?_sort=_lastUpdated
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_patient_updated_id "
+            "ON fhir.patient (updated_at, id)"
+        )
+        # Encounter?_sort=date
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_encounter_period_start_id "
+            "ON fhir.encounter (period_start, id)"
+        )
+        # Encounter?_sort=_lastUpdated
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_encounter_updated_id "
+            "ON fhir.encounter (updated_at, id)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS fhir.idx_patient_name_family")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS fhir.idx_encounter_period_start")
+
+    # Observation?_sort=date
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_observation_effective_id "
+        "ON fhir.observation (effective_datetime, id)"
+    )
+    # Observation?_sort=_lastUpdated
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_observation_updated_id "
+        "ON fhir.observation (updated_at, id)"
+    )
+    op.execute("DROP INDEX IF EXISTS fhir.idx_observation_effective")
+
+
+def downgrade() -> None:
+    op.execute("CREATE INDEX IF NOT EXISTS idx_observation_effective ON fhir.observation(effective_datetime)")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_observation_updated_id")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_observation_effective_id")
+
+    op.execute("CREATE INDEX IF NOT EXISTS idx_encounter_period_start ON fhir.encounter(period_start)")
+    op.execute("CREATE INDEX IF NOT EXISTS idx_patient_name_family ON fhir.patient(name_family)")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_encounter_updated_id")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_encounter_period_start_id")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_patient_updated_id")
+    op.execute("DROP INDEX IF EXISTS fhir.idx_patient_name_family_id")
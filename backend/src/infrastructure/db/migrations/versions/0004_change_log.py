@@ -0,0 +1,64 @@
+"""change log for the incremental sync feed
+
+Row triggers append one entry per create/update/delete of a Patient,
+Encounter or Observation, whatever the write path (API, bulk load,
+cascades). Entries are ordered by (txid, seq): the feed only returns
+entries of transactions older than every running one, so a cursor never
+skips a change that commits late.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 11:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKED_TABLES = [("patient", "Patient"), ("encounter", "Encounter"), ("observation", "Observation")]
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE fhir.change_log (
+          seq BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+          txid XID8 NOT NULL DEFAULT pg_current_xact_id(),
+          resource_type TEXT NOT NULL,
+          resource_id UUID NOT NULL,
+          operation TEXT NOT NULL CHECK (operation IN ('create', 'update', 'delete')),
+          changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    """)
+    op.execute("CREATE INDEX idx_change_log_txid_seq ON fhir.change_log (txid, seq)")
+    op.execute("""
+        CREATE FUNCTION fhir.record_change() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+          INSERT INTO fhir.change_log (resource_type, resource_id, operation)
+          VALUES (
+            TG_ARGV[0],
+            CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END,
+            CASE TG_OP WHEN 'INSERT' THEN 'create' WHEN 'UPDATE' THEN 'update' ELSE 'delete' END
+          );
+          RETURN NULL;
+        END
+        $$
+    """)
+    # Row triggers on the partitioned parent are cloned to every partition, present and future
+    for table, resource_type in TRACKED_TABLES:
+        op.execute(
+            f"CREATE TRIGGER {table}_change_log AFTER INSERT OR UPDATE OR DELETE ON fhir.{table} "
+            f"FOR EACH ROW EXECUTE FUNCTION fhir.record_change('{resource_type}')"
+        )
+
+
+def downgrade() -> None:
+    for table, _ in TRACKED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_change_log ON fhir.{table}")
+    op.execute("DROP FUNCTION IF EXISTS fhir.record_change()")
+    op.execute("DROP TABLE IF EXISTS fhir.change_log")
@@ -0,0 +1,122 @@
+"""soft-delete tombstones
+
+DELETE now only sets deleted_at; rows are removed later, in small batches,
+by the purger (src/infrastructure/db/purge.py). Search indexes become
+partial on deleted_at IS NULL so tombstones never enter a search. Indexes
+the purger needs to find referencing rows (encounter/observation by
+subject, observation by encounter) stay complete. A soft delete is
+recorded in the change log as 'delete'; purging a tombstone is not
+recorded again.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ["patient", "encounter", "observation"]
+
+# (table, index, definition) of the search indexes rebuilt as partial indexes
+SEARCH_INDEXES = [
+    ("patient", "idx_patient_name_family_trgm", "USING gin (name_family gin_trgm_ops)"),
+    ("patient", "idx_patient_name_given_trgm", "USING gin (name_given gin_trgm_ops)"),
+    ("patient", "idx_patient_identifier_trgm", "USING gin (identifier_value gin_trgm_ops)"),
+    ("patient", "idx_patient_name_family_id", "(name_family, id)"),
+    ("patient", "idx_patient_updated_id", "(updated_at, id)"),
+    ("encounter", "idx_encounter_status_period", "(status, period_start)"),
+    ("encounter", "idx_encounter_period_start_id", "(period_start, id)"),
+    ("encounter", "idx_encounter_updated_id", "(updated_at, id)"),
+]
+OBSERVATION_SEARCH_INDEXES = [
+    ("idx_observation_code_effective", "(code_code, effective_datetime)"),
+    ("idx_observation_effective_id", "(effective_datetime, id)"),
+    ("idx_observation_updated_id", "(updated_at, id)"),
+]
+
+RECORD_CHANGE = """
+    CREATE OR REPLACE FUNCTION fhir.record_change() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+      {skip}
+      INSERT INTO fhir.change_log (resource_type, resource_id, operation)
+      VALUES (
+        TG_ARGV[0],
+        CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END,
+        CASE WHEN TG_OP = 'INSERT' THEN 'create' WHEN {deleted} THEN 'delete' ELSE 'update' END
+      );
+      RETURN NULL;
+    END
+    $$
+"""
+
+
+def upgrade() -> None:
+    # Nullable without a default: a catalog-only change, no table rewrite
+    for table in TABLES:
+        op.execute(f"ALTER TABLE fhir.{table} ADD COLUMN deleted_at TIMESTAMPTZ")
+
+    # Tombstones were recorded when they were created; touching or purging one isn't a change
+    op.execute(RECORD_CHANGE.format(
+        skip="IF TG_OP <> 'INSERT' AND OLD.deleted_at IS NOT NULL THEN RETURN NULL; END IF;",
+        deleted="TG_OP = 'DELETE' OR NEW.deleted_at IS NOT NULL",
+    ))
+
+    # CONCURRENTLY keeps regular tables writable; it is not supported on the partitioned parent
+    with op.get_context().autocommit_block():
+        for table, name, definition in SEARCH_INDEXES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name}_live "
+                f"ON fhir.{table} {definition} WHERE deleted_at IS NULL"
+            )
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS fhir.{name}")
+            op.execute(f"ALTER INDEX fhir.{name}_live RENAME TO {name}")
+        # Tombstones waiting for the purger
+        for table in ("patient", "encounter"):
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_{table}_deleted_at "
+                f"ON fhir.{table} (deleted_at) WHERE deleted_at IS NOT NULL"
+            )
+
+    for name, definition in OBSERVATION_SEARCH_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS fhir.{name}")
+        op.execute(f"CREATE INDEX {name} ON fhir.observation {definition} WHERE deleted_at IS NULL")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_observation_deleted_at "
+        "ON fhir.observation (deleted_at) WHERE deleted_at IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"DROP INDEX IF EXISTS fhir.idx_{table}_deleted_at")
+    for name, definition in OBSERVATION_SEARCH_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS fhir.{name}")
+        op.execute(f"CREATE INDEX {name} ON fhir.observation {definition}")
+    for table, name, definition in SEARCH_INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS fhir.{name}")
+        op.execute(f"CREATE INDEX {name} ON fhir.{table} {definition}")
+
+    op.execute(RECORD_CHANGE.format(skip="", deleted="TG_OP = 'DELETE'"))
+    # Pending tombstones become real deletes, as the purger would have done
+    op.execute("""
+        DELETE FROM fhir.observation
+        WHERE deleted_at IS NOT NULL
+           OR encounter_id IN (SELECT id FROM fhir.encounter WHERE deleted_at IS NOT NULL)
+    """)
+    op.execute("DELETE FROM fhir.encounter WHERE deleted_at IS NOT NULL")
+    op.execute("""
+        DELETE FROM fhir.patient p
+        WHERE p.deleted_at IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM fhir.encounter e WHERE e.subject_patient_id = p.id)
+          AND NOT EXISTS (SELECT 1 FROM fhir.observation o WHERE o.subject_patient_id = p.id)
+    """)
+    for table in TABLES:
+        op.execute(f"ALTER TABLE fhir.{table} DROP COLUMN deleted_at")
@@ -0,0 +1,54 @@
+"""job table for background operations
+
+Runners claim queued jobs with FOR UPDATE SKIP LOCKED, so any number of
+in-process or standalone runners share the queue without a broker (see
+src/infrastructure/db/job_queue.py).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 13:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE job (
+          id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+          kind TEXT NOT NULL,
+          params JSONB NOT NULL DEFAULT '{}'::jsonb,
+          status TEXT NOT NULL DEFAULT 'queued'
+            CHECK (status IN ('queued', 'running', 'completed', 'failed', 'cancelled')),
+          owner_id UUID REFERENCES auth_user(id) ON DELETE SET NULL,
+          attempts INTEGER NOT NULL DEFAULT 0,
+          max_attempts INTEGER NOT NULL DEFAULT 3,
+          run_after TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+          progress DOUBLE PRECISION NOT NULL DEFAULT 0,
+          progress_message TEXT,
+          result JSONB,
+          error TEXT,
+          cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+          worker TEXT,
+          heartbeat_at TIMESTAMPTZ,
+          created_at TIMESTAMPTZ DEFAULT NOW(),
+          started_at TIMESTAMPTZ,
+          finished_at TIMESTAMPTZ
+        )
+    """)
+    # Claiming: the oldest due job among the queued ones
+    op.execute("CREATE INDEX idx_job_queued ON job (run_after) WHERE status = 'queued'")
+    # Reaping: running jobs whose runner stopped reporting
+    op.execute("CREATE INDEX idx_job_running ON job (heartbeat_at) WHERE status = 'running'")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS job")
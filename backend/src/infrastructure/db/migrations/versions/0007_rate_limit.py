@@ -0,0 +1,38 @@
+"""rate_limit_bucket for the shared rate limiter backend
+
+Token buckets per principal, used when RATE_LIMIT_BACKEND=postgres so every
+app process draws from the same bucket (see
+src/infrastructure/db/rate_limit.py). UNLOGGED: buckets are refilled state,
+losing them on a crash only resets the limits.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE UNLOGGED TABLE rate_limit_bucket (
+          key TEXT PRIMARY KEY,
+          tokens DOUBLE PRECISION NOT NULL,
+          allowed BOOLEAN NOT NULL,
+          updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    """)
+    # Idle buckets are full again and can be dropped
+    op.execute("CREATE INDEX idx_rate_limit_bucket_updated ON rate_limit_bucket (updated_at)")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS rate_limit_bucket")
@@ -0,0 +1,91 @@
+"""partition a legacy unpartitioned fhir.observation
+
+Databases bootstrapped from the init.sql that predates the migrations have
+a plain fhir.observation (primary key on id, nullable effective_datetime)
+and were stamped at 0001, whose own schema is partitioned. Revisions
+0002-0007 apply to the plain table as well; this one converts it: the
+table is renamed, a partitioned parent is created with the same columns,
+one partition per month present in the data, and the rows are copied.
+Observations without effective_datetime take created_at, the receipt time
+the API uses. Indexes and the change-log trigger move to the new parent.
+Databases created by 0001 are already partitioned and are left alone.
+
+The copy holds ACCESS EXCLUSIVE on fhir.observation; run it in a
+maintenance window on large tables.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-20 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+from src.infrastructure.db.partitions import add_months, partition_name
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LEGACY_TABLE = "fhir.observation_unpartitioned"
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    kind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('fhir.observation')")).scalar()
+    if kind != "r":
+        return
+
+    # Index definitions still name fhir.observation, which is the new parent when they are replayed
+    indexes = conn.execute(text(
+        "SELECT indexdef FROM pg_indexes "
+        "WHERE schemaname = 'fhir' AND tablename = 'observation' AND indexname <> 'observation_pkey'"
+    )).scalars().all()
+
+    op.execute("CREATE SCHEMA IF NOT EXISTS fhir_archive")
+    op.execute(f"ALTER TABLE fhir.observation RENAME TO {LEGACY_TABLE.split('.')[1]}")
+    # The copy must not be recorded in the change log
+    op.execute(f"DROP TRIGGER IF EXISTS observation_change_log ON {LEGACY_TABLE}")
+    op.execute(f"UPDATE {LEGACY_TABLE} SET effective_datetime = coalesce(created_at, now()) WHERE effective_datetime IS NULL")
+
+    op.execute(f"""
+        CREATE TABLE fhir.observation (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)
+        PARTITION BY RANGE (effective_datetime)
+    """)
+    op.execute("ALTER TABLE fhir.observation ALTER COLUMN effective_datetime SET NOT NULL")
+    op.execute("CREATE TABLE fhir.observation_default PARTITION OF fhir.observation DEFAULT")
+
+    months = conn.execute(text(
+        f"SELECT DISTINCT date_trunc('month', effective_datetime AT TIME ZONE 'UTC')::date FROM {LEGACY_TABLE}"
+    )).scalars().all()
+    for month in months:
+        op.execute(
+            f"CREATE TABLE fhir.{partition_name(month)} PARTITION OF fhir.observation "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{add_months(month, 1).isoformat()} 00:00:00+00')"
+        )
+
+    op.execute(f"INSERT INTO fhir.observation SELECT * FROM {LEGACY_TABLE}")
+    op.execute(f"DROP TABLE {LEGACY_TABLE}")
+
+    # Added after the copy, once the legacy observation_pkey name is free again
+    op.execute("ALTER TABLE fhir.observation ADD PRIMARY KEY (id, effective_datetime)")
+    op.execute("ALTER TABLE fhir.observation ADD FOREIGN KEY (subject_patient_id) REFERENCES fhir.patient(id)")
+    op.execute("ALTER TABLE fhir.observation ADD FOREIGN KEY (encounter_id) REFERENCES fhir.encounter(id)")
+
+    for definition in indexes:
+        op.execute(definition)
+    # Created by 0001 but not by the old init.sql
+    op.execute("CREATE INDEX IF NOT EXISTS idx_observation_encounter ON fhir.observation(encounter_id)")
+    op.execute(
+        "CREATE TRIGGER observation_change_log AFTER INSERT OR UPDATE OR DELETE ON fhir.observation "
+        "FOR EACH ROW EXECUTE FUNCTION fhir.record_change('Observation')"
+    )
+
+
+def downgrade() -> None:
+    # Converted and natively partitioned databases are indistinguishable; stay partitioned
+    pass
@@ -0,0 +1,35 @@
+"""revoked_token for logouts shared by every app process
+
+One row per revoked token id (jti) until the token's exp; see
+src/infrastructure/db/token_revocations.py. Logged, unlike
+rate_limit_bucket: losing it on a crash would make revoked tokens valid
+again.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-20 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE revoked_token (
+          jti TEXT PRIMARY KEY,
+          expires_at TIMESTAMPTZ NOT NULL
+        )
+    """)
+    op.execute("CREATE INDEX idx_revoked_token_expires_at ON revoked_token (expires_at)")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS revoked_token")
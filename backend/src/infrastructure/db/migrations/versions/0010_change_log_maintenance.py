@@ -0,0 +1,50 @@
+"""keep maintenance row moves out of the change log
+
+Creating a monthly partition moves the rows parked in the default
+partition with DELETE ... RETURNING into the new table. The delete fired
+the change-log trigger cloned to the default partition and recorded a
+'delete' for every moved, live observation, so feed consumers dropped
+them. Maintenance code now runs such moves with
+SET LOCAL fhir.maintenance = 'on', which the trigger skips.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-21 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+RECORD_CHANGE = """
+    CREATE OR REPLACE FUNCTION fhir.record_change() RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+      {skip}
+      IF TG_OP <> 'INSERT' AND OLD.deleted_at IS NOT NULL THEN RETURN NULL; END IF;
+      INSERT INTO fhir.change_log (resource_type, resource_id, operation)
+      VALUES (
+        TG_ARGV[0],
+        CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END,
+        CASE WHEN TG_OP = 'INSERT' THEN 'create' WHEN TG_OP = 'DELETE' OR NEW.deleted_at IS NOT NULL THEN 'delete' ELSE 'update' END
+      );
+      RETURN NULL;
+    END
+    $$
+"""
+
+
+def upgrade() -> None:
+    # current_setting(..., true) is NULL, not an error, when the setting was never set
+    op.execute(RECORD_CHANGE.format(
+        skip="IF coalesce(current_setting('fhir.maintenance', true), '') = 'on' THEN RETURN NULL; END IF;",
+    ))
+
+
+def downgrade() -> None:
+    op.execute(RECORD_CHANGE.format(skip=""))
@@ -0,0 +1,36 @@
+"""read_after_write marks shared by every app process
+
+One row per client that wrote recently, used when
+READ_AFTER_WRITE_BACKEND=postgres so a client's reads stay on the primary
+whichever process serves them (see
+src/infrastructure/db/read_after_write.py). UNLOGGED: marks live for
+seconds, losing them on a crash only lets a few reads go to a replica early.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-22 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0011"
+down_revision: Union[str, None] = "0010"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE UNLOGGED TABLE read_after_write (
+          client TEXT PRIMARY KEY,
+          sticky_until TIMESTAMPTZ NOT NULL
+        )
+    """)
+    op.execute("CREATE INDEX idx_read_after_write_sticky_until ON read_after_write (sticky_until)")
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS read_after_write")
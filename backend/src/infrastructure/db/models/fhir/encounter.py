@@ -18,5 +18,7 @@ class Encounter(Base):
     resource = Column(JSONB, nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Soft-delete tombstone; the purger removes the row once it is older than PURGE_RETENTION_SECONDS
+    deleted_at = Column(TIMESTAMP(timezone=True))
 
     # Relationships will be defined after all models are imported
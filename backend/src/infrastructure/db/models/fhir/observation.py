@@ -9,19 +9,26 @@ from src.infrastructure.db.base import Base
 
 class Observation(Base):
     __tablename__ = "observation"
-    __table_args__ = {'schema': 'fhir'}
+    # Monthly range partitions on effective_datetime (see db/partitions.py)
+    __table_args__ = {
+        'schema': 'fhir',
+        'postgresql_partition_by': 'RANGE (effective_datetime)',
+    }
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     status = Column(String)
     code_code = Column(String)
     subject_patient_id = Column(UUID(as_uuid=True), ForeignKey('fhir.patient.id'))
     encounter_id = Column(UUID(as_uuid=True), ForeignKey('fhir.encounter.id', ondelete='CASCADE'))
-    effective_datetime = Column(TIMESTAMP(timezone=True))
+    # Partition key, so it must be part of the primary key
+    effective_datetime = Column(TIMESTAMP(timezone=True), primary_key=True)
     value_quantity_value = Column(Numeric)
     value_quantity_unit = Column(String)
     value_string = Column(String)
     resource = Column(JSONB, nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Soft-delete tombstone; the purger removes the row once it is older than PURGE_RETENTION_SECONDS
+    deleted_at = Column(TIMESTAMP(timezone=True))
 
     # Relationships will be defined after all models are imported
@@ -0,0 +1,30 @@
+import uuid
+
+from sqlalchemy import TIMESTAMP, Boolean, Column, Float, ForeignKey, Integer, String, text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+
+from src.infrastructure.db.base import Base
+
+
+class Job(Base):
+    __tablename__ = "job"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String, nullable=False)
+    params = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+    status = Column(String, nullable=False, server_default="queued")  # queued, running, completed, failed, cancelled
+    owner_id = Column(UUID(as_uuid=True), ForeignKey("auth_user.id", ondelete="SET NULL"))
+    attempts = Column(Integer, nullable=False, server_default="0")
+    max_attempts = Column(Integer, nullable=False, server_default="3")
+    run_after = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    progress = Column(Float, nullable=False, server_default="0")
+    progress_message = Column(String)
+    result = Column(JSONB)
+    error = Column(String)
+    cancel_requested = Column(Boolean, nullable=False, server_default="false")
+    worker = Column(String)  # host:pid of the runner holding the job
+    heartbeat_at = Column(TIMESTAMP(timezone=True))
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    started_at = Column(TIMESTAMP(timezone=True))
+    finished_at = Column(TIMESTAMP(timezone=True))
@@ -0,0 +1,197 @@
+import re
+import threading
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from src.config.settings import settings
+from src.infrastructure.db.job_queue import JobContext
+from src.infrastructure.db.query_budget import untracked
+
+PARENT_TABLE = "fhir.observation"
+DEFAULT_PARTITION = "observation_default"
+ARCHIVE_SCHEMA = "fhir_archive"
+
+_PARTITION_NAME = re.compile(r"^observation_y(\d{4})m(\d{2})$")
+
+# Months whose partition is known to exist; shared by every manager in the process
+_known_months: Set[date] = set()
+_known_months_lock = threading.Lock()
+
+
+def month_start(value: Union[date, datetime]) -> date:
+    """Return the first day of the (UTC) month containing value"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        value = value.date()
+    return value.replace(day=1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Shift a month start by a number of months"""
+    index = month.year * 12 + (month.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"observation_y{month.year:04d}m{month.month:02d}"
+
+
+class ObservationPartitionManager:
+    """Creates, lists and retires the monthly partitions of fhir.observation
+
+    Maintenance only (the scheduled partitions job, scripts/manage_partitions.py,
+    seed loaders), each call on connections of its own. Attaching a
+    partition takes ACCESS EXCLUSIVE on the default partition, so calling this
+    from a request whose session has already read observations deadlocks
+    across the two connections without Postgres noticing. Requests write into
+    the default partition when their month does not exist yet.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+
+    def ensure_partition(self, value: Union[date, datetime]) -> bool:
+        """Make sure the partition covering value exists; True if it was created"""
+        month = month_start(value)
+        if month in _known_months:
+            return False
+
+        created = False
+        # Partition DDL runs once per month per process; keep it out of request budgets
+        with untracked(), self.engine.begin() as conn:
+            # Serialise partition DDL across workers
+            conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": PARENT_TABLE})
+            name = partition_name(month)
+            exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": f"fhir.{name}"}).scalar()
+            if exists is None:
+                self._create_partition(conn, month)
+                created = True
+
+        with _known_months_lock:
+            _known_months.add(month)
+        return created
+
+    def split_default(self) -> List[str]:
+        """Create the partitions for months that have rows parked in the default partition"""
+        with self.engine.connect() as conn:
+            if conn.execute(text("SELECT to_regclass(:name)"), {"name": f"fhir.{DEFAULT_PARTITION}"}).scalar() is None:
+                return []
+            months = conn.execute(text(
+                f"SELECT DISTINCT date_trunc('month', effective_datetime AT TIME ZONE 'UTC')::date "
+                f"FROM fhir.{DEFAULT_PARTITION}"
+            )).scalars().all()
+        return [partition_name(month) for month in sorted(months) if self.ensure_partition(month)]
+
+    def ensure_partitions(self, start: Union[date, datetime], months_ahead: int) -> List[str]:
+        """Pre-create partitions from start's month through months_ahead months later"""
+        first = month_start(start)
+        created = []
+        for offset in range(months_ahead + 1):
+            month = add_months(first, offset)
+            if self.ensure_partition(month):
+                created.append(partition_name(month))
+        return created
+
+    def list_partitions(self) -> List[Tuple[str, date]]:
+        """List monthly partitions currently attached to fhir.observation"""
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:parent AS regclass)"
+            ), {"parent": PARENT_TABLE}).scalars().all()
+
+        partitions = []
+        for name in rows:
+            match = _PARTITION_NAME.match(name)
+            if match:
+                partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+        return sorted(partitions, key=lambda p: p[1])
+
+    def apply_retention(self, keep_months: int, action: str = "archive", today: Optional[date] = None) -> List[str]:
+        """Detach partitions older than keep_months, then archive or drop them"""
+        if keep_months <= 0:
+            return []
+        if action not in ("archive", "drop"):
+            raise ValueError(f"Unknown retention action: {action}")
+
+        cutoff = add_months(month_start(today or datetime.now(timezone.utc)), -keep_months)
+        retired = []
+        for name, month in self.list_partitions():
+            if month >= cutoff:
+                continue
+            with self.engine.begin() as conn:
+                conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": PARENT_TABLE})
+                conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION fhir.{name}"))
+                if action == "archive":
+                    conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+                    conn.execute(text(f"ALTER TABLE fhir.{name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+                else:
+                    conn.execute(text(f"DROP TABLE fhir.{name}"))
+            with _known_months_lock:
+                _known_months.discard(month)
+            retired.append(name)
+        return retired
+
+    def _create_partition(self, conn, month: date) -> None:
+        """Create and attach one month, moving any rows parked in the default partition"""
+        name = partition_name(month)
+        lower = f"{month.isoformat()} 00:00:00+00"
+        upper = f"{add_months(month, 1).isoformat()} 00:00:00+00"
+
+        # Fail rather than queue every observation read behind the ACCESS EXCLUSIVE lock
+        conn.execute(text("SET LOCAL lock_timeout = '5s'"))
+        conn.execute(text(
+            f"CREATE TABLE fhir.{name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        ))
+        has_default = conn.execute(
+            text("SELECT to_regclass(:name)"), {"name": f"fhir.{DEFAULT_PARTITION}"}
+        ).scalar()
+        if has_default is not None:
+            # A move, not a change: keep the DELETE out of the change log (migration 0010)
+            conn.execute(text("SET LOCAL fhir.maintenance = 'on'"))
+            conn.execute(text(
+                f"WITH moved AS ("
+                f"DELETE FROM fhir.{DEFAULT_PARTITION} "
+                f"WHERE effective_datetime >= :lower AND effective_datetime < :upper "
+                f"RETURNING *) "
+                f"INSERT INTO fhir.{name} SELECT * FROM moved"
+            ), {"lower": lower, "upper": upper})
+        conn.execute(text(
+            f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION fhir.{name} "
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        ))
+
+
+def maintain_partitions(
+    engine: Engine,
+    months_ahead: int = settings.OBSERVATION_PARTITION_MONTHS_AHEAD,
+    retention_months: int = settings.OBSERVATION_RETENTION_MONTHS,
+    retention_action: str = settings.OBSERVATION_RETENTION_ACTION,
+    on_step: Optional[Callable[[float, str], None]] = None,
+) -> Dict[str, List[str]]:
+    """Create the coming months, split months parked in the default partition, retire old ones
+
+    on_step(progress, message) is called before each step.
+    """
+    manager = ObservationPartitionManager(engine)
+    steps = [
+        ("created", lambda: manager.ensure_partitions(datetime.now(timezone.utc), months_ahead)),
+        # Observations written for months outside the horizon land in the default partition
+        ("split", manager.split_default),
+        ("retired", lambda: manager.apply_retention(retention_months, retention_action)),
+    ]
+    result = {}
+    for index, (key, step) in enumerate(steps):
+        if on_step is not None:
+            on_step(index / len(steps), key)
+        result[key] = step()
+    return result
+
+def partition_job(context: JobContext) -> Dict[str, List[str]]:
+    """Job handler: one maintain_partitions() run, cancellable between steps"""
+    return maintain_partitions(context.engine, on_step=lambda progress, step: context.report(progress, step, force=True))
@@ -0,0 +1,35 @@
+from itertools import chain
+from types import SimpleNamespace
+from typing import Dict, Sequence, Tuple
+
+from sqlalchemy import func, literal
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Query
+
+# _elements/_summary push-down: a search selects only the columns behind the
+# requested elements and builds a partial resource with jsonb_build_object
+# instead of hydrating ORM rows with the whole resource document.
+
+
+def project_query(
+    query: Query,
+    model,
+    elements: Sequence[str],
+    element_columns: Dict[str, Tuple[str, ...]],
+    resource_keys: bool = True,
+) -> Query:
+    """Replace the select list of a search query with the columns behind elements
+
+    With resource_keys, the matching top-level keys of the resource document
+    are selected as a partial JSONB object labelled resource.
+    """
+    names = ["id", *chain.from_iterable(element_columns.get(element, ()) for element in elements)]
+    entities = [getattr(model, name) for name in dict.fromkeys(names)]
+    if resource_keys and elements:
+        pairs = chain.from_iterable((literal(element), model.resource[element]) for element in elements)
+        entities.append(func.jsonb_build_object(*pairs).label("resource"))
+    return query.with_entities(*entities)
+
+def row_namespace(row: Row, model) -> SimpleNamespace:
+    """Projected row with the model's attributes; columns not selected read as None"""
+    return SimpleNamespace(**{**dict.fromkeys(model.__table__.columns.keys()), **row._asdict()})
@@ -0,0 +1,193 @@
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from src.config.settings import settings
+from src.infrastructure.db.job_queue import JobContext
+from src.infrastructure.db.query_budget import untracked
+from src.infrastructure.observability.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+PURGED_ROWS = registry.counter(
+    "fhir_purged_rows_total", "Rows tombstoned by cascade or removed by the purger", ("resource", "step")
+)
+
+# (resource type, step, statement). Every statement touches at most :batch rows,
+# claimed with SKIP LOCKED so concurrent purgers never wait on each other or on
+# a request. Children go before parents so the foreign keys always hold; a
+# tombstone that is still referenced is left for a later run. Reads and
+# searches already hide the children of a tombstone, so a cascade only makes
+# that durable and lets the parent be purged. The change log is trimmed to
+# CHANGE_LOG_RETENTION_DAYS the same way; feed cursors into the trimmed part
+# answer 410 (ChangeFeedController).
+PURGE_STEPS = [
+    # Encounters of a deleted patient become tombstones too
+    ("Encounter", "cascade", """
+        UPDATE fhir.encounter SET deleted_at = now(), updated_at = now()
+        WHERE id IN (
+          SELECT e.id
+          FROM fhir.patient p
+          JOIN fhir.encounter e ON e.subject_patient_id = p.id AND e.deleted_at IS NULL
+          WHERE p.deleted_at IS NOT NULL
+          LIMIT :batch
+          FOR UPDATE OF e SKIP LOCKED
+        )
+    """),
+    # Observations of a deleted encounter become tombstones too
+    ("Observation", "cascade", """
+        UPDATE fhir.observation SET deleted_at = now(), updated_at = now()
+        WHERE (id, effective_datetime) IN (
+          SELECT o.id, o.effective_datetime
+          FROM fhir.encounter e
+          JOIN fhir.observation o ON o.encounter_id = e.id AND o.deleted_at IS NULL
+          WHERE e.deleted_at IS NOT NULL
+          LIMIT :batch
+          FOR UPDATE OF o SKIP LOCKED
+        )
+    """),
+    # ... and those of a deleted patient, including observations without an encounter
+    ("Observation", "cascade_subject", """
+        UPDATE fhir.observation SET deleted_at = now(), updated_at = now()
+        WHERE (id, effective_datetime) IN (
+          SELECT o.id, o.effective_datetime
+          FROM fhir.patient p
+          JOIN fhir.observation o ON o.subject_patient_id = p.id AND o.deleted_at IS NULL
+          WHERE p.deleted_at IS NOT NULL
+          LIMIT :batch
+          FOR UPDATE OF o SKIP LOCKED
+        )
+    """),
+    ("Observation", "purge", """
+        DELETE FROM fhir.observation
+        WHERE (id, effective_datetime) IN (
+          SELECT id, effective_datetime FROM fhir.observation
+          WHERE deleted_at < now() - make_interval(secs => :retention)
+          LIMIT :batch
+          FOR UPDATE SKIP LOCKED
+        )
+    """),
+    ("Encounter", "purge", """
+        DELETE FROM fhir.encounter
+        WHERE id IN (
+          SELECT e.id FROM fhir.encounter e
+          WHERE e.deleted_at < now() - make_interval(secs => :retention)
+            AND NOT EXISTS (SELECT 1 FROM fhir.observation o WHERE o.encounter_id = e.id)
+          LIMIT :batch
+          FOR UPDATE SKIP LOCKED
+        )
+    """),
+    ("Patient", "purge", """
+        DELETE FROM fhir.patient
+        WHERE id IN (
+          SELECT p.id FROM fhir.patient p
+          WHERE p.deleted_at < now() - make_interval(secs => :retention)
+            AND NOT EXISTS (SELECT 1 FROM fhir.encounter e WHERE e.subject_patient_id = p.id)
+            AND NOT EXISTS (SELECT 1 FROM fhir.observation o WHERE o.subject_patient_id = p.id)
+          LIMIT :batch
+          FOR UPDATE SKIP LOCKED
+        )
+    """),
+    # Oldest first, along the primary key; a retention of 0 keeps every entry
+    ("ChangeLog", "expire", """
+        DELETE FROM fhir.change_log
+        WHERE seq IN (
+          SELECT seq FROM fhir.change_log
+          WHERE :change_log_retention > 0
+            AND changed_at < now() - make_interval(days => :change_log_retention)
+          ORDER BY seq
+          LIMIT :batch
+          FOR UPDATE SKIP LOCKED
+        )
+    """),
+]
+
+
+class TombstonePurger:
+    """Removes soft-deleted rows in small, throttled transactions
+
+    Each batch commits on its own and is followed by a pause, so row locks
+    are held for one batch at most and ingest keeps flowing while a large
+    encounter is purged.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        batch_size: int = settings.PURGE_BATCH_SIZE,
+        retention_seconds: int = settings.PURGE_RETENTION_SECONDS,
+        pause_seconds: float = settings.PURGE_BATCH_PAUSE_SECONDS,
+        change_log_retention_days: int = settings.CHANGE_LOG_RETENTION_DAYS,
+    ):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.retention_seconds = retention_seconds
+        self.pause_seconds = pause_seconds
+        self.change_log_retention_days = change_log_retention_days
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self, max_batches: Optional[int] = None, on_batch: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+        """Run every step until it runs dry (or max_batches per step); rows affected per step
+
+        on_batch(step, rows) is called after each committed batch.
+        """
+        params = {
+            "batch": self.batch_size,
+            "retention": self.retention_seconds,
+            "change_log_retention": self.change_log_retention_days,
+        }
+        totals = {}
+        for resource_type, step, statement in PURGE_STEPS:
+            key = f"{resource_type}.{step}"
+            totals[key] = 0
+            batches = 0
+            while not self._stop.is_set():
+                with untracked(), self.engine.begin() as conn:
+                    rows = conn.execute(text(statement), params).rowcount
+                batches += 1
+                if on_batch is not None:
+                    on_batch(key, rows)
+                if rows:
+                    totals[key] += rows
+                    PURGED_ROWS.inc((resource_type, step), rows)
+                if rows < self.batch_size or (max_batches is not None and batches >= max_batches):
+                    break
+                self._stop.wait(self.pause_seconds)
+        return totals
+
+    def start(self, interval_seconds: float) -> None:
+        """Run the purger every interval_seconds on a daemon thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval_seconds,), name="tombstone-purger", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self, interval_seconds: float) -> None:
+        while not self._stop.wait(interval_seconds):
+            try:
+                totals = self.run_once()
+            except Exception:
+                # The database may be briefly unavailable; the next run picks up where this one stopped
+                logger.exception("Tombstone purge failed")
+                continue
+            if any(totals.values()):
+                logger.info("Purged tombstones: %s", {key: rows for key, rows in totals.items() if rows})
+
+
+def purge_job(context: JobContext) -> Dict[str, int]:
+    """Job handler: one full purge run, reporting progress after every batch"""
+    steps = [f"{resource_type}.{step}" for resource_type, step, _ in PURGE_STEPS]
+
+    def on_batch(key: str, rows: int) -> None:
+        context.report(steps.index(key) / len(steps), f"{key}: {rows} rows")
+
+    return TombstonePurger(context.engine).run_once(on_batch=on_batch)
@@ -0,0 +1,131 @@
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.infrastructure.db.instrumentation import normalize_statement
+
+# Opt-in statement tracking: counts the statements a unit of work runs and
+# where they came from, so N+1 patterns and budget regressions are visible.
+
+SRC_DIR = str(Path(__file__).resolve().parents[2])
+CALL_SITE_DEPTH = 2
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+@dataclass(frozen=True)
+class QueryBudget:
+    statements: Optional[int] = None
+    seconds: Optional[float] = None
+
+@dataclass
+class StatementRecord:
+    statement: str
+    seconds: float
+    call_site: str
+
+@dataclass
+class QueryTracker:
+    records: List[StatementRecord] = field(default_factory=list)
+
+    @property
+    def statements(self) -> int:
+        return len(self.records)
+
+    @property
+    def seconds(self) -> float:
+        return sum(r.seconds for r in self.records)
+
+    def exceeds(self, budget: QueryBudget) -> bool:
+        return (
+            (budget.statements is not None and self.statements > budget.statements)
+            or (budget.seconds is not None and self.seconds > budget.seconds)
+        )
+
+    def hot_call_sites(self, limit: int = 5) -> List[Tuple[str, int]]:
+        """Call sites ordered by how many statements they issued"""
+        return Counter(r.call_site for r in self.records).most_common(limit)
+
+    def describe(self, budget: QueryBudget) -> str:
+        lines = [
+            f"{self.statements} statements in {self.seconds * 1000:.1f} ms "
+            f"(budget: {budget.statements} statements, {budget.seconds} s)"
+        ]
+        for call_site, count in self.hot_call_sites():
+            lines.append(f"  {count}x {call_site}")
+        for record in sorted(self.records, key=lambda r: -r.seconds)[:3]:
+            lines.append(f"  slowest {record.seconds * 1000:.1f} ms: {normalize_statement(record.statement)}")
+        return "\n".join(lines)
+
+_current_tracker: ContextVar[Optional[QueryTracker]] = ContextVar("query_tracker", default=None)
+
+
+def _call_site() -> str:
+    """Innermost application frames that issued the statement"""
+    sites = []
+    frame = sys._getframe(2)
+    while frame is not None and len(sites) < CALL_SITE_DEPTH:
+        filename = frame.f_code.co_filename
+        if filename.startswith(SRC_DIR) and filename != __file__:
+            sites.append(f"{filename[len(SRC_DIR) + 1:]}:{frame.f_lineno} {frame.f_code.co_name}")
+        frame = frame.f_back
+    return " <- ".join(sites) or "<unknown>"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is not None and _current_tracker.get() is not None:
+        context._budget_started_at = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    tracker = _current_tracker.get()
+    started_at = getattr(context, "_budget_started_at", None)
+    if tracker is not None and started_at is not None:
+        tracker.records.append(StatementRecord(statement, time.perf_counter() - started_at, _call_site()))
+
+def enable_query_tracking(engine: Engine) -> None:
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryTracker]:
+    """Record every statement run in this context (and threads it hands work to)"""
+    tracker = QueryTracker()
+    token = _current_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _current_tracker.reset(token)
+
+@contextmanager
+def untracked() -> Iterator[None]:
+    """Exclude maintenance work (e.g. partition DDL) from the current budget"""
+    token = _current_tracker.set(None)
+    try:
+        yield
+    finally:
+        _current_tracker.reset(token)
+
+@contextmanager
+def assert_query_budget(statements: Optional[int] = None, seconds: Optional[float] = None) -> Iterator[QueryTracker]:
+    """Raise QueryBudgetExceeded when the block runs more than its budget"""
+    budget = QueryBudget(statements, seconds)
+    with track_queries() as tracker:
+        yield tracker
+    if tracker.exceeds(budget):
+        raise QueryBudgetExceeded(tracker.describe(budget))
+
+def query_budget(statements: Optional[int] = None, seconds: Optional[float] = None) -> Callable:
+    """Declare a route's query budget; checked by the query budget middleware"""
+    def decorate(endpoint: Callable) -> Callable:
+        endpoint.__query_budget__ = QueryBudget(statements, seconds)
+        return endpoint
+    return decorate
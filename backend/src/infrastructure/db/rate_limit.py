@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from src.infrastructure.db.query_budget import untracked
+
+# Token buckets for per-principal rate limiting. A bucket holds up to burst
+# tokens and refills at rate tokens per second; a request takes one.
+# take() answers how long the caller should wait: 0 when the request is
+# admitted, otherwise the seconds until a token is available.
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitBackend(ABC):
+    # take() does I/O and must not run on the event loop
+    blocking = False
+
+    @abstractmethod
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        """Take cost tokens from key's bucket; 0 if admitted, else seconds to wait"""
+        pass
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Buckets in this process; each app process enforces its own limits"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            admitted = tokens >= cost
+            if admitted:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            # The least recently seen buckets have refilled the longest
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0.0 if admitted else (cost - tokens) / rate
+
+
+_REFILLED = "least(:burst, b.tokens + extract(epoch FROM now() - b.updated_at) * :rate)"
+
+# One round trip: refill, decide and take atomically under the row lock
+_TAKE = text(f"""
+    INSERT INTO rate_limit_bucket AS b (key, tokens, allowed, updated_at)
+    VALUES (:key, :burst - :cost, true, now())
+    ON CONFLICT (key) DO UPDATE SET
+      allowed = {_REFILLED} >= :cost,
+      tokens = {_REFILLED} - CASE WHEN {_REFILLED} >= :cost THEN :cost ELSE 0 END,
+      updated_at = now()
+    RETURNING allowed, tokens
+""")
+
+_EXPIRE = text("DELETE FROM rate_limit_bucket WHERE updated_at < now() - make_interval(secs => :idle)")
+
+
+class PostgresRateLimitBackend(RateLimitBackend):
+    """Buckets in the rate_limit_bucket table (migration 0007), shared by every process
+
+    Costs one statement per request. If the database cannot be reached the
+    request is admitted: the limiter must not turn an outage into one for
+    every client.
+    """
+    blocking = True
+
+    def __init__(self, engine: Engine, idle_seconds: float = 3600.0):
+        self.engine = engine
+        self.idle_seconds = idle_seconds
+        self._expired_at = time.monotonic()
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        try:
+            with untracked(), self.engine.begin() as conn:
+                row = conn.execute(_TAKE, {"key": key, "rate": rate, "burst": burst, "cost": cost}).first()
+                if time.monotonic() - self._expired_at > self.idle_seconds:
+                    self._expired_at = time.monotonic()
+                    conn.execute(_EXPIRE, {"idle": self.idle_seconds})
+        except Exception:
+            logger.exception("Rate limit backend unavailable; admitting request")
+            return 0.0
+        return 0.0 if row.allowed else (cost - row.tokens) / rate
+
+
+def build_rate_limit_backend(name: str, engine: Engine) -> RateLimitBackend:
+    if name == "memory":
+        return MemoryRateLimitBackend()
+    if name == "postgres":
+        return PostgresRateLimitBackend(engine)
+    raise ValueError(f"Unknown rate limit backend: {name}")
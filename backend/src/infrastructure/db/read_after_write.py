@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from src.infrastructure.db.query_budget import untracked
+
+# Read-after-write stickiness: after a client writes, its reads go to the
+# primary for sticky_seconds so it sees its own writes despite replica lag.
+# wrote() marks the client, is_sticky() asks whether the mark is still live.
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryReadAfterWrite:
+    """Marks in this process; a client's next read on another process may hit a replica"""
+
+    def __init__(self, sticky_seconds: float, max_clients: int = 100000):
+        self.sticky_seconds = sticky_seconds
+        self.max_clients = max_clients
+        self._writes: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def wrote(self, client: str) -> None:
+        with self._lock:
+            self._writes[client] = time.monotonic() + self.sticky_seconds
+            self._writes.move_to_end(client)
+            while len(self._writes) > self.max_clients:
+                self._writes.popitem(last=False)
+
+    def is_sticky(self, client: str) -> bool:
+        with self._lock:
+            until = self._writes.get(client)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._writes[client]
+                return False
+            return True
+
+
+_MARK = text("""
+    INSERT INTO read_after_write (client, sticky_until)
+    VALUES (:client, now() + make_interval(secs => :seconds))
+    ON CONFLICT (client) DO UPDATE SET sticky_until = EXCLUDED.sticky_until
+""")
+_IS_STICKY = text("SELECT EXISTS (SELECT 1 FROM read_after_write WHERE client = :client AND sticky_until > now())")
+_EXPIRE = text("DELETE FROM read_after_write WHERE sticky_until <= now()")
+
+
+class PostgresReadAfterWrite(MemoryReadAfterWrite):
+    """Marks in the read_after_write table (migration 0011), seen by every process
+
+    Marks made in this process are answered from memory; otherwise a read
+    costs one primary key lookup on the primary, made only when a healthy
+    replica could take the read. If the primary cannot be reached the
+    client counts as sticky, which is where its read was going anyway.
+    """
+
+    def __init__(self, engine: Engine, sticky_seconds: float, expire_every_seconds: float = 3600.0):
+        super().__init__(sticky_seconds)
+        self.engine = engine
+        self.expire_every_seconds = expire_every_seconds
+        self._expired_at = time.monotonic()
+
+    def wrote(self, client: str) -> None:
+        super().wrote(client)
+        try:
+            with untracked(), self.engine.begin() as conn:
+                conn.execute(_MARK, {"client": client, "seconds": self.sticky_seconds})
+                if time.monotonic() - self._expired_at > self.expire_every_seconds:
+                    self._expired_at = time.monotonic()
+                    conn.execute(_EXPIRE)
+        except Exception:
+            logger.exception("Could not share the read-after-write mark; only this process knows it")
+
+    def is_sticky(self, client: str) -> bool:
+        if super().is_sticky(client):
+            return True
+        try:
+            with untracked(), self.engine.connect() as conn:
+                return bool(conn.execute(_IS_STICKY, {"client": client}).scalar())
+        except Exception:
+            logger.exception("Could not read read-after-write marks; reading from the primary")
+            return True
+
+
+def build_read_after_write(name: str, engine: Engine, sticky_seconds: float) -> MemoryReadAfterWrite:
+    if name == "memory":
+        return MemoryReadAfterWrite(sticky_seconds)
+    if name == "postgres":
+        return PostgresReadAfterWrite(engine, sticky_seconds)
+    raise ValueError(f"Unknown read-after-write backend: {name}")
@@ -0,0 +1,162 @@
+import itertools
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+from src.infrastructure.db.query_budget import untracked
+from src.infrastructure.db.read_after_write import MemoryReadAfterWrite
+from src.infrastructure.observability.metrics import LabelValues, registry
+
+# Read replica routing. Reads go round-robin to the replicas that answered
+# the last health check within the lag limit; writes, routes marked
+# @primary_only and clients that wrote within the sticky window go to the
+# primary. With no healthy replica every read falls back to the primary.
+
+logger = logging.getLogger(__name__)
+
+ROUTED_SESSIONS = registry.counter("db_routed_sessions_total", "Request sessions by target database", ("target",))
+
+_PRIMARY_LSN = text("SELECT pg_current_wal_lsn()")
+
+# Replay lag in seconds: 0 once the replica has replayed up to the primary's
+# WAL position read just before (so an idle primary is not lag), otherwise the
+# age of the last replayed transaction, NULL if none was replayed. Comparing
+# with the primary rather than the replica's own receive position keeps a
+# replica whose WAL receiver has stopped from looking current. Without the
+# primary's position, the receive position is the best available.
+_LAG = text("""
+    SELECT CASE
+      WHEN NOT pg_is_in_recovery() THEN 0
+      WHEN pg_last_wal_replay_lsn() >= coalesce(CAST(:primary_lsn AS pg_lsn), pg_last_wal_receive_lsn()) THEN 0
+      ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+    END AS lag
+""")
+
+
+def primary_only(endpoint: Callable) -> Callable:
+    """Mark a read route that must see its own writes at once (job status, kick-offs)"""
+    endpoint.__primary_only__ = True
+    return endpoint
+
+
+@dataclass
+class Replica:
+    name: str
+    engine: Engine
+    healthy: bool = False
+    lag: Optional[float] = None
+
+
+class ReplicaRouter:
+    """Chooses the engine for a session and keeps replica health up to date
+
+    Replicas start unhealthy and join after their first check. A replica
+    that drops a connection is taken out at once rather than at the next
+    check. Read-after-write stickiness is kept by sticky (per process or
+    shared, see read_after_write.py).
+    """
+
+    def __init__(
+        self,
+        primary: Engine,
+        replicas: List[Replica],
+        max_lag_seconds: float,
+        sticky: MemoryReadAfterWrite,
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.sticky = sticky
+        self._next = itertools.count()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        for replica in replicas:
+            event.listen(replica.engine, "handle_error", self._on_error(replica))
+
+    @staticmethod
+    def _on_error(replica: Replica) -> Callable:
+        def handle_error(context) -> None:
+            if context.is_disconnect and replica.healthy:
+                replica.healthy = False
+                logger.warning("Replica %s disconnected; reading from the others until it passes a check", replica.name)
+        return handle_error
+
+    def check(self) -> None:
+        """Measure every replica's lag; healthy means reachable and within max_lag_seconds"""
+        try:
+            with untracked(), self.primary.connect() as conn:
+                primary_lsn = conn.execute(_PRIMARY_LSN).scalar()
+        except Exception:
+            logger.exception("Could not read the primary's WAL position; checking replicas against their own")
+            primary_lsn = None
+        for replica in self.replicas:
+            try:
+                with untracked(), replica.engine.connect() as conn:
+                    lag = conn.execute(_LAG, {"primary_lsn": primary_lsn}).scalar()
+            except Exception as e:
+                replica.lag = None
+                if replica.healthy:
+                    logger.warning("Replica %s failed its health check: %s", replica.name, e)
+                replica.healthy = False
+                continue
+            # Behind the primary without having replayed anything yet
+            replica.lag = float(lag) if lag is not None else float("inf")
+            healthy = replica.lag <= self.max_lag_seconds
+            if healthy != replica.healthy:
+                logger.info("Replica %s is %s (lag %.1fs)", replica.name, "healthy" if healthy else "lagging", replica.lag)
+            replica.healthy = healthy
+
+    def read_engine(self) -> Optional[Engine]:
+        """A healthy replica, or None when reads must go to the primary"""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)].engine
+
+    def wrote(self, client: str) -> None:
+        """Send the client's reads to the primary for the next sticky_seconds"""
+        if not self.replicas or self.sticky.sticky_seconds <= 0:
+            return
+        self.sticky.wrote(client)
+
+    def engine_for(self, primary: bool, client: Optional[str] = None) -> Engine:
+        """The primary when asked for or when client wrote recently, else a healthy replica"""
+        if not primary:
+            engine = self.read_engine()
+            # Stickiness is only looked up when a replica could take the read
+            if engine is not None and not (client is not None and self.sticky.is_sticky(client)):
+                ROUTED_SESSIONS.inc(("replica",))
+                return engine
+        ROUTED_SESSIONS.inc(("primary",))
+        return self.primary
+
+    def start(self, interval_seconds: float) -> None:
+        """Check now, then every interval_seconds on a daemon thread"""
+        if not self.replicas:
+            return
+        self.check()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval_seconds,), name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self, interval_seconds: float) -> None:
+        while not self._stop.wait(interval_seconds):
+            self.check()
+
+    def stats(self) -> Dict[LabelValues, float]:
+        values = {}
+        for replica in self.replicas:
+            values[(replica.name, "healthy")] = 1 if replica.healthy else 0
+            if replica.lag is not None:
+                values[(replica.name, "lag_seconds")] = replica.lag
+        return values
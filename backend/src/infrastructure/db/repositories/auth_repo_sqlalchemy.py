@@ -59,3 +59,9 @@ class SQLAlchemyUserRepository(UserRepository):
             created_at=user_model.created_at,
             updated_at=user_model.updated_at
         )
+
+    def update_password(self, user_id: UUID, hashed_password: str) -> None:
+        self.db.query(UserModel).filter(UserModel.id == user_id).update(
+            {UserModel.hashed_password: hashed_password}, synchronize_session=False
+        )
+        self.db.commit()
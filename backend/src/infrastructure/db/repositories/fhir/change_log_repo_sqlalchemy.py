@@ -0,0 +1,38 @@
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from src.domain.fhir.changes.entities import Change
+from src.domain.fhir.changes.repositories import ChangeLogRepository
+
+# Entries of transactions still running (txid >= the snapshot's xmin) are held
+# back: a transaction that started earlier can commit later, and returning
+# past it would move the cursor beyond changes that aren't visible yet.
+_LIST_SINCE = text("""
+    SELECT seq, txid::text::bigint AS txid, resource_type, resource_id, operation, changed_at
+    FROM fhir.change_log
+    WHERE (txid, seq) > (CAST(:txid AS xid8), :seq)
+      AND txid < pg_snapshot_xmin(pg_current_snapshot())
+      AND resource_type IN :resource_types
+    ORDER BY txid, seq
+    LIMIT :limit
+""").bindparams(bindparam("resource_types", expanding=True))
+_OLDEST_SEQ = text("SELECT min(seq) FROM fhir.change_log")
+
+
+class SQLAlchemyChangeLogRepository(ChangeLogRepository):
+    def __init__(self, db: Session):
+        self.db = db
+
+    def list_since(self, position: Tuple[int, int], limit: int, resource_types: Optional[Sequence[str]] = None) -> List[Change]:
+        rows = self.db.execute(_LIST_SINCE, {
+            "txid": str(position[0]),
+            "seq": position[1],
+            "resource_types": list(resource_types or ("Patient", "Encounter", "Observation")),
+            "limit": limit,
+        })
+        return [Change(**row._asdict()) for row in rows]
+
+    def oldest_seq(self) -> Optional[int]:
+        return self.db.execute(_OLDEST_SEQ).scalar()
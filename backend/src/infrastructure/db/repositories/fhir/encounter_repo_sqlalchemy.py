@@ -1,15 +1,44 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional, Sequence
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import exists, func, select
+from sqlalchemy.orm import Query, Session
 
+from src.config.settings import settings
 from src.domain.fhir.encounter.entities import Encounter, EncounterStatus
 from src.domain.fhir.encounter.repositories import EncounterRepository
+from src.domain.fhir.errors import ResourceDeleted
+from src.infrastructure.db.instrumentation import SEARCH_RESULTS
 from src.infrastructure.db.models.fhir.encounter import Encounter as EncounterModel
-from src.infrastructure.db.models.fhir.observation import (
-    Observation as ObservationModel,
-)
 from src.infrastructure.db.models.fhir.patient import Patient as PatientModel
+from src.infrastructure.db.projection import project_query, row_namespace
+from src.infrastructure.db.search_params import date_clauses
+from src.infrastructure.db.search_cache import search_changed
+from src.infrastructure.db.search_totals import cached_count, estimate_count
+from src.infrastructure.db.sorting import apply_sort
+
+
+# Entity columns behind each element the controller builds from columns
+ELEMENT_COLUMNS = {
+    "status": ("status",),
+    "class": ("class_code",),
+    "subject": ("subject_patient_id",),
+    "actualPeriod": ("period_start", "period_end"),
+    "reason": ("reason_code",),
+}
+# _sort parameter -> column, and the btree indexes that return rows in that order
+SORT_COLUMNS = {"date": "period_start", "status": "status", "_lastUpdated": "updated_at"}
+SORT_INDEXES = [
+    ("period_start", "id"),
+    ("subject_patient_id", "period_start"),
+    ("status", "period_start"),
+    ("updated_at", "id"),
+]
+
+# An encounter of a tombstoned patient counts as deleted until the purger
+# cascades the tombstone to it (one primary key probe per row)
+SUBJECT_LIVE = ~exists().where(PatientModel.id == EncounterModel.subject_patient_id, PatientModel.deleted_at.isnot(None))
+SUBJECT_DELETED_AT = select(PatientModel.deleted_at).where(PatientModel.id == EncounterModel.subject_patient_id).scalar_subquery()
 
 
 class SQLAlchemyEncounterRepository(EncounterRepository):
@@ -17,9 +46,10 @@ class SQLAlchemyEncounterRepository(EncounterRepository):
         self.db = db
 
     def get_by_id(self, encounter_id: UUID) -> Optional[Encounter]:
-        encounter_model = self.db.query(EncounterModel).filter(EncounterModel.id == encounter_id).first()
-        if not encounter_model:
+        row = self.db.query(EncounterModel, SUBJECT_DELETED_AT).filter(EncounterModel.id == encounter_id).first()
+        if not row:
             return None
+        encounter_model, subject_deleted_at = row
 
         return Encounter(
             id=encounter_model.id,
@@ -31,7 +61,8 @@ class SQLAlchemyEncounterRepository(EncounterRepository):
             reason_code=encounter_model.reason_code,
             resource=encounter_model.resource,
             created_at=encounter_model.created_at,
-            updated_at=encounter_model.updated_at
+            updated_at=encounter_model.updated_at,
+            deleted_at=encounter_model.deleted_at or subject_deleted_at
         )
 
     def create(self, encounter: Encounter) -> Encounter:
@@ -39,7 +70,7 @@ class SQLAlchemyEncounterRepository(EncounterRepository):
         if encounter.subject_patient_id:
             patient_exists = (
                 self.db.query(PatientModel)
-                .filter(PatientModel.id == encounter.subject_patient_id)
+                .filter(PatientModel.id == encounter.subject_patient_id, PatientModel.deleted_at.is_(None))
                 .first()
                 is not None
             )
@@ -56,6 +87,7 @@ class SQLAlchemyEncounterRepository(EncounterRepository):
         )
         self.db.add(encounter_model)
         self.db.commit()
+        search_changed("Encounter")
         self.db.refresh(encounter_model)
 
         return Encounter(
@@ -68,19 +100,22 @@ class SQLAlchemyEncounterRepository(EncounterRepository):
             reason_code=encounter_model.reason_code,
             resource=encounter_model.resource,
             created_at=encounter_model.created_at,
-            updated_at=encounter_model.updated_at
+            updated_at=encounter_model.updated_at,
+            deleted_at=encounter_model.deleted_at
         )
 
     def update(self, encounter: Encounter) -> Encounter:
         encounter_model = self.db.query(EncounterModel).filter(EncounterModel.id == encounter.id).first()
         if not encounter_model:
             raise ValueError("Encounter not found")
+        if encounter_model.deleted_at is not None:
+            raise ResourceDeleted("Encounter")
 
         # Validate referenced patient exists when provided
         if encounter.subject_patient_id:
             patient_exists = (
                 self.db.query(PatientModel)
-                .filter(PatientModel.id == encounter.subject_patient_id)
+                .filter(PatientModel.id == encounter.subject_patient_id, PatientModel.deleted_at.is_(None))
                 .first()
                 is not None
             )
@@ -96,6 +131,7 @@ class SQLAlchemyEncounterRepository(EncounterRepository):
         encounter_model.resource = encounter.resource
 
         self.db.commit()
+        search_changed("Encounter")
         self.db.refresh(encounter_model)
 
         return Encounter(
@@ -108,23 +144,34 @@ class SQLAlchemyEncounterRepository(EncounterRepository):
             reason_code=encounter_model.reason_code,
             resource=encounter_model.resource,
             created_at=encounter_model.created_at,
-            updated_at=encounter_model.updated_at
+            updated_at=encounter_model.updated_at,
+            deleted_at=encounter_model.deleted_at
         )
 
     def delete(self, encounter_id: UUID) -> bool:
-        encounter_model = self.db.query(EncounterModel).filter(EncounterModel.id == encounter_id).first()
-        if not encounter_model:
-            return False
-
-        # Delete dependent observations first to satisfy FK constraints
-        self.db.query(ObservationModel).filter(ObservationModel.encounter_id == encounter_id).delete(synchronize_session=False)
-        self.db.flush()
-        self.db.delete(encounter_model)
+        """Tombstone the encounter; the purger removes the row and its observations later, in small batches
+
+        Its observations disappear from reads and searches at once (they are
+        checked against the encounter) and are tombstoned by the purger.
+        Deleting an already deleted encounter succeeds again, as FHIR expects.
+        """
+        tombstoned = (
+            self.db.query(EncounterModel)
+            .filter(EncounterModel.id == encounter_id, EncounterModel.deleted_at.is_(None))
+            .update({EncounterModel.deleted_at: func.now(), EncounterModel.updated_at: func.now()}, synchronize_session=False)
+        )
         self.db.commit()
-        return True
-
-    def search(self, status: Optional[str] = None, subject: Optional[UUID] = None, date: Optional[str] = None) -> List[Encounter]:
+        if tombstoned:
+            search_changed("Encounter")
+            search_changed("Observation")
+            return True
+        return self.db.query(EncounterModel.id).filter(EncounterModel.id == encounter_id).first() is not None
+
+    def search_query(self, status: Optional[str] = None, subject: Optional[UUID] = None, date: Optional[str] = None, last_updated: Optional[Sequence[str]] = None) -> Query:
+        """Build the search query; shared by search() and the plan checks"""
         query = self.db.query(EncounterModel)
+        # Tombstones are excluded; the search indexes are partial on this predicate
+        query = query.filter(EncounterModel.deleted_at.is_(None), SUBJECT_LIVE)
 
         if status:
             query = query.filter(EncounterModel.status == status)
@@ -135,20 +182,70 @@ class SQLAlchemyEncounterRepository(EncounterRepository):
         if date:
             query = query.filter(EncounterModel.period_start >= date)
 
-        encounter_models = query.all()
+        # _lastUpdated=ge...&_lastUpdated=lt..., served by the (updated_at, id) index
+        query = query.filter(*date_clauses(EncounterModel.updated_at, last_updated, "_lastUpdated"))
 
-        return [
-            Encounter(
-                id=em.id,
-                status=EncounterStatus(em.status) if em.status else None,
-                class_code=em.class_code,
-                subject_patient_id=em.subject_patient_id,
-                period_start=em.period_start,
-                period_end=em.period_end,
-                reason_code=em.reason_code,
-                resource=em.resource,
-                created_at=em.created_at,
-                updated_at=em.updated_at
-            )
-            for em in encounter_models
-        ]
+        return query
+
+    @staticmethod
+    def _to_entity(em: EncounterModel) -> Encounter:
+        return Encounter(
+            id=em.id,
+            status=EncounterStatus(em.status) if em.status else None,
+            class_code=em.class_code,
+            subject_patient_id=em.subject_patient_id,
+            period_start=em.period_start,
+            period_end=em.period_end,
+            reason_code=em.reason_code,
+            resource=em.resource,
+            created_at=em.created_at,
+            updated_at=em.updated_at,
+            deleted_at=em.deleted_at
+        )
+
+    def search(self, status: Optional[str] = None, subject: Optional[UUID] = None, date: Optional[str] = None, last_updated: Optional[Sequence[str]] = None) -> List[Encounter]:
+        query = self.search_query(status=status, subject=subject, date=date, last_updated=last_updated)
+        encounter_models = query.all()
+        SEARCH_RESULTS.observe(len(encounter_models), ("Encounter",))
+
+        return [self._to_entity(em) for em in encounter_models]
+
+    def get_by_ids(self, encounter_ids: Sequence[UUID]) -> List[Encounter]:
+        if not encounter_ids:
+            return []
+        return [self._to_entity(em) for em in self.db.query(EncounterModel).filter(EncounterModel.id.in_(encounter_ids), EncounterModel.deleted_at.is_(None), SUBJECT_LIVE)]
+
+    def count(self, status: Optional[str] = None, subject: Optional[UUID] = None, date: Optional[str] = None, last_updated: Optional[Sequence[str]] = None) -> int:
+        # Cached briefly per normalized query so paging doesn't re-count every page
+        return cached_count("Encounter", dict(status=status, subject=subject, date=date, last_updated=last_updated), self.search_query(status=status, subject=subject, date=date, last_updated=last_updated))
+
+    def estimate_count(self, status: Optional[str] = None, subject: Optional[UUID] = None, date: Optional[str] = None, last_updated: Optional[Sequence[str]] = None) -> int:
+        return estimate_count(self.search_query(status=status, subject=subject, date=date, last_updated=last_updated))
+
+    def ordered_query(self, status: Optional[str] = None, subject: Optional[UUID] = None, date: Optional[str] = None, last_updated: Optional[Sequence[str]] = None, sort: Optional[Sequence[str]] = None, limit: Optional[int] = None) -> Query:
+        """search_query() with _sort ordering (id tie-breaker) and a _count limit"""
+        query = self.search_query(status=status, subject=subject, date=date, last_updated=last_updated)
+        equality = [column for column, value in (("status", status), ("subject_patient_id", subject)) if value]
+        return apply_sort(query, EncounterModel, "Encounter", sort, limit, SORT_COLUMNS, SORT_INDEXES, equality)
+
+    def iter_search(self, status: Optional[str] = None, subject: Optional[UUID] = None, date: Optional[str] = None, last_updated: Optional[Sequence[str]] = None, sort: Optional[Sequence[str]] = None, limit: Optional[int] = None, elements: Optional[Sequence[str]] = None, batch_size: int = settings.SEARCH_STREAM_BATCH_SIZE) -> Iterator[Encounter]:
+        """Stream matches through a server-side cursor, batch_size rows at a time
+
+        With elements, only the columns behind those elements are selected and
+        the returned entities leave the other fields as None.
+        """
+        query = self.ordered_query(status=status, subject=subject, date=date, last_updated=last_updated, sort=sort, limit=limit)
+        if elements is not None:
+            query = project_query(query, EncounterModel, elements, ELEMENT_COLUMNS)
+        # Executed rather than iterated as a Query so the server-side cursor is
+        # closed here, while the session's transaction is still open, even when
+        # the consumer stops early or fails mid-stream
+        result = self.db.execute(query.statement, execution_options={"yield_per": batch_size})
+        rows = 0
+        try:
+            for row in (result.scalars() if elements is None else result):
+                rows += 1
+                yield self._to_entity(row if elements is None else row_namespace(row, EncounterModel))
+        finally:
+            result.close()
+            SEARCH_RESULTS.observe(rows, ("Encounter",))
@@ -1,25 +1,80 @@
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Sequence
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.orm import Query, Session
 
+from src.config.settings import settings
+from src.domain.fhir.errors import ResourceDeleted
 from src.domain.fhir.observation.entities import Observation, ObservationStatus
 from src.domain.fhir.observation.repositories import ObservationRepository
+from src.infrastructure.db.instrumentation import SEARCH_RESULTS
 from src.infrastructure.db.models.fhir.encounter import Encounter as EncounterModel
 from src.infrastructure.db.models.fhir.observation import (
     Observation as ObservationModel,
 )
 from src.infrastructure.db.models.fhir.patient import Patient as PatientModel
+from src.infrastructure.db.projection import project_query, row_namespace
+from src.infrastructure.db.search_params import date_clauses
+from src.infrastructure.db.search_cache import search_changed
+from src.infrastructure.db.search_totals import cached_count, estimate_count
+from src.infrastructure.db.sorting import apply_sort
+
+
+# Search results are built from columns only, so a projection never reads
+# the resource document
+ELEMENT_COLUMNS = {
+    "status": ("status",),
+    "code": ("code_code",),
+    "subject": ("subject_patient_id",),
+    "encounter": ("encounter_id",),
+    "effectiveDateTime": ("effective_datetime",),
+    "valueQuantity": ("value_quantity_value", "value_quantity_unit"),
+    "valueString": ("value_string",),
+}
+# _sort parameter -> column, and the btree indexes that return rows in that order.
+# status is sortable but unindexed: it is logged, or rejected in strict mode.
+SORT_COLUMNS = {"date": "effective_datetime", "code": "code_code", "status": "status", "_lastUpdated": "updated_at"}
+SORT_INDEXES = [
+    ("effective_datetime", "id"),
+    ("subject_patient_id", "code_code", "effective_datetime"),
+    ("subject_patient_id", "effective_datetime"),
+    ("code_code", "effective_datetime"),
+    ("updated_at", "id"),
+]
+
+# An observation of a tombstoned encounter or patient counts as deleted until
+# the purger cascades the tombstone to it (primary key probes per row)
+PARENTS_LIVE = and_(
+    ~exists().where(EncounterModel.id == ObservationModel.encounter_id, EncounterModel.deleted_at.isnot(None)),
+    ~exists().where(PatientModel.id == ObservationModel.subject_patient_id, PatientModel.deleted_at.isnot(None)),
+)
+PARENT_DELETED_AT = func.coalesce(
+    select(EncounterModel.deleted_at).where(EncounterModel.id == ObservationModel.encounter_id).scalar_subquery(),
+    select(PatientModel.deleted_at).where(PatientModel.id == ObservationModel.subject_patient_id).scalar_subquery(),
+)
 
 
 class SQLAlchemyObservationRepository(ObservationRepository):
     def __init__(self, db: Session):
         self.db = db
 
+    @staticmethod
+    def _partition_key(observation: Observation, stored: Optional[datetime] = None) -> datetime:
+        """effective_datetime is the partition key; without one keep the stored key, or use receipt time
+
+        Months without a partition go to the default partition until
+        scripts/manage_partitions.py splits them out; creating partitions
+        here would deadlock against this session's own reads.
+        """
+        return observation.effective_datetime or stored or datetime.now(timezone.utc)
+
     def get_by_id(self, observation_id: UUID) -> Optional[Observation]:
-        observation_model = self.db.query(ObservationModel).filter(ObservationModel.id == observation_id).first()
-        if not observation_model:
+        row = self.db.query(ObservationModel, PARENT_DELETED_AT).filter(ObservationModel.id == observation_id).first()
+        if not row:
             return None
+        observation_model, parent_deleted_at = row
 
         return Observation(
             id=observation_model.id,
@@ -33,7 +88,8 @@ class SQLAlchemyObservationRepository(ObservationRepository):
             value_string=observation_model.value_string,
             resource=observation_model.resource,
             created_at=observation_model.created_at,
-            updated_at=observation_model.updated_at
+            updated_at=observation_model.updated_at,
+            deleted_at=observation_model.deleted_at or parent_deleted_at
         )
 
     def create(self, observation: Observation) -> Observation:
@@ -41,7 +97,7 @@ class SQLAlchemyObservationRepository(ObservationRepository):
         if observation.subject_patient_id:
             patient_exists = (
                 self.db.query(PatientModel)
-                .filter(PatientModel.id == observation.subject_patient_id)
+                .filter(PatientModel.id == observation.subject_patient_id, PatientModel.deleted_at.is_(None))
                 .first()
                 is not None
             )
@@ -52,7 +108,7 @@ class SQLAlchemyObservationRepository(ObservationRepository):
         if observation.encounter_id:
             encounter_exists = (
                 self.db.query(EncounterModel)
-                .filter(EncounterModel.id == observation.encounter_id)
+                .filter(EncounterModel.id == observation.encounter_id, EncounterModel.deleted_at.is_(None))
                 .first()
                 is not None
             )
@@ -63,7 +119,7 @@ class SQLAlchemyObservationRepository(ObservationRepository):
             code_code=observation.code_code,
             subject_patient_id=observation.subject_patient_id,
             encounter_id=observation.encounter_id,
-            effective_datetime=observation.effective_datetime,
+            effective_datetime=self._partition_key(observation),
             value_quantity_value=observation.value_quantity_value,
             value_quantity_unit=observation.value_quantity_unit,
             value_string=observation.value_string,
@@ -71,6 +127,7 @@ class SQLAlchemyObservationRepository(ObservationRepository):
         )
         self.db.add(observation_model)
         self.db.commit()
+        search_changed("Observation")
         self.db.refresh(observation_model)
 
         return Observation(
@@ -85,19 +142,22 @@ class SQLAlchemyObservationRepository(ObservationRepository):
             value_string=observation_model.value_string,
             resource=observation_model.resource,
             created_at=observation_model.created_at,
-            updated_at=observation_model.updated_at
+            updated_at=observation_model.updated_at,
+            deleted_at=observation_model.deleted_at
         )
 
     def update(self, observation: Observation) -> Observation:
         observation_model = self.db.query(ObservationModel).filter(ObservationModel.id == observation.id).first()
         if not observation_model:
             raise ValueError("Observation not found")
+        if observation_model.deleted_at is not None:
+            raise ResourceDeleted("Observation")
 
         # Validate referenced Patient exists
         if observation.subject_patient_id:
             patient_exists = (
                 self.db.query(PatientModel)
-                .filter(PatientModel.id == observation.subject_patient_id)
+                .filter(PatientModel.id == observation.subject_patient_id, PatientModel.deleted_at.is_(None))
                 .first()
                 is not None
             )
@@ -108,7 +168,7 @@ class SQLAlchemyObservationRepository(ObservationRepository):
         if observation.encounter_id:
             encounter_exists = (
                 self.db.query(EncounterModel)
-                .filter(EncounterModel.id == observation.encounter_id)
+                .filter(EncounterModel.id == observation.encounter_id, EncounterModel.deleted_at.is_(None))
                 .first()
                 is not None
             )
@@ -119,13 +179,14 @@ class SQLAlchemyObservationRepository(ObservationRepository):
         observation_model.code_code = observation.code_code
         observation_model.subject_patient_id = observation.subject_patient_id
         observation_model.encounter_id = observation.encounter_id
-        observation_model.effective_datetime = observation.effective_datetime
+        observation_model.effective_datetime = self._partition_key(observation, observation_model.effective_datetime)
         observation_model.value_quantity_value = observation.value_quantity_value
         observation_model.value_quantity_unit = observation.value_quantity_unit
         observation_model.value_string = observation.value_string
         observation_model.resource = observation.resource
 
         self.db.commit()
+        search_changed("Observation")
         self.db.refresh(observation_model)
 
         return Observation(
@@ -140,20 +201,31 @@ class SQLAlchemyObservationRepository(ObservationRepository):
             value_string=observation_model.value_string,
             resource=observation_model.resource,
             created_at=observation_model.created_at,
-            updated_at=observation_model.updated_at
+            updated_at=observation_model.updated_at,
+            deleted_at=observation_model.deleted_at
         )
 
     def delete(self, observation_id: UUID) -> bool:
-        observation_model = self.db.query(ObservationModel).filter(ObservationModel.id == observation_id).first()
-        if not observation_model:
-            return False
+        """Tombstone the observation; the purger removes the row later, in small batches
 
-        self.db.delete(observation_model)
+        Deleting an already deleted observation succeeds again, as FHIR expects.
+        """
+        tombstoned = (
+            self.db.query(ObservationModel)
+            .filter(ObservationModel.id == observation_id, ObservationModel.deleted_at.is_(None))
+            .update({ObservationModel.deleted_at: func.now(), ObservationModel.updated_at: func.now()}, synchronize_session=False)
+        )
         self.db.commit()
-        return True
+        if tombstoned:
+            search_changed("Observation")
+            return True
+        return self.db.query(ObservationModel.id).filter(ObservationModel.id == observation_id).first() is not None
 
-    def search(self, code: Optional[str] = None, date: Optional[str] = None, subject: Optional[UUID] = None) -> List[Observation]:
+    def search_query(self, code: Optional[str] = None, date: Optional[str] = None, subject: Optional[UUID] = None, last_updated: Optional[Sequence[str]] = None) -> Query:
+        """Build the search query; shared by search() and the plan checks"""
         query = self.db.query(ObservationModel)
+        # Tombstones are excluded; the search indexes are partial on this predicate
+        query = query.filter(ObservationModel.deleted_at.is_(None), PARENTS_LIVE)
 
         if code:
             query = query.filter(ObservationModel.code_code == code)
@@ -164,22 +236,72 @@ class SQLAlchemyObservationRepository(ObservationRepository):
         if date:
             query = query.filter(ObservationModel.effective_datetime >= date)
 
+        # _lastUpdated=ge...&_lastUpdated=lt..., served by the (updated_at, id) index
+        query = query.filter(*date_clauses(ObservationModel.updated_at, last_updated, "_lastUpdated"))
+
+        return query
+
+    @staticmethod
+    def _to_entity(om: ObservationModel) -> Observation:
+        return Observation(
+            id=om.id,
+            status=ObservationStatus(om.status) if om.status else None,
+            code_code=om.code_code,
+            subject_patient_id=om.subject_patient_id,
+            encounter_id=om.encounter_id,
+            effective_datetime=om.effective_datetime,
+            value_quantity_value=float(om.value_quantity_value) if om.value_quantity_value else None,
+            value_quantity_unit=om.value_quantity_unit,
+            value_string=om.value_string,
+            resource=om.resource,
+            created_at=om.created_at,
+            updated_at=om.updated_at,
+            deleted_at=om.deleted_at
+        )
+
+    def search(self, code: Optional[str] = None, date: Optional[str] = None, subject: Optional[UUID] = None, last_updated: Optional[Sequence[str]] = None) -> List[Observation]:
+        query = self.search_query(code=code, date=date, subject=subject, last_updated=last_updated)
         observation_models = query.all()
+        SEARCH_RESULTS.observe(len(observation_models), ("Observation",))
 
-        return [
-            Observation(
-                id=om.id,
-                status=ObservationStatus(om.status) if om.status else None,
-                code_code=om.code_code,
-                subject_patient_id=om.subject_patient_id,
-                encounter_id=om.encounter_id,
-                effective_datetime=om.effective_datetime,
-                value_quantity_value=float(om.value_quantity_value) if om.value_quantity_value else None,
-                value_quantity_unit=om.value_quantity_unit,
-                value_string=om.value_string,
-                resource=om.resource,
-                created_at=om.created_at,
-                updated_at=om.updated_at
-            )
-            for om in observation_models
-        ]
+        return [self._to_entity(om) for om in observation_models]
+
+    def get_by_ids(self, observation_ids: Sequence[UUID]) -> List[Observation]:
+        if not observation_ids:
+            return []
+        return [self._to_entity(om) for om in self.db.query(ObservationModel).filter(ObservationModel.id.in_(observation_ids), ObservationModel.deleted_at.is_(None), PARENTS_LIVE)]
+
+    def count(self, code: Optional[str] = None, date: Optional[str] = None, subject: Optional[UUID] = None, last_updated: Optional[Sequence[str]] = None) -> int:
+        # Cached briefly per normalized query so paging doesn't re-count every page
+        return cached_count("Observation", dict(code=code, date=date, subject=subject, last_updated=last_updated), self.search_query(code=code, date=date, subject=subject, last_updated=last_updated))
+
+    def estimate_count(self, code: Optional[str] = None, date: Optional[str] = None, subject: Optional[UUID] = None, last_updated: Optional[Sequence[str]] = None) -> int:
+        return estimate_count(self.search_query(code=code, date=date, subject=subject, last_updated=last_updated))
+
+    def ordered_query(self, code: Optional[str] = None, date: Optional[str] = None, subject: Optional[UUID] = None, last_updated: Optional[Sequence[str]] = None, sort: Optional[Sequence[str]] = None, limit: Optional[int] = None) -> Query:
+        """search_query() with _sort ordering (id tie-breaker) and a _count limit"""
+        query = self.search_query(code=code, date=date, subject=subject, last_updated=last_updated)
+        equality = [column for column, value in (("code_code", code), ("subject_patient_id", subject)) if value]
+        return apply_sort(query, ObservationModel, "Observation", sort, limit, SORT_COLUMNS, SORT_INDEXES, equality)
+
+    def iter_search(self, code: Optional[str] = None, date: Optional[str] = None, subject: Optional[UUID] = None, last_updated: Optional[Sequence[str]] = None, sort: Optional[Sequence[str]] = None, limit: Optional[int] = None, elements: Optional[Sequence[str]] = None, batch_size: int = settings.SEARCH_STREAM_BATCH_SIZE) -> Iterator[Observation]:
+        """Stream matches through a server-side cursor, batch_size rows at a time
+
+        With elements, only the columns behind those elements are selected and
+        the returned entities leave the other fields as None.
+        """
+        query = self.ordered_query(code=code, date=date, subject=subject, last_updated=last_updated, sort=sort, limit=limit)
+        if elements is not None:
+            query = project_query(query, ObservationModel, elements, ELEMENT_COLUMNS, resource_keys=False)
+        # Executed rather than iterated as a Query so the server-side cursor is
+        # closed here, while the session's transaction is still open, even when
+        # the consumer stops early or fails mid-stream
+        result = self.db.execute(query.statement, execution_options={"yield_per": batch_size})
+        rows = 0
+        try:
+            for row in (result.scalars() if elements is None else result):
+                rows += 1
+                yield self._to_entity(row if elements is None else row_namespace(row, ObservationModel))
+        finally:
+            result.close()
+            SEARCH_RESULTS.observe(rows, ("Observation",))
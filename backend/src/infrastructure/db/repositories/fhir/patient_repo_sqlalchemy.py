@@ -1,11 +1,32 @@
-from typing import List, Optional
+from typing import Iterator, List, Optional, Sequence
 from uuid import UUID
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
 
+from src.config.settings import settings
+from src.domain.fhir.errors import ResourceDeleted
 from src.domain.fhir.patient.entities import Gender, Patient
 from src.domain.fhir.patient.repositories import PatientRepository
+from src.infrastructure.db.instrumentation import SEARCH_RESULTS
 from src.infrastructure.db.models.fhir.patient import Patient as PatientModel
+from src.infrastructure.db.projection import project_query, row_namespace
+from src.infrastructure.db.search_params import date_clauses
+from src.infrastructure.db.search_cache import search_changed
+from src.infrastructure.db.search_totals import cached_count, estimate_count
+from src.infrastructure.db.sorting import apply_sort
+
+
+# Entity columns behind each element the controller builds from columns
+ELEMENT_COLUMNS = {
+    "identifier": ("identifier_value",),
+    "name": ("name_family", "name_given"),
+    "gender": ("gender",),
+    "birthDate": ("birth_date",),
+}
+# _sort parameter -> column, and the btree indexes that return rows in that order
+SORT_COLUMNS = {"family": "name_family", "_lastUpdated": "updated_at"}
+SORT_INDEXES = [("name_family", "id"), ("updated_at", "id")]
 
 
 class SQLAlchemyPatientRepository(PatientRepository):
@@ -26,7 +47,8 @@ class SQLAlchemyPatientRepository(PatientRepository):
             birth_date=patient_model.birth_date,
             resource=patient_model.resource,
             created_at=patient_model.created_at,
-            updated_at=patient_model.updated_at
+            updated_at=patient_model.updated_at,
+            deleted_at=patient_model.deleted_at
         )
 
     def create(self, patient: Patient) -> Patient:
@@ -40,6 +62,7 @@ class SQLAlchemyPatientRepository(PatientRepository):
         patient_model.resource = patient.resource
         self.db.add(patient_model)
         self.db.commit()
+        search_changed("Patient")
         self.db.refresh(patient_model)
 
         return Patient(
@@ -51,13 +74,16 @@ class SQLAlchemyPatientRepository(PatientRepository):
             birth_date=patient_model.birth_date,
             resource=patient_model.resource,
             created_at=patient_model.created_at,
-            updated_at=patient_model.updated_at
+            updated_at=patient_model.updated_at,
+            deleted_at=patient_model.deleted_at
         )
 
     def update(self, patient: Patient) -> Patient:
         patient_model = self.db.query(PatientModel).filter(PatientModel.id == patient.id).first()
         if not patient_model:
             raise ValueError("Patient not found")
+        if patient_model.deleted_at is not None:
+            raise ResourceDeleted("Patient")
 
         patient_model.identifier_value = patient.identifier_value
         patient_model.name_family = patient.name_family
@@ -67,6 +93,7 @@ class SQLAlchemyPatientRepository(PatientRepository):
         patient_model.resource = patient.resource
 
         self.db.commit()
+        search_changed("Patient")
         self.db.refresh(patient_model)
 
         return Patient(
@@ -78,20 +105,35 @@ class SQLAlchemyPatientRepository(PatientRepository):
             birth_date=patient_model.birth_date,
             resource=patient_model.resource,
             created_at=patient_model.created_at,
-            updated_at=patient_model.updated_at
+            updated_at=patient_model.updated_at,
+            deleted_at=patient_model.deleted_at
         )
 
     def delete(self, patient_id: UUID) -> bool:
-        patient_model = self.db.query(PatientModel).filter(PatientModel.id == patient_id).first()
-        if not patient_model:
-            return False
-
-        self.db.delete(patient_model)
+        """Tombstone the patient; the purger removes the row and its encounters and observations later
+
+        Its encounters and observations disappear from reads and searches at
+        once (they are checked against the patient) and are tombstoned by the
+        purger. Deleting an already deleted patient succeeds again, as FHIR expects.
+        """
+        tombstoned = (
+            self.db.query(PatientModel)
+            .filter(PatientModel.id == patient_id, PatientModel.deleted_at.is_(None))
+            .update({PatientModel.deleted_at: func.now(), PatientModel.updated_at: func.now()}, synchronize_session=False)
+        )
         self.db.commit()
-        return True
-
-    def search(self, name: Optional[str] = None, identifier: Optional[str] = None) -> List[Patient]:
+        if tombstoned:
+            search_changed("Patient")
+            search_changed("Encounter")
+            search_changed("Observation")
+            return True
+        return self.db.query(PatientModel.id).filter(PatientModel.id == patient_id).first() is not None
+
+    def search_query(self, name: Optional[str] = None, identifier: Optional[str] = None, last_updated: Optional[Sequence[str]] = None) -> Query:
+        """Build the search query; shared by search() and the plan checks"""
         query = self.db.query(PatientModel)
+        # Tombstones are excluded; the search indexes are partial on this predicate
+        query = query.filter(PatientModel.deleted_at.is_(None))
 
         if name:
             query = query.filter(
@@ -102,19 +144,69 @@ class SQLAlchemyPatientRepository(PatientRepository):
         if identifier:
             query = query.filter(PatientModel.identifier_value.ilike(f"%{identifier}%"))
 
-        patient_models = query.all()
+        # _lastUpdated=ge...&_lastUpdated=lt..., served by the (updated_at, id) index
+        query = query.filter(*date_clauses(PatientModel.updated_at, last_updated, "_lastUpdated"))
 
-        return [
-            Patient(
-                id=pm.id,
-                identifier_value=pm.identifier_value,
-                name_family=pm.name_family,
-                name_given=pm.name_given,
-                gender=Gender(pm.gender) if pm.gender else None,
-                birth_date=pm.birth_date,
-                resource=pm.resource,
-                created_at=pm.created_at,
-                updated_at=pm.updated_at
-            )
-            for pm in patient_models
-        ]
+        return query
+
+    @staticmethod
+    def _to_entity(pm: PatientModel) -> Patient:
+        return Patient(
+            id=pm.id,
+            identifier_value=pm.identifier_value,
+            name_family=pm.name_family,
+            name_given=pm.name_given,
+            gender=Gender(pm.gender) if pm.gender else None,
+            birth_date=pm.birth_date,
+            resource=pm.resource,
+            created_at=pm.created_at,
+            updated_at=pm.updated_at,
+            deleted_at=pm.deleted_at
+        )
+
+    def search(self, name: Optional[str] = None, identifier: Optional[str] = None, last_updated: Optional[Sequence[str]] = None) -> List[Patient]:
+        query = self.search_query(name=name, identifier=identifier, last_updated=last_updated)
+        patient_models = query.all()
+        SEARCH_RESULTS.observe(len(patient_models), ("Patient",))
+
+        return [self._to_entity(pm) for pm in patient_models]
+
+    def get_by_ids(self, patient_ids: Sequence[UUID]) -> List[Patient]:
+        if not patient_ids:
+            return []
+        return [self._to_entity(pm) for pm in self.db.query(PatientModel).filter(PatientModel.id.in_(patient_ids), PatientModel.deleted_at.is_(None))]
+
+    def count(self, name: Optional[str] = None, identifier: Optional[str] = None, last_updated: Optional[Sequence[str]] = None) -> int:
+        # Cached briefly per normalized query so paging doesn't re-count every page
+        return cached_count("Patient", dict(name=name, identifier=identifier, last_updated=last_updated), self.search_query(name=name, identifier=identifier, last_updated=last_updated))
+
+    def estimate_count(self, name: Optional[str] = None, identifier: Optional[str] = None, last_updated: Optional[Sequence[str]] = None) -> int:
+        return estimate_count(self.search_query(name=name, identifier=identifier, last_updated=last_updated))
+
+    def ordered_query(self, name: Optional[str] = None, identifier: Optional[str] = None, last_updated: Optional[Sequence[str]] = None, sort: Optional[Sequence[str]] = None, limit: Optional[int] = None) -> Query:
+        """search_query() with _sort ordering (id tie-breaker) and a _count limit"""
+        query = self.search_query(name=name, identifier=identifier, last_updated=last_updated)
+        # name/identifier are substring matches, so no index column is fixed by a filter
+        return apply_sort(query, PatientModel, "Patient", sort, limit, SORT_COLUMNS, SORT_INDEXES)
+
+    def iter_search(self, name: Optional[str] = None, identifier: Optional[str] = None, last_updated: Optional[Sequence[str]] = None, sort: Optional[Sequence[str]] = None, limit: Optional[int] = None, elements: Optional[Sequence[str]] = None, batch_size: int = settings.SEARCH_STREAM_BATCH_SIZE) -> Iterator[Patient]:
+        """Stream matches through a server-side cursor, batch_size rows at a time
+
+        With elements, only the columns behind those elements are selected and
+        the returned entities leave the other fields as None.
+        """
+        query = self.ordered_query(name=name, identifier=identifier, last_updated=last_updated, sort=sort, limit=limit)
+        if elements is not None:
+            query = project_query(query, PatientModel, elements, ELEMENT_COLUMNS)
+        # Executed rather than iterated as a Query so the server-side cursor is
+        # closed here, while the session's transaction is still open, even when
+        # the consumer stops early or fails mid-stream
+        result = self.db.execute(query.statement, execution_options={"yield_per": batch_size})
+        rows = 0
+        try:
+            for row in (result.scalars() if elements is None else result):
+                rows += 1
+                yield self._to_entity(row if elements is None else row_namespace(row, PatientModel))
+        finally:
+            result.close()
+            SEARCH_RESULTS.observe(rows, ("Patient",))
@@ -0,0 +1,61 @@
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from src.config.settings import settings
+from src.domain.jobs.entities import Job, JobStatus
+from src.domain.jobs.repositories import JobRepository
+from src.infrastructure.db.models.job import Job as JobModel
+
+
+class SQLAlchemyJobRepository(JobRepository):
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _to_entity(jm: JobModel) -> Job:
+        return Job(
+            id=jm.id,
+            kind=jm.kind,
+            params=jm.params or {},
+            status=JobStatus(jm.status),
+            owner_id=jm.owner_id,
+            attempts=jm.attempts,
+            max_attempts=jm.max_attempts,
+            progress=jm.progress,
+            progress_message=jm.progress_message,
+            result=jm.result,
+            error=jm.error,
+            cancel_requested=jm.cancel_requested,
+            created_at=jm.created_at,
+            started_at=jm.started_at,
+            finished_at=jm.finished_at
+        )
+
+    def enqueue(self, kind: str, params: Dict[str, Any], owner_id: Optional[UUID]) -> Job:
+        job_model = JobModel(kind=kind, params=params, owner_id=owner_id, max_attempts=settings.JOB_MAX_ATTEMPTS)
+        self.db.add(job_model)
+        self.db.commit()
+        self.db.refresh(job_model)
+        return self._to_entity(job_model)
+
+    def get_by_id(self, job_id: UUID) -> Optional[Job]:
+        job_model = self.db.query(JobModel).filter(JobModel.id == job_id).first()
+        return self._to_entity(job_model) if job_model else None
+
+    def request_cancel(self, job_id: UUID) -> Optional[Job]:
+        # The runner owns running jobs: it sees the flag at the next progress report
+        running = JobModel.status == JobStatus.RUNNING.value
+        updated = (
+            self.db.query(JobModel)
+            .filter(JobModel.id == job_id)
+            .update({
+                JobModel.cancel_requested: True,
+                JobModel.status: case((running, JobModel.status), else_=JobStatus.CANCELLED.value),
+                JobModel.finished_at: case((running, JobModel.finished_at), else_=func.coalesce(JobModel.finished_at, func.now())),
+            }, synchronize_session=False)
+        )
+        self.db.commit()
+        return self.get_by_id(job_id) if updated else None
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import ProgrammingError
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+def expected_revision() -> str:
+    """Head revision of the migrations shipped with this build"""
+    # Imported here so alembic is only loaded when the check actually runs
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+def check_schema_revision(engine: Engine) -> str:
+    """Fail fast unless the database is migrated to this build's head (one query)"""
+    expected = expected_revision()
+    try:
+        with engine.connect() as conn:
+            current = conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except ProgrammingError:
+        current = None
+
+    if current != expected:
+        raise SchemaVersionError(
+            f"Database schema is at revision {current or 'none'}, expected {expected}; "
+            "run `alembic upgrade head`"
+        )
+    return current
@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from src.config.settings import settings
+from src.infrastructure.db.search_totals import count_cache
+from src.infrastructure.observability.metrics import registry
+
+# Encoded search pages (the response body as sent) per normalized query and
+# principal role. Every resource type has a generation counter that writes in
+# this process bump; a page stored under an older generation is a miss, so
+# invalidating a type costs one increment however many pages it has cached.
+# Writes made by other processes are bounded by the TTL.
+
+SEARCH_CACHE_REQUESTS = registry.counter(
+    "fhir_search_cache_requests_total", "Search page cache lookups", ("resource", "result")
+)
+
+SearchKey = Tuple[Hashable, ...]
+
+
+def search_key(resource_type: str, role: str, media_type: str, params: Dict[str, Any], target: str = "primary") -> SearchKey:
+    """Normalized cache key: parameter order and unset parameters do not matter
+
+    target is the database the page is read from ("primary" or "replica"),
+    so a client reading its own writes from the primary never gets a page
+    read from a lagging replica.
+    """
+    return (resource_type, role, media_type, target, *sorted((name, str(value)) for name, value in params.items() if value is not None))
+
+
+@dataclass
+class CachedPage:
+    body: bytes
+    media_type: str
+    generation: int
+    expires_at: float
+
+
+class SearchCache:
+    """LRU of encoded search pages, bounded by total body bytes"""
+
+    def __init__(self, ttl_seconds: float, max_bytes: int, max_entry_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: "OrderedDict[SearchKey, CachedPage]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_bytes > 0
+
+    def generation(self, resource_type: str) -> int:
+        return self._generations.get(resource_type, 0)
+
+    def bump(self, resource_type: str) -> None:
+        """Make every cached page of a resource type stale"""
+        with self._lock:
+            self._generations[resource_type] = self._generations.get(resource_type, 0) + 1
+
+    def get(self, key: SearchKey) -> Optional[CachedPage]:
+        now = time.monotonic()
+        with self._lock:
+            page = self._entries.get(key)
+            if page is not None and (page.expires_at <= now or page.generation != self.generation(key[0])):
+                self._remove(key)
+                page = None
+            if page is not None:
+                self._entries.move_to_end(key)
+        SEARCH_CACHE_REQUESTS.inc((key[0], "hit" if page is not None else "miss"))
+        return page
+
+    def set(self, key: SearchKey, generation: int, body: bytes, media_type: str) -> None:
+        """Store a page built from data read at generation; dropped if a write came in since"""
+        if not self.enabled or len(body) > self.max_entry_bytes:
+            return
+        with self._lock:
+            if generation != self.generation(key[0]):
+                return
+            self._remove(key)
+            self._entries[key] = CachedPage(body, media_type, generation, time.monotonic() + self.ttl_seconds)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: SearchKey) -> None:
+        page = self._entries.pop(key, None)
+        if page is not None:
+            self._size -= len(page.body)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "evictions": self.evictions}
+
+
+search_cache = SearchCache(settings.SEARCH_CACHE_SECONDS, settings.SEARCH_CACHE_MAX_BYTES, settings.SEARCH_CACHE_MAX_ENTRY_BYTES)
+
+
+def search_changed(resource_type: str) -> None:
+    """After a write: drop cached counts and pages of the resource type"""
+    count_cache.invalidate(resource_type)
+    search_cache.bump(resource_type)
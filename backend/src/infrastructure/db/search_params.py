@@ -0,0 +1,57 @@
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import Column
+from sqlalchemy.sql.elements import ColumnElement
+
+# FHIR date search values: an optional comparator prefix and a date of
+# year, month, day or full instant precision (e.g. _lastUpdated=ge2024-01-01).
+# A partial date stands for the whole period it names.
+
+_DATE_VALUE = re.compile(r"^(eq|gt|ge|lt|le)?(\d{4}(?:-\d{2}(?:-\d{2}(?:T.+)?)?)?)$")
+
+
+def _period(value: str) -> Tuple[datetime, Optional[datetime]]:
+    """[start, end) of a partial date, or (instant, None) for a full date-time"""
+    if "T" in value:
+        instant = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        return (instant if instant.tzinfo else instant.replace(tzinfo=timezone.utc)), None
+    parts = [int(part) for part in value.split("-")]
+    start = datetime(parts[0], parts[1] if len(parts) > 1 else 1, parts[2] if len(parts) > 2 else 1, tzinfo=timezone.utc)
+    if len(parts) == 3:
+        end = start + timedelta(days=1)
+    elif len(parts) == 2:
+        end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+    else:
+        end = start.replace(year=start.year + 1)
+    return start, end
+
+def date_clauses(column: Column, values: Optional[Sequence[str]], name: str) -> List[ColumnElement]:
+    """WHERE clauses for repeated date parameters (ANDed, as FHIR specifies)
+
+    Raises ValueError for values that aren't a supported prefix + date.
+    """
+    clauses = []
+    for value in values or ():
+        match = _DATE_VALUE.match(value.strip())
+        try:
+            start, end = _period(match.group(2)) if match else (None, None)
+        except ValueError:
+            start = None
+        if start is None:
+            raise ValueError(f"Invalid {name} value: {value}")
+
+        prefix = match.group(1) or "eq"
+        if end is None:
+            clauses.append({
+                "eq": column == start, "gt": column > start, "ge": column >= start,
+                "lt": column < start, "le": column <= start,
+            }[prefix])
+        elif prefix == "eq":
+            clauses.extend([column >= start, column < end])
+        else:
+            clauses.append({
+                "gt": column >= end, "ge": column >= start, "lt": column < start, "le": column < end,
+            }[prefix])
+    return clauses
@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from sqlalchemy.orm import Query
+
+from src.config.settings import settings
+
+# Bundle.total support: planner estimates for _total=estimate, and a short
+# TTL cache for exact counts so paging through a result does not re-count
+# the table on every page.
+
+
+def estimate_count(query: Query) -> int:
+    """Row estimate from the planner (EXPLAIN), without executing the query"""
+    session = query.session
+    compiled = query.statement.compile(dialect=session.get_bind().dialect)
+    plan = session.connection().exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + compiled.string, compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def count_key(resource_type: str, filters: Dict[str, Any]) -> Tuple[Hashable, ...]:
+    """Normalized cache key: filter order and unset filters do not matter"""
+    return (resource_type, *sorted((name, str(value)) for name, value in filters.items() if value is not None))
+
+
+class CountCache:
+    """Exact search counts per normalized query, kept for ttl_seconds"""
+
+    def __init__(self, ttl_seconds: float, max_size: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[int]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= now:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Tuple[Hashable, ...], count: int) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (count, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, resource_type: str) -> None:
+        """Drop cached counts of one resource type after a write in this process"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == resource_type]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+count_cache = CountCache(settings.SEARCH_TOTAL_CACHE_SECONDS, settings.SEARCH_TOTAL_CACHE_SIZE)
+
+
+def cached_count(resource_type: str, filters: Dict[str, Any], query: Query) -> int:
+    key = count_key(resource_type, filters)
+    count = count_cache.get(key)
+    if count is None:
+        count = query.order_by(None).count()
+        count_cache.set(key, count)
+    return count
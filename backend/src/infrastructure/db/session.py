@@ -1,13 +1,39 @@
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
 from ...config.settings import settings
+from ..observability.metrics import registry
+from ..observability.tracing import tracer
+from .instrumentation import instrument_engine, trace_engine
+from .query_budget import enable_query_tracking
+from .read_after_write import build_read_after_write
+from .replicas import Replica, ReplicaRouter
 
-engine = create_engine(settings.DATABASE_URL)
+def _create_engine(url: str, name: str, **kwargs) -> Engine:
+    engine = create_engine(url, **kwargs)
+    if settings.METRICS_ENABLED:
+        instrument_engine(engine, name)
+    if tracer.enabled:
+        trace_engine(engine)
+    if settings.QUERY_BUDGET_ENABLED:
+        enable_query_tracking(engine)
+    return engine
+
+engine = _create_engine(settings.DATABASE_URL, "primary")
+replica_router = ReplicaRouter(
+    engine,
+    [
+        # Short connect timeout so an unreachable replica fails its check quickly
+        Replica(f"replica{index}", _create_engine(url, f"replica{index}", connect_args={"connect_timeout": 2}))
+        for index, url in enumerate(settings.DATABASE_REPLICA_URLS)
+    ],
+    settings.REPLICA_MAX_LAG_SECONDS,
+    build_read_after_write(settings.READ_AFTER_WRITE_BACKEND, engine, settings.READ_AFTER_WRITE_SECONDS),
+)
+if settings.METRICS_ENABLED:
+    registry.gauge("db_replica", "Replica health (1/0) and replay lag", ("replica", "stat"), callback=replica_router.stats)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def read_session() -> Session:
+    """Session for work that only reads: a healthy replica, else the primary"""
+    return SessionLocal(bind=replica_router.engine_for(primary=False))
@@ -0,0 +1,69 @@
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Query
+
+from src.config.settings import settings
+
+# _sort support. Each repository maps its sort parameters to columns and lists
+# the btree indexes that can return rows in that order, so sort + _count reads
+# the first rows off an index instead of sorting every match.
+
+logger = logging.getLogger(__name__)
+
+
+def parse_sort(sort: Sequence[str], sort_columns: Dict[str, str], resource_type: str) -> List[Tuple[str, bool]]:
+    """(column, descending) pairs for _sort tokens such as "-date" """
+    keys = []
+    for token in sort:
+        token = token.strip()
+        if not token:
+            continue
+        name = token.lstrip("-")
+        if name not in sort_columns:
+            raise ValueError(f"Unsupported _sort parameter for {resource_type}: {name}")
+        keys.append((sort_columns[name], token.startswith("-")))
+    return keys
+
+def index_aligned(columns: Sequence[str], equality_columns: Sequence[str], indexes: Sequence[Tuple[str, ...]]) -> bool:
+    """Whether an index returns rows in this order once the equality filters are fixed"""
+    for index in indexes:
+        remaining = list(index)
+        while remaining and remaining[0] in equality_columns:
+            remaining.pop(0)
+        if remaining[:len(columns)] == list(columns):
+            return True
+    return False
+
+def apply_sort(
+    query: Query,
+    model,
+    resource_type: str,
+    sort: Optional[Sequence[str]],
+    limit: Optional[int],
+    sort_columns: Dict[str, str],
+    indexes: Sequence[Tuple[str, ...]],
+    equality_columns: Sequence[str] = (),
+) -> Query:
+    """ORDER BY _sort with id as the final tie-breaker, then LIMIT _count
+
+    Without _sort and _count the query is left unordered: streaming a whole
+    result doesn't need a stable order. Sorts no index can serve are logged,
+    or rejected with ValueError when SEARCH_SORT_STRICT is set.
+    """
+    keys = parse_sort(sort or (), sort_columns, resource_type)
+    if keys and not index_aligned([column for column, _ in keys], equality_columns, indexes):
+        message = f"_sort={','.join(sort)} on {resource_type} is not backed by an index"
+        if settings.SEARCH_SORT_STRICT:
+            raise ValueError(message)
+        logger.warning(message)
+
+    if keys or limit is not None:
+        # The tie-breaker follows the last key's direction so (column, id) indexes scan in one direction
+        descending = keys[-1][1] if keys else False
+        order = [getattr(model, column).desc() if desc else getattr(model, column) for column, desc in keys]
+        order.append(model.id.desc() if descending else model.id)
+        query = query.order_by(*order)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from src.domain.bundle.services import TokenRevocationList
+from src.infrastructure.db.query_budget import untracked
+
+# Revoked token ids shared by every process through the revoked_token table
+# (migration 0009). Checks stay in memory: a logout is applied locally at
+# once and written to the table, and every process merges the table's
+# unexpired ids into its own list on a background thread.
+
+logger = logging.getLogger(__name__)
+
+_REVOKE = text("""
+    INSERT INTO revoked_token (jti, expires_at) VALUES (:jti, to_timestamp(:exp))
+    ON CONFLICT (jti) DO NOTHING
+""")
+_LOAD = text("SELECT jti, extract(epoch FROM expires_at) AS exp FROM revoked_token WHERE expires_at > now()")
+_EXPIRE = text("DELETE FROM revoked_token WHERE expires_at <= now()")
+
+
+class PostgresTokenRevocationList(TokenRevocationList):
+    """Revocations persisted in revoked_token until the token's exp
+
+    A logout on another process takes effect here within one refresh
+    interval, and a restarted process loads the list before it serves.
+    Revocations are never undone, so a refresh only adds ids.
+    """
+
+    def __init__(self, engine: Engine, expire_every_seconds: float = 3600.0):
+        super().__init__()
+        self.engine = engine
+        self.expire_every_seconds = expire_every_seconds
+        self._expired_at = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        # Fails the logout if it cannot be shared, rather than revoking in this process only
+        with self.engine.begin() as conn:
+            conn.execute(_REVOKE, {"jti": jti, "exp": expires_at})
+        super().revoke(jti, expires_at)
+
+    def refresh(self) -> None:
+        """Merge the table's unexpired revocations, dropping expired rows now and then"""
+        with untracked(), self.engine.begin() as conn:
+            if time.monotonic() - self._expired_at > self.expire_every_seconds:
+                self._expired_at = time.monotonic()
+                conn.execute(_EXPIRE)
+            rows = conn.execute(_LOAD).all()
+        self.remember({row.jti: float(row.exp) for row in rows})
+
+    def start(self, interval_seconds: float) -> None:
+        """Load now, then refresh every interval_seconds on a daemon thread"""
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Could not load revoked tokens; retrying in the background")
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, args=(interval_seconds,), name="token-revocations", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self, interval_seconds: float) -> None:
+        while not self._stop.wait(interval_seconds):
+            try:
+                self.refresh()
+            except Exception:
+                # Keep the ids already known; the next refresh catches up
+                logger.exception("Refreshing revoked tokens failed")
+
+
+def build_token_revocations(name: str, engine: Engine) -> TokenRevocationList:
+    if name == "memory":
+        return TokenRevocationList()
+    if name == "postgres":
+        return PostgresTokenRevocationList(engine)
+    raise ValueError(f"Unknown token revocation backend: {name}")
@@ -0,0 +1,322 @@
+import functools
+import inspect
+import json
+import logging
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from src.config.settings import settings
+
+# Minimal tracer producing OpenTelemetry-shaped spans (W3C trace context ids,
+# OTLP field names) without the SDK dependency. Exporters are pluggable.
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+# Arguments and search fields never copied into span attributes: credentials,
+# and patient demographics (PHI) such as the name or identifier searched for
+_SENSITIVE_ARGUMENT = re.compile(
+    r"token|password|secret|hash|email"
+    r"|^(name|family|given|identifier|birth_?date|gender|address\w*|telecom|phone)$",
+    re.IGNORECASE,
+)
+
+SPAN_KIND_INTERNAL = "SPAN_KIND_INTERNAL"
+SPAN_KIND_SERVER = "SPAN_KIND_SERVER"
+SPAN_KIND_CLIENT = "SPAN_KIND_CLIENT"
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str] = None
+    kind: str = SPAN_KIND_INTERNAL
+    start_time_unix_nano: int = field(default_factory=time.time_ns)
+    end_time_unix_nano: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "STATUS_CODE_UNSET"
+    status_message: str = ""
+    recording: bool = True
+    tracer: Optional["Tracer"] = field(default=None, repr=False, compare=False)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.recording and value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = "STATUS_CODE_ERROR"
+        self.status_message = f"{type(exc).__name__}: {exc}"
+
+    def end(self, end_time_unix_nano: Optional[int] = None) -> None:
+        if self.end_time_unix_nano is not None or not self.recording:
+            return
+        self.end_time_unix_nano = end_time_unix_nano or time.time_ns()
+        if self.tracer is not None:
+            self.tracer.exporter.export([self])
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_time_unix_nano or time.time_ns()) - self.start_time_unix_nano) / 1e6
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.recording else '00'}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_time_unix_nano,
+            "endTimeUnixNano": self.end_time_unix_nano,
+            "attributes": self.attributes,
+            "status": {"code": self.status, "message": self.status_message},
+        }
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, spans: Sequence[Span]) -> None:
+        ...
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps finished spans in a bounded list; for tests and local inspection"""
+
+    def __init__(self, max_spans: int = 10000):
+        self.max_spans = max_spans
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[Span]) -> None:
+        with self._lock:
+            self._spans.extend(spans)
+            del self._spans[:-self.max_spans]
+
+    def get_finished_spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._spans.clear()
+
+class LoggingSpanExporter(SpanExporter):
+    """Writes one JSON line per finished span to the src.tracing logger"""
+
+    def __init__(self, logger_name: str = "src.tracing"):
+        self.logger = logging.getLogger(logger_name)
+
+    def export(self, spans: Sequence[Span]) -> None:
+        for span in spans:
+            self.logger.info(json.dumps(span.to_dict(), default=str))
+
+def build_exporter(name: str) -> Optional[SpanExporter]:
+    if name == "none":
+        return None
+    if name == "memory":
+        return InMemorySpanExporter()
+    if name == "log":
+        return LoggingSpanExporter()
+    raise ValueError(f"Unknown tracing exporter: {name}")
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_NON_RECORDING = Span(name="", trace_id="0" * 32, span_id="0" * 16, recording=False)
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """Return (trace_id, parent span id, sampled) from a W3C traceparent header"""
+    match = _TRACEPARENT.match((header or "").strip().lower())
+    if not match:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+def current_span() -> Span:
+    """The active span, or a non-recording span when nothing is being traced"""
+    return _current_span.get() or _NON_RECORDING
+
+
+class Tracer:
+    def __init__(self, exporter: Optional[SpanExporter] = None, sample_ratio: float = 1.0):
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        kind: str = SPAN_KIND_INTERNAL,
+        traceparent: Optional[str] = None,
+    ) -> Span:
+        """Start a span under the current one (or the remote parent); does not make it current"""
+        parent = _current_span.get()
+        if not self.enabled or (parent is not None and not parent.recording):
+            return _NON_RECORDING
+
+        if parent is not None:
+            trace_id, parent_span_id = parent.trace_id, parent.span_id
+        else:
+            remote = parse_traceparent(traceparent)
+            if remote is not None:
+                trace_id, parent_span_id, sampled = remote
+            else:
+                trace_id, parent_span_id, sampled = _new_id(128), None, random.random() < self.sample_ratio
+            if not sampled:
+                return Span(name=name, trace_id=trace_id, span_id=_new_id(64), recording=False)
+
+        span = Span(name=name, trace_id=trace_id, span_id=_new_id(64), parent_span_id=parent_span_id, kind=kind, tracer=self)
+        if attributes:
+            span.set_attributes(attributes)
+        return span
+
+    @contextmanager
+    def start_as_current_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        kind: str = SPAN_KIND_INTERNAL,
+        traceparent: Optional[str] = None,
+    ) -> Iterator[Span]:
+        span = self.start_span(name, attributes, kind, traceparent)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+tracer = Tracer(build_exporter(settings.TRACING_EXPORTER), settings.TRACING_SAMPLE_RATIO)
+
+
+def _call_attributes(signature: inspect.Signature, args: tuple, kwargs: dict) -> Dict[str, Any]:
+    """Scalar arguments and non-empty fields of request models, as fhir.param.* attributes"""
+    attributes = {}
+    try:
+        bound = signature.bind(*args, **kwargs)
+    except TypeError:
+        return attributes
+    for name, value in bound.arguments.items():
+        if name == "self" or _SENSITIVE_ARGUMENT.search(name):
+            continue
+        if isinstance(value, (str, int, float, bool)):
+            attributes[f"fhir.param.{name}"] = value
+        elif hasattr(value, "model_dump") and name == "request" and type(value).__name__.endswith("SearchRequest"):
+            for key, field_value in value.model_dump(exclude_none=True).items():
+                if _SENSITIVE_ARGUMENT.search(key):
+                    continue
+                if isinstance(field_value, (str, int, float, bool)):
+                    attributes[f"fhir.param.{key}"] = field_value
+        elif value is not None and name.endswith("_id"):
+            attributes[f"fhir.param.{name}"] = str(value)
+    return attributes
+
+def _result_attributes(result: Any) -> Dict[str, Any]:
+    if isinstance(result, list):
+        return {"fhir.rows": len(result)}
+    total = getattr(result, "total", None)
+    if isinstance(total, int):
+        return {"fhir.bundle.total": total}
+    return {}
+
+def _iterate_in_span(span: Span, iterator: Iterator) -> Iterator:
+    """Yield the iterator's items, ending span once it is exhausted or closed
+
+    The span is current only while each item is produced, not across
+    yields: streamed responses pull items from worker threads, each with
+    its own copy of the context.
+    """
+    rows = 0
+    try:
+        while True:
+            token = _current_span.set(span)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            except BaseException as exc:
+                span.record_exception(exc)
+                raise
+            finally:
+                _current_span.reset(token)
+            rows += 1
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+        span.set_attributes({"fhir.rows": rows})
+        span.end()
+
+def traced(name: str, attributes: Optional[Dict[str, Any]] = None) -> Callable:
+    """Run the function in a span named name, recording arguments and result size
+
+    A generator result (iter_search, stream_*) does its work as it is
+    consumed, so its span stays open until the generator is done.
+    """
+    def decorate(fn: Callable) -> Callable:
+        signature = inspect.signature(fn)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not tracer.enabled:
+                    return await fn(*args, **kwargs)
+                with tracer.start_as_current_span(name, attributes) as span:
+                    span.set_attributes(_call_attributes(signature, args, kwargs))
+                    result = await fn(*args, **kwargs)
+                    span.set_attributes(_result_attributes(result))
+                    return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            span = tracer.start_span(name, attributes)
+            token = _current_span.set(span)
+            try:
+                span.set_attributes(_call_attributes(signature, args, kwargs))
+                result = fn(*args, **kwargs)
+            except BaseException as exc:
+                span.record_exception(exc)
+                span.end()
+                raise
+            finally:
+                _current_span.reset(token)
+            if inspect.isgenerator(result):
+                return _iterate_in_span(span, result)
+            span.set_attributes(_result_attributes(result))
+            span.end()
+            return result
+        return wrapper
+    return decorate
+
+def instrument_class(cls: type, attributes: Optional[Dict[str, Any]] = None) -> None:
+    """Wrap every public method defined on cls in a span named Class.method"""
+    for method_name, member in list(vars(cls).items()):
+        if method_name.startswith("_") or not inspect.isfunction(member) or getattr(member, "__traced__", False):
+            continue
+        wrapped = traced(f"{cls.__name__}.{method_name}", attributes)(member)
+        wrapped.__traced__ = True
+        setattr(cls, method_name, wrapped)
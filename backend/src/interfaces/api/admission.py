@@ -0,0 +1,143 @@
+import math
+from typing import Dict, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from src.infrastructure.db.rate_limit import RateLimitBackend
+from src.infrastructure.observability.metrics import registry
+
+# Admission control: per-principal token buckets, then a concurrency limit per
+# route class. Both answer 429 with Retry-After before the request reaches a
+# handler, so a flooding client costs no database work. Separate classes keep
+# slow searches and bulk operations from taking the threads cheap reads need.
+# Login attempts have a bucket of their own per client address, so guessing
+# passwords neither spends nor is allowed the anonymous rate of that address.
+
+REJECTED_REQUESTS = registry.counter(
+    "http_rejected_requests_total", "Requests refused by admission control", ("route_class", "reason")
+)
+ADMITTED_IN_FLIGHT = registry.gauge(
+    "http_admitted_in_flight", "Admitted requests being served, by route class", ("route_class",)
+)
+
+READ, SEARCH, WRITE, BULK, LOGIN = "read", "search", "write", "bulk", "login"
+
+# Never limited: probes and scrapes
+EXEMPT_PATHS = ("/metrics", "/api/health")
+
+
+def route_class(method: str, path: str) -> str:
+    """read, search, write, bulk or login, from the request line alone (no routing needed)"""
+    segments = path.rstrip("/").split("/")
+    if method == "POST" and segments[-2:] == ["auth", "login"]:
+        return LOGIN
+    if any(segment.startswith("$") or segment == "_jobs" for segment in segments):
+        return BULK
+    if method not in ("GET", "HEAD"):
+        return WRITE
+    # /api/fhir/<Type> without an id, and the change feed
+    if len(segments) == 4 and segments[2] == "fhir" and (segments[3][:1].isupper() or segments[3] == "_changes"):
+        return SEARCH
+    return READ
+
+
+def principal(scope) -> Tuple[str, str]:
+    """(key, role) of the caller: the JWT sub, or the client address without a valid token
+
+    The token is checked with the app's JWTService and its verified-token
+    cache; an invalid token only makes the caller anonymous here, the route
+    still answers 401.
+    """
+    authorization = b""
+    for key, value in scope["headers"]:
+        if key == b"authorization":
+            authorization = value
+            break
+    container = getattr(scope["app"].state, "container", None)
+    scheme, _, token = authorization.decode("latin-1").partition(" ")
+    if container is not None and scheme.lower() == "bearer" and token:
+        try:
+            payload = container.jwt_service.verify_token(token)
+        except ValueError:
+            payload = {}
+        if payload.get("sub"):
+            # Tokens issued before the role claim existed get the read_only rate
+            return f"user:{payload['sub']}", payload.get("role", "read_only")
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}", "anonymous"
+
+
+def _throttled(diagnostics: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={
+            "resourceType": "OperationOutcome",
+            "issue": [{"severity": "error", "code": "throttled", "diagnostics": diagnostics}],
+        },
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware enforcing rate and concurrency limits
+
+    Each principal has its own bucket, with the rate of the token's role
+    claim. Concurrency slots are held until the response body is sent, and
+    are per process.
+    """
+
+    def __init__(
+        self,
+        app,
+        backend: RateLimitBackend,
+        rates: Dict[str, float],
+        burst_seconds: float,
+        concurrency: Dict[str, int],
+        login_rate: float = 0.0,
+    ):
+        self.app = app
+        self.backend = backend
+        self.rates = rates
+        self.burst_seconds = burst_seconds
+        self.concurrency = concurrency
+        self.login_rate = login_rate
+        # Only touched on the event loop, so no lock
+        self._in_flight: Dict[str, int] = {name: 0 for name in concurrency}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        klass = route_class(scope["method"], scope["path"])
+        if klass == LOGIN:
+            client = scope.get("client")
+            key, rate = f"login:ip:{client[0] if client else 'unknown'}", self.login_rate
+        else:
+            key, role = principal(scope)
+            rate = self.rates.get(role, self.rates.get("anonymous", 0))
+        if rate > 0:
+            burst = max(1.0, rate * self.burst_seconds)
+            if self.backend.blocking:
+                wait = await run_in_threadpool(self.backend.take, key, rate, burst)
+            else:
+                wait = self.backend.take(key, rate, burst)
+            if wait > 0:
+                REJECTED_REQUESTS.inc((klass, "rate_limit"))
+                await _throttled("Rate limit exceeded", wait)(scope, receive, send)
+                return
+
+        limit = self.concurrency.get(klass, 0)
+        if limit > 0 and self._in_flight[klass] >= limit:
+            REJECTED_REQUESTS.inc((klass, "concurrency"))
+            await _throttled(f"Too many concurrent {klass} requests", 1)(scope, receive, send)
+            return
+
+        self._in_flight[klass] = self._in_flight.get(klass, 0) + 1
+        ADMITTED_IN_FLIGHT.inc((klass,))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self._in_flight[klass] -= 1
+            ADMITTED_IN_FLIGHT.dec((klass,))
@@ -0,0 +1,102 @@
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from fastapi import APIRouter, Request, Response, status
+
+from src.interfaces.api.formats import FHIR_JSON
+
+# Interactions and search parameters actually served by the routers.
+# Update this registry (and CAPABILITY_DATE) together with the routes.
+CAPABILITY_DATE = "2026-10-19"
+
+RESOURCE_CAPABILITIES: Dict[str, Dict[str, List]] = {
+    "Patient": {
+        "interaction": ["read", "create", "update", "delete", "search-type"],
+        "searchParam": [
+            ("name", "string"),
+            ("identifier", "token"),
+            ("_lastUpdated", "date"),
+        ],
+    },
+    "Encounter": {
+        "interaction": ["read", "create", "update", "delete", "search-type"],
+        "searchParam": [
+            ("status", "token"),
+            ("subject", "reference"),
+            ("date", "date"),
+            ("_lastUpdated", "date"),
+        ],
+    },
+    "Observation": {
+        "interaction": ["read", "create", "update", "delete", "search-type"],
+        "searchParam": [
+            ("code", "token"),
+            ("date", "date"),
+            ("subject", "reference"),
+            ("_lastUpdated", "date"),
+        ],
+    },
+}
+
+# System-level operations, run as background jobs (async request pattern)
+SYSTEM_OPERATIONS: List[Tuple[str, str]] = [
+    ("export", "http://hl7.org/fhir/uv/bulkdata/OperationDefinition/export"),
+]
+
+CACHE_CONTROL = "public, max-age=3600"
+
+
+def build_capability_statement(implementation_url: str) -> Dict[str, Any]:
+    """Build the CapabilityStatement resource from the registry"""
+    return {
+        "resourceType": "CapabilityStatement",
+        "status": "active",
+        "date": CAPABILITY_DATE,
+        "publisher": "FHIR Simulation Server",
+        "description": "A lightweight FHIR R4 server for simulation purposes",
+        "fhirVersion": "4.0.1",
+        "kind": "instance",
+        "format": ["json", "ndjson"],
+        "software": {"name": "FHIR Simulation Server", "version": "1.0.0"},
+        "implementation": {"url": implementation_url},
+        "rest": [
+            {
+                "mode": "server",
+                "resource": [
+                    {
+                        "type": resource_type,
+                        "interaction": [{"code": code} for code in capability["interaction"]],
+                        "searchParam": [
+                            {"name": name, "type": param_type}
+                            for name, param_type in capability["searchParam"]
+                        ],
+                    }
+                    for resource_type, capability in RESOURCE_CAPABILITIES.items()
+                ],
+                "operation": [{"name": name, "definition": definition} for name, definition in SYSTEM_OPERATIONS],
+            }
+        ],
+    }
+
+
+@lru_cache(maxsize=8)
+def encoded_capability_statement(implementation_url: str) -> Tuple[bytes, str]:
+    """Encode once per base URL; returns (body, strong ETag)"""
+    body = json.dumps(build_capability_statement(implementation_url), separators=(",", ":")).encode()
+    return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+router = APIRouter()
+
+@router.get("/fhir/metadata")
+async def get_metadata(request: Request):
+    """FHIR CapabilityStatement endpoint"""
+    implementation_url = str(request.url.replace(query=None)).rsplit("/metadata", 1)[0]
+    body, etag = encoded_capability_statement(implementation_url)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type=FHIR_JSON, headers=headers)
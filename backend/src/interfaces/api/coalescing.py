@@ -0,0 +1,252 @@
+import asyncio
+import threading
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from src.config.settings import settings
+from src.infrastructure.observability.metrics import registry
+
+# Single-flight for hot reads: concurrent identical requests share one
+# in-flight query and one encoded body. The first request (the leader) runs
+# the handler; the others wait for its body and answer with a copy. Keys
+# carry the resource type's search cache generation, so a request that
+# arrives after a write never joins a flight started before it.
+
+COALESCED_REQUESTS = registry.counter(
+    "http_coalesced_requests_total", "Requests served by single-flight", ("route", "result")
+)
+
+# (body, media type) of a finished flight; None when the leader could not share it
+SharedBody = Optional[Tuple[bytes, str]]
+
+# Markers the read-ahead task queues after the last chunk it read
+_END = object()
+_PASS_THROUGH = object()
+
+
+class _Flight:
+    def __init__(self):
+        self._done = False
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self._lock = threading.Lock()
+        self.body: SharedBody = None
+        self.error: Optional[BaseException] = None
+
+    def finish(self, body: SharedBody = None, error: Optional[BaseException] = None) -> None:
+        """Record the outcome and wake the followers; later calls are ignored"""
+        with self._lock:
+            if self._done:
+                return
+            self.body = body
+            self.error = error
+            self._done = True
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_resolve, future)
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait on the event loop; no worker thread is held while the leader runs"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._lock:
+            if self._done:
+                return True
+            self._waiters.append((loop, future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class _Follower(Response):
+    """Response of a sync handler's follower: waits for the flight when it is sent
+
+    The handler returns it at once, so waiting holds no worker thread. When
+    the flight has nothing to share, build() runs in the thread pool then.
+    Errors, raised after the handler returned, go through errors() first
+    so they become the same HTTP errors the handler raises itself.
+    """
+
+    def __init__(
+        self,
+        single_flight: "SingleFlight",
+        key: Hashable,
+        flight: _Flight,
+        build: Callable[[], Response],
+        errors: Optional[Callable[[Exception], Exception]],
+    ):
+        super().__init__()
+        self.single_flight = single_flight
+        self.key = key
+        self.flight = flight
+        self.build = build
+        self.errors = errors
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            landed = await self.flight.wait(self.single_flight.wait_seconds)
+            response = self.single_flight._follow(self.key, self.flight, landed)
+            if response is None:
+                response = await run_in_threadpool(self.build)
+        except Exception as e:
+            error = self.errors(e) if self.errors is not None else e
+            if error is e:
+                raise
+            raise error from e
+        await response(scope, receive, send)
+
+
+class SingleFlight:
+    """In-flight requests of one route, keyed by what makes two requests identical
+
+    Enabled per route by listing the route's name in COALESCE_ROUTES.
+    Followers wait up to wait_seconds on the event loop; when the leader
+    fails to produce a shareable body in time (too large, failed stream,
+    slow query) they run the handler themselves.
+    """
+
+    def __init__(
+        self,
+        route: str,
+        wait_seconds: float = settings.COALESCE_WAIT_SECONDS,
+        max_body_bytes: int = settings.COALESCE_MAX_BODY_BYTES,
+    ):
+        self.route = route
+        self.enabled = route in settings.COALESCE_ROUTES
+        self.wait_seconds = wait_seconds
+        self.max_body_bytes = max_body_bytes
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: Hashable) -> Tuple[_Flight, bool]:
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = _Flight()
+        COALESCED_REQUESTS.inc((self.route, "leader"))
+        return flight, True
+
+    def _land(self, key: Hashable, flight: _Flight, body: SharedBody = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(body, error)
+
+    def _lead(self, key: Hashable, flight: _Flight, response: Response) -> Response:
+        """Share the leader's response body with the followers once it is complete"""
+        if isinstance(response, StreamingResponse):
+            response.body_iterator = self._tee(key, flight, response.body_iterator, response.media_type)
+        elif len(response.body) <= self.max_body_bytes:
+            self._land(key, flight, (response.body, response.media_type))
+        else:
+            self._land(key, flight)
+        return response
+
+    async def _tee(self, key: Hashable, flight: _Flight, chunks: AsyncIterator, media_type: str) -> AsyncIterator:
+        """Stream the leader's body while a separate task reads it ahead for the followers
+
+        The flight lands as soon as the body is complete, or with None as soon
+        as it passes max_body_bytes, however slowly the leader's client reads.
+        Past the limit nothing more is read ahead: the rest of the body goes
+        to the leader at its client's pace.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def read_ahead() -> None:
+            body, size = [], 0
+            try:
+                async for chunk in chunks:
+                    queue.put_nowait(chunk)
+                    size += len(chunk)
+                    if size > self.max_body_bytes:
+                        self._land(key, flight)
+                        queue.put_nowait(_PASS_THROUGH)
+                        return
+                    body.append(chunk)
+                self._land(key, flight, (b"".join(body), media_type))
+                queue.put_nowait(_END)
+            except Exception as e:
+                self._land(key, flight)
+                queue.put_nowait(e)
+
+        reader = asyncio.create_task(read_ahead())
+        try:
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    return
+                if item is _PASS_THROUGH:
+                    async for chunk in chunks:
+                        yield chunk
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Also reached when the leader's client disconnects: followers then run their own query
+            reader.cancel()
+            self._land(key, flight)
+
+    def _follow(self, key: Hashable, flight: _Flight, landed: bool) -> Optional[Response]:
+        if not landed:
+            # The leader is stuck (slow query): later requests start a new flight
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+        elif flight.error is not None:
+            COALESCED_REQUESTS.inc((self.route, "shared"))
+            raise flight.error
+        elif flight.body is not None:
+            COALESCED_REQUESTS.inc((self.route, "shared"))
+            body, media_type = flight.body
+            return Response(content=body, media_type=media_type)
+        COALESCED_REQUESTS.inc((self.route, "fallback"))
+        return None
+
+    def response(
+        self,
+        key: Hashable,
+        build: Callable[[], Response],
+        errors: Optional[Callable[[Exception], Exception]] = None,
+    ) -> Response:
+        """build() once for concurrent requests with the same key (sync handlers)
+
+        A follower gets a response that waits for the flight when it is sent;
+        errors maps the errors it then raises (see _Follower).
+        """
+        if not self.enabled:
+            return build()
+        flight, leader = self._join(key)
+        if not leader:
+            return _Follower(self, key, flight, build, errors)
+        try:
+            response = build()
+        except Exception as e:
+            self._land(key, flight, error=e)
+            raise
+        return self._lead(key, flight, response)
+
+    async def response_async(self, key: Hashable, build: Callable[[], Awaitable[Response]]) -> Response:
+        """Same as response() for async handlers; followers wait here, on the event loop"""
+        if not self.enabled:
+            return await build()
+        flight, leader = self._join(key)
+        if not leader:
+            response = self._follow(key, flight, await flight.wait(self.wait_seconds))
+            return response if response is not None else await build()
+        try:
+            response = await build()
+        except Exception as e:
+            self._land(key, flight, error=e)
+            raise
+        return self._lead(key, flight, response)
@@ -0,0 +1,172 @@
+import zlib
+from importlib.util import find_spec
+from typing import List, Optional, Tuple
+
+# brotli is optional (pip install brotli) and imported by the first br response, not at startup
+BROTLI_AVAILABLE = find_spec("brotli") is not None
+
+# Media types worth compressing; everything else (images, already-compressed
+# payloads) passes through untouched
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/fhir+json",
+    "application/fhir+ndjson",
+    "application/x-ndjson",
+    "application/ndjson",
+    "text/",
+)
+
+
+def parse_accept_encoding(header: str) -> List[Tuple[str, float]]:
+    """Codings from an Accept-Encoding header with their q-values"""
+    codings = []
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings.append((coding.strip().lower(), q))
+    return codings
+
+def choose_encoding(header: str, brotli_available: bool = BROTLI_AVAILABLE) -> Optional[str]:
+    """Best supported coding the client accepts; br wins ties over gzip"""
+    accepted = dict(parse_accept_encoding(header))
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if brotli_available else []) + ["gzip"]
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _Encoder:
+    """Incremental gzip/brotli encoder
+
+    Every body message is flushed (Z_SYNC_FLUSH, or a brotli flush), so the
+    client can decode each streamed chunk as it arrives instead of waiting
+    for the compressor to fill its window.
+    """
+
+    def __init__(self, coding: str, gzip_level: int, brotli_quality: int):
+        if coding == "br":
+            import brotli
+
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+            self._compress, self._flush, self._finish = (
+                self._compressor.process, self._compressor.flush, self._compressor.finish
+            )
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._compress, self._finish = self._compressor.compress, self._compressor.flush
+            self._flush = lambda: self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress one body message and flush it"""
+        return self._compress(data) + self._flush() if data else b""
+
+    def finish(self, data: bytes = b"") -> bytes:
+        """Compress the last body message and end the stream"""
+        return (self._compress(data) if data else b"") + self._finish()
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware applying negotiated gzip/brotli encoding to responses
+
+    Bodies are compressed chunk by chunk as the application sends them, so a
+    streamed bundle is never held in memory and each chunk reaches the
+    client decodable. Responses smaller than
+    minimum_size (by Content-Length, or a single small body message) are sent
+    as is.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        coding = choose_encoding(accept_encoding) if accept_encoding else None
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        encoder: Optional[_Encoder] = None
+
+        async def send_compressed(message):
+            nonlocal start_message, encoder
+            if message["type"] == "http.response.start":
+                if self._compressible(message):
+                    # Hold the headers until the first body chunk shows the size
+                    start_message = message
+                    return
+                await send(message)
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                if not more_body and len(body) < self.minimum_size:
+                    await send(self._with_vary(start_message))
+                    start_message = None
+                    await send(message)
+                    return
+                encoder = _Encoder(coding, self.gzip_level, self.brotli_quality)
+                await send(self._encoded_start(start_message, coding))
+
+            chunk = encoder.compress(body) if more_body else encoder.finish(body)
+            if chunk or not more_body:
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, message) -> bool:
+        status = message["status"]
+        if status < 200 or status in (204, 304):
+            return False
+        content_type = b""
+        for key, value in message.get("headers", []):
+            key = key.lower()
+            if key == b"content-encoding":
+                return False
+            if key == b"content-type":
+                content_type = value
+            elif key == b"content-length" and int(value) < self.minimum_size:
+                return False
+        return content_type.decode("latin-1").lower().startswith(COMPRESSIBLE_TYPES)
+
+    @staticmethod
+    def _with_vary(message):
+        headers = [(k, v) for k, v in message.get("headers", []) if k.lower() != b"vary"]
+        vary = [v for k, v in message.get("headers", []) if k.lower() == b"vary"]
+        headers.append((b"vary", b", ".join([*vary, b"Accept-Encoding"])))
+        return {**message, "headers": headers}
+
+    def _encoded_start(self, message, coding: str):
+        message = self._with_vary(message)
+        headers = [(k, v) for k, v in message["headers"] if k.lower() != b"content-length"]
+        headers.append((b"content-encoding", coding.encode()))
+        return {**message, "headers": headers}
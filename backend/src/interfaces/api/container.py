@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+
+from src.config.settings import settings
+from src.domain.bundle.services import JWTService, PasswordService
+from src.infrastructure.db.session import engine
+from src.infrastructure.db.token_revocations import build_token_revocations
+
+
+@dataclass
+class ServiceContainer:
+    """Application-scoped services, built once at startup and shared by all requests"""
+    password_service: PasswordService
+    jwt_service: JWTService
+
+def build_container() -> ServiceContainer:
+    return ServiceContainer(
+        password_service=PasswordService(),
+        jwt_service=JWTService(revocations=build_token_revocations(settings.TOKEN_REVOCATION_BACKEND, engine)),
+    )
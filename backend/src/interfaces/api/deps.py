@@ -1,19 +1,89 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Iterator, Optional
 from uuid import UUID
 
-from src.infrastructure.db.session import get_db
+from src.infrastructure.db.session import SessionLocal, replica_router
+from src.domain.auth.controller import AuthController
 from src.domain.auth.entities import User, UserRole
 from src.domain.bundle.services import JWTService
+from src.domain.fhir.changes.controller import ChangeFeedController
+from src.domain.fhir.encounter.controller import EncounterController
+from src.domain.fhir.observation.controller import ObservationController
+from src.domain.fhir.patient.controller import PatientController
+from src.domain.jobs.controller import JobController
 from src.infrastructure.db.repositories.auth_repo_sqlalchemy import SQLAlchemyUserRepository
+from src.infrastructure.db.repositories.fhir.change_log_repo_sqlalchemy import SQLAlchemyChangeLogRepository
+from src.infrastructure.db.repositories.fhir.encounter_repo_sqlalchemy import SQLAlchemyEncounterRepository
+from src.infrastructure.db.repositories.fhir.observation_repo_sqlalchemy import SQLAlchemyObservationRepository
+from src.infrastructure.db.repositories.fhir.patient_repo_sqlalchemy import SQLAlchemyPatientRepository
+from src.infrastructure.db.repositories.job_repo_sqlalchemy import SQLAlchemyJobRepository
+from src.infrastructure.observability.tracing import tracer
+from src.interfaces.api.admission import principal
+from src.interfaces.api.container import ServiceContainer
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
+def get_db(request: Request) -> Iterator[Session]:
+    """Request session: a replica for reads, the primary for writes and for clients that just wrote"""
+    write = request.method not in ("GET", "HEAD")
+    client = principal(request.scope)[0] if replica_router.replicas else None
+    if write and client is not None:
+        # Also marked before the write: the response can reach the client before this dependency exits
+        replica_router.wrote(client)
+    primary = write or getattr(request.scope.get("endpoint"), "__primary_only__", False)
+    db = SessionLocal(bind=replica_router.engine_for(primary, client))
+    try:
+        yield db
+    finally:
+        db.close()
+        if write and client is not None:
+            replica_router.wrote(client)
+
+def get_db_target(db: Session = Depends(get_db)) -> str:
+    """Database behind the request session, "primary" or "replica"; part of the cache and single-flight keys"""
+    return "primary" if db.get_bind() is replica_router.primary else "replica"
+
+def get_container(request: Request) -> ServiceContainer:
+    """Services built once in the app lifespan"""
+    return request.app.state.container
+
+def get_jwt_service(container: ServiceContainer = Depends(get_container)) -> JWTService:
+    return container.jwt_service
+
+# Controllers only wrap a repository bound to the request's DB session;
+# the expensive services come from the container
+def get_auth_controller(
+    db: Session = Depends(get_db),
+    container: ServiceContainer = Depends(get_container)
+) -> AuthController:
+    return AuthController(SQLAlchemyUserRepository(db), container.password_service, container.jwt_service)
+
+def get_patient_controller(db: Session = Depends(get_db)) -> PatientController:
+    return PatientController(SQLAlchemyPatientRepository(db))
+
+def get_encounter_controller(db: Session = Depends(get_db)) -> EncounterController:
+    return EncounterController(SQLAlchemyEncounterRepository(db))
+
+def get_observation_controller(db: Session = Depends(get_db)) -> ObservationController:
+    return ObservationController(SQLAlchemyObservationRepository(db))
+
+def get_change_feed_controller(db: Session = Depends(get_db)) -> ChangeFeedController:
+    return ChangeFeedController(
+        SQLAlchemyChangeLogRepository(db),
+        PatientController(SQLAlchemyPatientRepository(db)),
+        EncounterController(SQLAlchemyEncounterRepository(db)),
+        ObservationController(SQLAlchemyObservationRepository(db)),
+    )
+
+def get_job_controller(db: Session = Depends(get_db)) -> JobController:
+    return JobController(SQLAlchemyJobRepository(db))
+
 def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    jwt_service: JWTService = Depends(get_jwt_service)
 ) -> User:
     """Get current authenticated user"""
     credentials_exception = HTTPException(
@@ -22,22 +92,23 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    jwt_service = JWTService()
-    try:
-        payload = jwt_service.verify_token(token)
-    except ValueError:
-        raise credentials_exception
+    with tracer.start_as_current_span("auth.current_user") as span:
+        try:
+            payload = jwt_service.verify_token(token)
+        except ValueError:
+            raise credentials_exception
 
-    email: str = payload.get("sub")
-    if email is None:
-        raise credentials_exception
+        email: str = payload.get("sub")
+        if email is None:
+            raise credentials_exception
 
-    user_repo = SQLAlchemyUserRepository(db)
-    user = user_repo.get_by_email(email)
-    if user is None:
-        raise credentials_exception
+        user_repo = SQLAlchemyUserRepository(db)
+        user = user_repo.get_by_email(email)
+        if user is None:
+            raise credentials_exception
 
-    return user
+        span.set_attribute("enduser.role", user.role.value)
+        return user
 
 def require_role(required_role: UserRole):
     """Dependency to require specific role"""
@@ -0,0 +1,173 @@
+import itertools
+import json
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional
+
+from fastapi import HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from src.infrastructure.db.search_cache import SearchKey, search_cache
+from src.interfaces.api.coalescing import SingleFlight
+
+JSON = "application/json"
+FHIR_JSON = "application/fhir+json"
+FHIR_NDJSON = "application/fhir+ndjson"
+NDJSON_TYPES = (FHIR_NDJSON, "application/x-ndjson", "application/ndjson")
+
+# _format values (FHIR shorthands and mime types) -> response media type
+FORMATS = {
+    "json": FHIR_JSON,
+    JSON: JSON,
+    FHIR_JSON: FHIR_JSON,
+    "ndjson": FHIR_NDJSON,
+    FHIR_NDJSON: FHIR_NDJSON,
+    "application/x-ndjson": "application/x-ndjson",
+    "application/ndjson": "application/ndjson",
+}
+
+# Streamed bodies are grouped into chunks of about this size before sending
+STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def response_format(
+    request: Request,
+    format_: Optional[str] = Query(None, alias="_format", description="json, ndjson or a FHIR mime type"),
+) -> str:
+    """Negotiate the response media type from _format, then the Accept header"""
+    if format_ is not None:
+        media_type = FORMATS.get(format_.split(";")[0].strip().lower())
+        if media_type is None:
+            raise HTTPException(
+                status_code=status.HTTP_406_NOT_ACCEPTABLE,
+                detail=f"Unsupported _format: {format_}"
+            )
+        return media_type
+
+    accept = request.headers.get("accept", "")
+    for media_range in accept.split(","):
+        media_type = media_range.split(";")[0].strip().lower()
+        if media_type in (FHIR_JSON, *NDJSON_TYPES):
+            return media_type
+    return JSON
+
+
+def resource_response(resource: BaseModel, media_type: str) -> Response:
+    """Serialize one resource (a single NDJSON line when NDJSON was requested)"""
+    body = resource.model_dump_json(by_alias=True)
+    if media_type in NDJSON_TYPES:
+        body += "\n"
+    return Response(content=body, media_type=media_type)
+
+def _ndjson_lines(resources: Iterable[BaseModel], exclude_unset: bool = False) -> Iterator[bytes]:
+    chunk = []
+    size = 0
+    for resource in resources:
+        line = resource.model_dump_json(by_alias=True, exclude_unset=exclude_unset).encode() + b"\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= STREAM_CHUNK_BYTES:
+            yield b"".join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield b"".join(chunk)
+
+def _bundle_json(resources: Iterable[BaseModel], total: Optional[int], exclude_unset: bool = False) -> Iterator[bytes]:
+    """Bundle JSON written incrementally; the header and first entry go out unbuffered"""
+    header = {"resourceType": "Bundle", "type": "searchset"}
+    if total is not None:
+        header["total"] = total
+    opening = json.dumps(header, separators=(",", ":"))[:-1].encode() + b',"entry":['
+
+    chunk = [opening]
+    size = 0
+    separator = b""
+    first = True
+    for resource in resources:
+        entry = separator + b'{"resource":' + resource.model_dump_json(by_alias=True, exclude_unset=exclude_unset).encode() + b"}"
+        separator = b","
+        chunk.append(entry)
+        size += len(entry)
+        if first or size >= STREAM_CHUNK_BYTES:
+            yield b"".join(chunk)
+            chunk, size, first = [], 0, False
+    chunk.append(b"]}")
+    yield b"".join(chunk)
+
+def bundle_response(bundle: BaseModel, media_type: str) -> Response:
+    """Serialize a search Bundle; NDJSON streams one entry resource per line"""
+    if media_type in NDJSON_TYPES:
+        resources = (entry.resource for entry in bundle.entry or [] if entry.resource is not None)
+        return StreamingResponse(_ndjson_lines(resources), media_type=media_type)
+    return Response(content=bundle.model_dump_json(by_alias=True), media_type=media_type)
+
+def stream_bundle_response(
+    resources: Iterator[BaseModel], media_type: str, total: Optional[int] = None, exclude_unset: bool = False
+) -> Response:
+    """Stream a searchset Bundle (or NDJSON) from an iterator of resources
+
+    The first resource is pulled before returning, so the query runs inside
+    the request handler (errors still become proper responses) and the first
+    bytes can be sent as soon as the first row is read. total is omitted
+    from the Bundle when None. exclude_unset writes only the fields a
+    projection (_summary/_elements) set.
+    """
+    resources = iter(resources)
+    first = next(resources, None)
+    if first is not None:
+        resources = itertools.chain([first], resources)
+    if media_type in NDJSON_TYPES:
+        return StreamingResponse(_ndjson_lines(resources, exclude_unset), media_type=media_type)
+    return StreamingResponse(_bundle_json(resources, total, exclude_unset), media_type=media_type)
+
+def count_response(total: int, media_type: str) -> Response:
+    """_summary=count: an empty searchset Bundle carrying total
+
+    NDJSON has nowhere to put the total, so an NDJSON request gets the
+    Bundle as FHIR JSON instead of an empty body.
+    """
+    if media_type in NDJSON_TYPES:
+        media_type = FHIR_JSON
+    return stream_bundle_response(iter(()), media_type, total)
+
+
+async def _store_page(chunks: AsyncIterator, key: SearchKey, generation: int, media_type: str) -> AsyncIterator:
+    """Pass the body through, keeping a copy for the search cache until it grows too large"""
+    body = []
+    size = 0
+    async for chunk in chunks:
+        yield chunk
+        if body is not None:
+            size += len(chunk)
+            if size > search_cache.max_entry_bytes:
+                body = None
+            else:
+                body.append(chunk)
+    # Not reached when the client disconnects or the stream fails: partial pages are never stored
+    if body is not None:
+        search_cache.set(key, generation, b"".join(body), media_type)
+
+def cached_search_response(
+    key: SearchKey,
+    build: Callable[[], Response],
+    flight: Optional[SingleFlight] = None,
+    errors: Optional[Callable[[Exception], Exception]] = None,
+) -> Response:
+    """Serve a search page from the search cache, or build it and cache the body as it streams
+
+    The generation is read before build() runs the query, so a write that
+    lands while the page is being read keeps it out of the cache. On a miss,
+    concurrent identical searches share one build() through flight (errors:
+    see SingleFlight.response).
+    """
+    page = search_cache.get(key) if search_cache.enabled else None
+    if page is not None:
+        return Response(content=page.body, media_type=page.media_type, headers={"X-Cache": "HIT"})
+    generation = search_cache.generation(key[0])
+    if flight is not None:
+        response = flight.response((*key, generation), build, errors)
+    else:
+        response = build()
+    if search_cache.enabled and isinstance(response, StreamingResponse):
+        response.headers["X-Cache"] = "MISS"
+        response.body_iterator = _store_page(response.body_iterator, key, generation, response.media_type)
+    return response
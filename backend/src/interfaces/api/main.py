@@ -1,30 +1,59 @@
-from fastapi import Depends, FastAPI, Request, status
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from pydantic import ValidationError
 
 from src.config.settings import settings
-from src.domain.auth.controller import AuthController
-from src.domain.bundle.services import JWTService, PasswordService
-from src.domain.fhir.patient.controller import PatientController
-from src.infrastructure.db.base import Base
-from src.infrastructure.db.repositories.auth_repo_sqlalchemy import (
-    SQLAlchemyUserRepository,
-)
-from src.infrastructure.db.repositories.fhir.patient_repo_sqlalchemy import (
-    SQLAlchemyPatientRepository,
-)
-from src.infrastructure.db.session import engine
+from src.domain.fhir.errors import CursorExpired, ResourceDeleted
+from src.infrastructure.db.purge import TombstonePurger
+from src.infrastructure.db.query_budget import QueryBudget
+from src.infrastructure.db.rate_limit import build_rate_limit_backend
+from src.infrastructure.db.schema import check_schema_revision
+from src.infrastructure.db.session import engine, replica_router
+from src.infrastructure.observability.tracing import tracer
+from src.interfaces.api.admission import AdmissionMiddleware
+from src.interfaces.api.compression import CompressionMiddleware
+from src.interfaces.api.container import build_container
+from src.interfaces.api.metrics import instrument_app
+from src.interfaces.api.query_budget import QueryBudgetMiddleware
+from src.interfaces.api.tracing import instrument_tracing
 
-from .deps import get_db
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Schema is owned by Alembic migrations; only verify the revision here
+    if settings.CHECK_SCHEMA_ON_STARTUP:
+        check_schema_revision(engine)
+    app.state.container = build_container()
+    # Logouts made on other processes (and before a restart) are loaded from the database
+    app.state.container.jwt_service.revocations.start(settings.TOKEN_REVOCATION_REFRESH_SECONDS)
+    # Reads go to replicas only once they pass a health check
+    replica_router.start(settings.REPLICA_HEALTH_CHECK_SECONDS)
+    # Soft-deleted rows are removed in the background, never in the request path
+    purger = TombstonePurger(engine)
+    if settings.PURGE_INTERVAL_SECONDS > 0:
+        purger.start(settings.PURGE_INTERVAL_SECONDS)
+    # Long-running operations ($export, $purge) from the job table. The handlers
+    # pull in the export path, so they are imported only when this process runs jobs.
+    job_runner = None
+    if settings.JOB_WORKERS > 0:
+        from src.infrastructure.db.job_handlers import build_job_runner
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+        job_runner = build_job_runner(engine)
+        job_runner.start()
+    yield
+    if job_runner is not None:
+        job_runner.stop()
+    purger.stop()
+    replica_router.stop()
+    app.state.container.jwt_service.revocations.stop()
 
 app = FastAPI(
     title="FHIR Simulation Server",
     description="A lightweight FHIR R4 server with authentication",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Global error handlers to return FHIR OperationOutcome
@@ -35,6 +64,15 @@ def handle_value_error(_: Request, exc: ValueError):
         "issue": [{"severity": "error", "code": "not-found", "diagnostics": str(exc)}]
     })
 
+# pydantic's ValidationError is a ValueError; one escaping a route comes from
+# converting stored data, not from the request (that is RequestValidationError)
+@app.exception_handler(ValidationError)
+def handle_validation_error(_: Request, exc: ValidationError):
+    return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={
+        "resourceType": "OperationOutcome",
+        "issue": [{"severity": "error", "code": "exception", "diagnostics": str(exc)}]
+    })
+
 @app.exception_handler(PermissionError)
 def handle_permission_error(_: Request, exc: PermissionError):
     return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={
@@ -42,6 +80,20 @@ def handle_permission_error(_: Request, exc: PermissionError):
         "issue": [{"severity": "error", "code": "forbidden", "diagnostics": str(exc)}]
     })
 
+@app.exception_handler(ResourceDeleted)
+def handle_resource_deleted(_: Request, exc: ResourceDeleted):
+    return JSONResponse(status_code=status.HTTP_410_GONE, content={
+        "resourceType": "OperationOutcome",
+        "issue": [{"severity": "error", "code": "deleted", "diagnostics": str(exc)}]
+    })
+
+@app.exception_handler(CursorExpired)
+def handle_cursor_expired(_: Request, exc: CursorExpired):
+    return JSONResponse(status_code=status.HTTP_410_GONE, content={
+        "resourceType": "OperationOutcome",
+        "issue": [{"severity": "error", "code": "expired", "diagnostics": str(exc)}]
+    })
+
 @app.exception_handler(Exception)
 def handle_unexpected_error(_: Request, exc: Exception):
     return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={
@@ -49,6 +101,17 @@ def handle_unexpected_error(_: Request, exc: Exception):
         "issue": [{"severity": "error", "code": "exception", "diagnostics": str(exc)}]
     })
 
+# Rate and concurrency limits; innermost, so 429s still carry CORS headers and are counted in metrics
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        AdmissionMiddleware,
+        backend=build_rate_limit_backend(settings.RATE_LIMIT_BACKEND, engine),
+        rates=settings.RATE_LIMIT_PER_SECOND,
+        burst_seconds=settings.RATE_LIMIT_BURST_SECONDS,
+        concurrency=settings.CONCURRENCY_LIMITS,
+        login_rate=settings.RATE_LIMIT_LOGIN_PER_SECOND,
+    )
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -58,16 +121,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Dependency injection
-def get_auth_controller(db: Session = Depends(get_db)) -> AuthController:
-    user_repo = SQLAlchemyUserRepository(db)
-    password_service = PasswordService()
-    jwt_service = JWTService()
-    return AuthController(user_repo, password_service, jwt_service)
+# gzip/brotli negotiated from Accept-Encoding, applied to streamed bodies chunk by chunk
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
+# Per-request statement budgets (opt-in, development/staging)
+if settings.QUERY_BUDGET_ENABLED:
+    app.add_middleware(
+        QueryBudgetMiddleware,
+        default_budget=QueryBudget(settings.QUERY_BUDGET_STATEMENTS, settings.QUERY_BUDGET_SECONDS),
+        raise_on_exceed=settings.QUERY_BUDGET_RAISE,
+    )
+
+# Tracing (TRACING_EXPORTER)
+if tracer.enabled:
+    instrument_tracing(app)
 
-def get_patient_controller(db: Session = Depends(get_db)) -> PatientController:
-    patient_repo = SQLAlchemyPatientRepository(db)
-    return PatientController(patient_repo)
+# Metrics (/metrics); outermost so CORS preflights are counted too
+if settings.METRICS_ENABLED:
+    instrument_app(app)
 
 # Include routers
 from .routes import router as api_router
@@ -0,0 +1,131 @@
+import hmac
+import ipaddress
+import time
+from typing import Callable, Dict, Optional
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request, Response, status
+
+from src.config.settings import settings
+from src.infrastructure.db.search_cache import search_cache
+from src.infrastructure.db.search_totals import count_cache
+from src.infrastructure.observability.metrics import CONTENT_TYPE, SIZE_BUCKETS, LabelValues, registry
+
+UNMATCHED_ROUTE = "unmatched"
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "Request latency by route template and status", ("method", "route", "status")
+)
+RESPONSE_SIZE = registry.histogram(
+    "http_response_size_bytes", "Response body size by route template", ("method", "route"), SIZE_BUCKETS
+)
+IN_FLIGHT = registry.gauge("http_requests_in_flight", "Requests currently being served")
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and body size per route template"""
+
+    def __init__(self, app):
+        self.app = app
+        self._templates: Optional[Dict[Callable, str]] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started_at = time.perf_counter()
+        status_code = 500
+        body_size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status_code, body_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body_size += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            IN_FLIGHT.dec()
+            route = self._route_template(scope)
+            REQUEST_DURATION.observe(time.perf_counter() - started_at, (scope["method"], route, str(status_code)))
+            RESPONSE_SIZE.observe(body_size, (scope["method"], route))
+
+    def _route_template(self, scope) -> str:
+        # The router leaves the matched endpoint in the scope; map it back to
+        # its path template so /Patient/{patient_id} stays one label
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        if self._templates is None:
+            self._templates = {
+                route.endpoint: route.path_format
+                for route in scope["app"].routes
+                if hasattr(route, "endpoint") and hasattr(route, "path_format")
+            }
+        return self._templates.get(endpoint, UNMATCHED_ROUTE)
+
+
+def require_scraper(request: Request) -> None:
+    """Only scrapers from METRICS_ALLOWED_NETWORKS, with METRICS_TOKEN when one is set"""
+    if settings.METRICS_ALLOWED_NETWORKS:
+        try:
+            address = ipaddress.ip_address(request.client.host if request.client else "")
+        except ValueError:
+            address = None
+        if address is not None and address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        networks = [ipaddress.ip_network(network) for network in settings.METRICS_ALLOWED_NETWORKS]
+        if address is None or not any(address in network for network in networks):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Metrics are not available to this address")
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid metrics token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+
+router = APIRouter()
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_scraper)])
+async def get_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
+
+def instrument_app(app: FastAPI) -> None:
+    """Add the metrics middleware, the /metrics route and service gauges"""
+
+    def password_hash_pool() -> Dict[LabelValues, float]:
+        container = getattr(app.state, "container", None)
+        if container is None:
+            return {}
+        stats = container.password_service.pool.stats()
+        return {(name,): stats[name] for name in ("completed", "rejected", "queue_seconds_avg", "queue_seconds_max")}
+
+    def token_cache() -> Dict[LabelValues, float]:
+        container = getattr(app.state, "container", None)
+        if container is None:
+            return {}
+        stats = container.jwt_service.verified_cache.stats()
+        return {(name,): stats[name] for name in ("size", "hits", "misses")}
+
+    registry.gauge("auth_password_hash_pool", "Password hash pool counters", ("stat",), callback=password_hash_pool)
+    registry.gauge("auth_verified_token_cache", "Verified token cache counters", ("stat",), callback=token_cache)
+    registry.gauge(
+        "fhir_search_total_cache", "Cached search count counters", ("stat",),
+        callback=lambda: {(name,): value for name, value in count_cache.stats().items()},
+    )
+    registry.gauge(
+        "fhir_search_cache", "Cached search page counters", ("stat",),
+        callback=lambda: {(name,): value for name, value in search_cache.stats().items()},
+    )
+
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router)
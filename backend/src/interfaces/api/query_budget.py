@@ -0,0 +1,56 @@
+import logging
+
+from src.infrastructure.db.query_budget import QueryBudget, QueryBudgetExceeded, track_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """Counts statements per request and reports routes over their query budget
+
+    Routes declare a budget with @query_budget; others use the default. The
+    check runs when the response starts, so with raise_on_exceed the request
+    fails with a 500 instead of returning normally, and again after the last
+    body message, so statements a streamed body issues are counted too (the
+    response has been sent by then; raise_on_exceed only fails the request
+    in the server log and the test client).
+    """
+
+    def __init__(self, app, default_budget: QueryBudget, raise_on_exceed: bool = False):
+        self.app = app
+        self.default_budget = default_budget
+        self.raise_on_exceed = raise_on_exceed
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as tracker:
+            reported = False
+
+            async def send_checked(message):
+                nonlocal reported
+                if message["type"] == "http.response.start" and not reported:
+                    reported = self._check(scope, tracker)
+                await send(message)
+                if message["type"] == "http.response.body" and not message.get("more_body", False) and not reported:
+                    reported = self._check(scope, tracker)
+
+            await self.app(scope, receive, send_checked)
+
+    def _check(self, scope, tracker) -> bool:
+        """Report the request if it is over budget so far; True when it was"""
+        declared = getattr(scope.get("endpoint"), "__query_budget__", None) or QueryBudget()
+        budget = QueryBudget(
+            statements=declared.statements if declared.statements is not None else self.default_budget.statements,
+            seconds=declared.seconds if declared.seconds is not None else self.default_budget.seconds,
+        )
+        if not tracker.exceeds(budget):
+            return False
+
+        message = f"{scope['method']} {scope['path']} exceeded its query budget: {tracker.describe(budget)}"
+        if self.raise_on_exceed:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+        return True
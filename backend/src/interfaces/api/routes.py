@@ -1,13 +1,18 @@
-from typing import Optional
+from typing import Callable, List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import FileResponse, JSONResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
+from src.config.settings import settings
 from src.domain.auth.controller import AuthController
 from src.domain.auth.entities import User, UserRole
 from src.domain.auth.view import LoginRequest, MeResponse, TokenResponse
-from src.domain.bundle.services import JWTService, PasswordService
+from src.domain.bundle.services import JWTService, PasswordHashPoolFull
+from src.domain.fhir.changes.controller import ChangeFeedController
+from src.domain.fhir.changes.view import ChangeBundle, ChangeFeedRequest
 from src.domain.fhir.encounter.controller import EncounterController
 from src.domain.fhir.encounter.view import Bundle as EncounterBundle
 from src.domain.fhir.encounter.view import (
@@ -29,24 +34,64 @@ from src.domain.fhir.patient.view import (
     PatientResponse,
     PatientSearchRequest,
 )
-from src.infrastructure.db.repositories.auth_repo_sqlalchemy import (
-    SQLAlchemyUserRepository,
+from src.domain.jobs.controller import EXPORT_JOB, JobController
+from src.domain.jobs.entities import Job, JobStatus
+from src.domain.jobs.view import ExportRequest
+from src.infrastructure.db.query_budget import query_budget
+from src.infrastructure.db.replicas import primary_only
+from src.infrastructure.db.search_cache import search_cache, search_key
+from src.interfaces.api.capability import router as capability_router
+from src.interfaces.api.coalescing import SingleFlight
+from src.interfaces.api.deps import (
+    get_auth_controller,
+    get_change_feed_controller,
+    get_current_user,
+    get_db,
+    get_db_target,
+    get_encounter_controller,
+    get_job_controller,
+    get_jwt_service,
+    get_observation_controller,
+    get_patient_controller,
+    oauth2_scheme,
+    require_role,
 )
-from src.infrastructure.db.repositories.fhir.encounter_repo_sqlalchemy import (
-    SQLAlchemyEncounterRepository,
+from src.interfaces.api.formats import (
+    FHIR_NDJSON,
+    cached_search_response,
+    count_response,
+    resource_response,
+    response_format,
+    stream_bundle_response,
 )
-from src.infrastructure.db.repositories.fhir.observation_repo_sqlalchemy import (
-    SQLAlchemyObservationRepository,
-)
-from src.infrastructure.db.repositories.fhir.patient_repo_sqlalchemy import (
-    SQLAlchemyPatientRepository,
-)
-from src.interfaces.api.deps import get_current_user, get_db, require_role
-
-router = APIRouter()
+from src.interfaces.api.tracing import TracedRoute
+
+router = APIRouter(route_class=TracedRoute)
+
+# FHIR CapabilityStatement (/fhir/metadata)
+router.include_router(capability_router)
+
+# Single-flight for hot reads, enabled per route by COALESCE_ROUTES
+patient_reads = SingleFlight("get_patient")
+patient_searches = SingleFlight("search_patients")
+encounter_reads = SingleFlight("get_encounter")
+encounter_searches = SingleFlight("search_encounters")
+observation_reads = SingleFlight("get_observation")
+observation_searches = SingleFlight("search_observations")
+
+def _http_errors(value_error_status: int) -> Callable[[Exception], Exception]:
+    """The HTTP error a route raises for a controller error; for coalesced requests, whose errors come after the route returned"""
+    def to_http(e: Exception) -> Exception:
+        if isinstance(e, ValueError) and not isinstance(e, ValidationError):
+            return HTTPException(status_code=value_error_status, detail=str(e))
+        if isinstance(e, PermissionError):
+            return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+        return e
+    return to_http
 
 # Health check
 @router.get("/health")
+@query_budget(statements=1)
 def health_check(db: Session = Depends(get_db)):
     """Health check endpoint"""
     try:
@@ -57,16 +102,12 @@ def health_check(db: Session = Depends(get_db)):
 
 # Auth endpoints
 @router.post("/auth/login", response_model=TokenResponse)
+@query_budget(statements=2)
 def login(
     request: LoginRequest,
-    db: Session = Depends(get_db)
+    auth_controller: AuthController = Depends(get_auth_controller)
 ):
     """Login endpoint"""
-    user_repo = SQLAlchemyUserRepository(db)
-    password_service = PasswordService()
-    jwt_service = JWTService()
-    auth_controller = AuthController(user_repo, password_service, jwt_service)
-
     try:
         return auth_controller.login(request)
     except ValueError as e:
@@ -74,8 +115,31 @@ def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e)
         )
+    except PasswordHashPoolFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+
+@router.post("/auth/logout", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(statements=2)
+def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+    jwt_service: JWTService = Depends(get_jwt_service)
+):
+    """Revoke the bearer token used for this request"""
+    try:
+        jwt_service.revoke_token(token)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
 @router.get("/auth/me", response_model=MeResponse)
+@query_budget(statements=1)
 def get_me(current_user: User = Depends(get_current_user)):
     """Get current user profile"""
     return MeResponse(
@@ -87,88 +151,14 @@ def get_me(current_user: User = Depends(get_current_user)):
         updated_at=current_user.updated_at
     )
 
-# FHIR endpoints
-@router.get("/fhir/metadata")
-def get_metadata():
-    """FHIR CapabilityStatement endpoint"""
-    from datetime import datetime
-    return {
-        "resourceType": "CapabilityStatement",
-        "status": "active",
-        "date": datetime.now().isoformat(),
-        "publisher": "FHIR Simulation Server",
-        "description": "A lightweight FHIR R4 server for simulation purposes",
-        "fhirVersion": "4.0.1",
-        "kind": "instance",
-        "software": {"name": "FHIR Simulation Server", "version": "1.0.0"},
-        "implementation": {"url": "http://localhost:8000/api/fhir"},
-        "rest": [
-            {
-                "mode": "server",
-                "resource": [
-                    {
-                        "type": "Patient",
-                        "interaction": [
-                            {"code": "read"},
-                            {"code": "vread"},
-                            {"code": "update"},
-                            {"code": "patch"},
-                            {"code": "delete"},
-                            {"code": "history-instance"},
-                            {"code": "create"},
-                            {"code": "search-type"}
-                        ],
-                        "searchParam": [
-                            {"name": "name", "type": "string"},
-                            {"name": "identifier", "type": "token"}
-                        ]
-                    },
-                    {
-                        "type": "Encounter",
-                        "interaction": [
-                            {"code": "read"},
-                            {"code": "vread"},
-                            {"code": "update"},
-                            {"code": "patch"},
-                            {"code": "delete"},
-                            {"code": "history-instance"},
-                            {"code": "create"},
-                            {"code": "search-type"}
-                        ],
-                        "searchParam": [
-                            {"name": "status", "type": "token"},
-                            {"name": "subject", "type": "reference"},
-                            {"name": "date", "type": "date"}
-                        ]
-                    },
-                    {
-                        "type": "Observation",
-                        "interaction": [
-                            {"code": "read"},
-                            {"code": "vread"},
-                            {"code": "update"},
-                            {"code": "patch"},
-                            {"code": "delete"},
-                            {"code": "history-instance"},
-                            {"code": "create"},
-                            {"code": "search-type"}
-                        ],
-                        "searchParam": [
-                            {"name": "code", "type": "token"},
-                            {"name": "date", "type": "date"},
-                            {"name": "subject", "type": "reference"}
-                        ]
-                    }
-                ]
-            }
-        ]
-    }
-
 # Patient endpoints
 @router.get("/fhir/Patient/{patient_id}", response_model=PatientResponse)
+@query_budget(statements=2)
 def get_patient(
     patient_id: str,
-    db: Session = Depends(get_db),
+    patient_controller: PatientController = Depends(get_patient_controller),
+    media_type: str = Depends(response_format),
+    db_target: str = Depends(get_db_target),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific patient by ID"""
@@ -180,11 +170,12 @@ def get_patient(
             detail="Invalid patient ID format"
         )
 
-    patient_repo = SQLAlchemyPatientRepository(db)
-    patient_controller = PatientController(patient_repo)
-
     try:
-        return patient_controller.get_patient(patient_uuid, current_user)
+        return patient_reads.response(
+            (patient_uuid, current_user.role.value, media_type, db_target, search_cache.generation("Patient")),
+            lambda: resource_response(patient_controller.get_patient(patient_uuid, current_user), media_type),
+            _http_errors(status.HTTP_404_NOT_FOUND),
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -197,15 +188,13 @@ def get_patient(
         )
 
 @router.post("/fhir/Patient", response_model=PatientResponse)
+@query_budget(statements=3)
 def create_patient(
     request: PatientCreateRequest,
-    db: Session = Depends(get_db),
+    patient_controller: PatientController = Depends(get_patient_controller),
     current_user: User = Depends(require_role(UserRole.CLINICIAN))
 ):
     """Create a new patient"""
-    patient_repo = SQLAlchemyPatientRepository(db)
-    patient_controller = PatientController(patient_repo)
-
     try:
         return patient_controller.create_patient(request, current_user)
     except PermissionError as e:
@@ -215,20 +204,49 @@ def create_patient(
         )
 
 @router.get("/fhir/Patient", response_model=PatientBundle)
+@query_budget(statements=3)
 def search_patients(
     name: Optional[str] = Query(None),
     identifier: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    patient_controller: PatientController = Depends(get_patient_controller),
+    last_updated: Optional[List[str]] = Query(None, alias="_lastUpdated", description="Repeatable, e.g. ge2024-01-01"),
+    total_mode: str = Query(settings.SEARCH_TOTAL_DEFAULT, alias="_total", pattern="^(none|estimate|accurate)$"),
+    summary: Optional[str] = Query(None, alias="_summary", pattern="^(true|false|count|data)$"),
+    elements: Optional[str] = Query(None, alias="_elements", description="Comma-separated element names"),
+    sort: Optional[str] = Query(None, alias="_sort", description="Comma-separated sort keys, \"-\" for descending"),
+    count: Optional[int] = Query(None, alias="_count", ge=0, le=settings.SEARCH_COUNT_MAX),
+    media_type: str = Depends(response_format),
+    db_target: str = Depends(get_db_target),
     current_user: User = Depends(get_current_user)
 ):
     """Search patients"""
-    patient_repo = SQLAlchemyPatientRepository(db)
-    patient_controller = PatientController(patient_repo)
+    search_request = PatientSearchRequest(
+        name=name, identifier=identifier,
+        summary=summary, elements=elements.split(",") if elements is not None else None,
+        sort=sort.split(",") if sort else None, count=count, last_updated=last_updated
+    )
 
-    search_request = PatientSearchRequest(name=name, identifier=identifier)
+    def page() -> Response:
+        if summary == "count":
+            # Only the count: no rows are read
+            count_mode = "estimate" if total_mode == "estimate" else "accurate"
+            total = patient_controller.count_patients(search_request, current_user, count_mode)
+            return count_response(total, media_type)
+        total = patient_controller.count_patients(search_request, current_user, total_mode)
+        resources = patient_controller.stream_patients(search_request, current_user)
+        return stream_bundle_response(resources, media_type, total, exclude_unset=elements is not None or summary == "true")
 
     try:
-        return patient_controller.search_patients(search_request, current_user)
+        key = search_key("Patient", current_user.role.value, media_type, {**search_request.model_dump(), "_total": total_mode}, db_target)
+        return cached_search_response(key, page, patient_searches, _http_errors(status.HTTP_400_BAD_REQUEST))
+    except ValidationError:
+        # A stored row that does not convert (first row is read here) is a server fault
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except PermissionError as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -237,10 +255,11 @@ def search_patients(
 
 # Patient update
 @router.put("/fhir/Patient/{patient_id}", response_model=PatientResponse)
+@query_budget(statements=4)
 def update_patient(
     patient_id: str,
     request: PatientCreateRequest,
-    db: Session = Depends(get_db),
+    patient_controller: PatientController = Depends(get_patient_controller),
     current_user: User = Depends(get_current_user)
 ):
     try:
@@ -248,19 +267,17 @@ def update_patient(
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid patient ID format")
 
-    patient_repo = SQLAlchemyPatientRepository(db)
-    patient_controller = PatientController(patient_repo)
-
     try:
         return patient_controller.update_patient(patient_uuid, request, current_user)
     except PermissionError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
 
 # Patient delete
-@router.delete("/fhir/Patient/{patient_id}")
+@router.delete("/fhir/Patient/{patient_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(statements=3)
 def delete_patient(
     patient_id: str,
-    db: Session = Depends(get_db),
+    patient_controller: PatientController = Depends(get_patient_controller),
     current_user: User = Depends(get_current_user)
 ):
     try:
@@ -268,22 +285,21 @@ def delete_patient(
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid patient ID format")
 
-    patient_repo = SQLAlchemyPatientRepository(db)
-    patient_controller = PatientController(patient_repo)
-
     try:
         ok = patient_controller.delete_patient(patient_uuid, current_user)
         if not ok:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found")
-        return {"deleted": True}
     except PermissionError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
 
 # Encounter endpoints
 @router.get("/fhir/Encounter/{encounter_id}", response_model=EncounterResponse)
+@query_budget(statements=2)
 def get_encounter(
     encounter_id: str,
-    db: Session = Depends(get_db),
+    encounter_controller: EncounterController = Depends(get_encounter_controller),
+    media_type: str = Depends(response_format),
+    db_target: str = Depends(get_db_target),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific encounter by ID"""
@@ -295,11 +311,12 @@ def get_encounter(
             detail="Invalid encounter ID format"
         )
 
-    encounter_repo = SQLAlchemyEncounterRepository(db)
-    encounter_controller = EncounterController(encounter_repo)
-
     try:
-        return encounter_controller.get_encounter(encounter_uuid, current_user)
+        return encounter_reads.response(
+            (encounter_uuid, current_user.role.value, media_type, db_target, search_cache.generation("Encounter")),
+            lambda: resource_response(encounter_controller.get_encounter(encounter_uuid, current_user), media_type),
+            _http_errors(status.HTTP_404_NOT_FOUND),
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -312,15 +329,13 @@ def get_encounter(
         )
 
 @router.post("/fhir/Encounter", response_model=EncounterResponse)
+@query_budget(statements=4)
 def create_encounter(
     request: EncounterCreateRequest,
-    db: Session = Depends(get_db),
+    encounter_controller: EncounterController = Depends(get_encounter_controller),
     current_user: User = Depends(require_role(UserRole.CLINICIAN))
 ):
     """Create a new encounter"""
-    encounter_repo = SQLAlchemyEncounterRepository(db)
-    encounter_controller = EncounterController(encounter_repo)
-
     try:
         return encounter_controller.create_encounter(request, current_user)
     except PermissionError as e:
@@ -330,21 +345,51 @@ def create_encounter(
         )
 
 @router.get("/fhir/Encounter", response_model=EncounterBundle)
+@query_budget(statements=3)
 def search_encounters(
-    status: Optional[str] = Query(None),
+    # Not named status: that would shadow fastapi.status in the handler
+    encounter_status: Optional[str] = Query(None, alias="status"),
     subject: Optional[str] = Query(None),
     date: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    encounter_controller: EncounterController = Depends(get_encounter_controller),
+    last_updated: Optional[List[str]] = Query(None, alias="_lastUpdated", description="Repeatable, e.g. ge2024-01-01"),
+    total_mode: str = Query(settings.SEARCH_TOTAL_DEFAULT, alias="_total", pattern="^(none|estimate|accurate)$"),
+    summary: Optional[str] = Query(None, alias="_summary", pattern="^(true|false|count|data)$"),
+    elements: Optional[str] = Query(None, alias="_elements", description="Comma-separated element names"),
+    sort: Optional[str] = Query(None, alias="_sort", description="Comma-separated sort keys, \"-\" for descending"),
+    count: Optional[int] = Query(None, alias="_count", ge=0, le=settings.SEARCH_COUNT_MAX),
+    media_type: str = Depends(response_format),
+    db_target: str = Depends(get_db_target),
     current_user: User = Depends(get_current_user)
 ):
     """Search encounters"""
-    encounter_repo = SQLAlchemyEncounterRepository(db)
-    encounter_controller = EncounterController(encounter_repo)
+    search_request = EncounterSearchRequest(
+        status=encounter_status, subject=subject, date=date,
+        summary=summary, elements=elements.split(",") if elements is not None else None,
+        sort=sort.split(",") if sort else None, count=count, last_updated=last_updated
+    )
 
-    search_request = EncounterSearchRequest(status=status, subject=subject, date=date)
+    def page() -> Response:
+        if summary == "count":
+            # Only the count: no rows are read
+            count_mode = "estimate" if total_mode == "estimate" else "accurate"
+            total = encounter_controller.count_encounters(search_request, current_user, count_mode)
+            return count_response(total, media_type)
+        total = encounter_controller.count_encounters(search_request, current_user, total_mode)
+        resources = encounter_controller.stream_encounters(search_request, current_user)
+        return stream_bundle_response(resources, media_type, total, exclude_unset=elements is not None or summary == "true")
 
     try:
-        return encounter_controller.search_encounters(search_request, current_user)
+        key = search_key("Encounter", current_user.role.value, media_type, {**search_request.model_dump(), "_total": total_mode}, db_target)
+        return cached_search_response(key, page, encounter_searches, _http_errors(status.HTTP_400_BAD_REQUEST))
+    except ValidationError:
+        # A stored row that does not convert (first row is read here) is a server fault
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except PermissionError as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -353,10 +398,11 @@ def search_encounters(
 
 # Encounter update
 @router.put("/fhir/Encounter/{encounter_id}", response_model=EncounterResponse)
+@query_budget(statements=5)
 def update_encounter(
     encounter_id: str,
     request: EncounterCreateRequest,
-    db: Session = Depends(get_db),
+    encounter_controller: EncounterController = Depends(get_encounter_controller),
     current_user: User = Depends(get_current_user)
 ):
     try:
@@ -364,19 +410,17 @@ def update_encounter(
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid encounter ID format")
 
-    encounter_repo = SQLAlchemyEncounterRepository(db)
-    encounter_controller = EncounterController(encounter_repo)
-
     try:
         return encounter_controller.update_encounter(encounter_uuid, request, current_user)
     except PermissionError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
 
 # Encounter delete
-@router.delete("/fhir/Encounter/{encounter_id}")
+@router.delete("/fhir/Encounter/{encounter_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(statements=4)
 def delete_encounter(
     encounter_id: str,
-    db: Session = Depends(get_db),
+    encounter_controller: EncounterController = Depends(get_encounter_controller),
     current_user: User = Depends(get_current_user)
 ):
     try:
@@ -384,22 +428,21 @@ def delete_encounter(
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid encounter ID format")
 
-    encounter_repo = SQLAlchemyEncounterRepository(db)
-    encounter_controller = EncounterController(encounter_repo)
-
     try:
         ok = encounter_controller.delete_encounter(encounter_uuid, current_user)
         if not ok:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Encounter not found")
-        return {"deleted": True}
     except PermissionError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
 
 # Observation endpoints
 @router.get("/fhir/Observation/{observation_id}", response_model=ObservationResponse)
+@query_budget(statements=2)
 def get_observation(
     observation_id: str,
-    db: Session = Depends(get_db),
+    observation_controller: ObservationController = Depends(get_observation_controller),
+    media_type: str = Depends(response_format),
+    db_target: str = Depends(get_db_target),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific observation by ID"""
@@ -411,11 +454,12 @@ def get_observation(
             detail="Invalid observation ID format"
         )
 
-    observation_repo = SQLAlchemyObservationRepository(db)
-    observation_controller = ObservationController(observation_repo)
-
     try:
-        return observation_controller.get_observation(observation_uuid, current_user)
+        return observation_reads.response(
+            (observation_uuid, current_user.role.value, media_type, db_target, search_cache.generation("Observation")),
+            lambda: resource_response(observation_controller.get_observation(observation_uuid, current_user), media_type),
+            _http_errors(status.HTTP_404_NOT_FOUND),
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -428,15 +472,13 @@ def get_observation(
         )
 
 @router.post("/fhir/Observation", response_model=ObservationResponse)
+@query_budget(statements=5)
 def create_observation(
     request: ObservationCreateRequest,
-    db: Session = Depends(get_db),
+    observation_controller: ObservationController = Depends(get_observation_controller),
     current_user: User = Depends(require_role(UserRole.CLINICIAN))
 ):
     """Create a new observation"""
-    observation_repo = SQLAlchemyObservationRepository(db)
-    observation_controller = ObservationController(observation_repo)
-
     try:
         return observation_controller.create_observation(request, current_user)
     except PermissionError as e:
@@ -446,21 +488,50 @@ def create_observation(
         )
 
 @router.get("/fhir/Observation", response_model=ObservationBundle)
+@query_budget(statements=3)
 def search_observations(
     code: Optional[str] = Query(None),
     date: Optional[str] = Query(None),
     subject: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    observation_controller: ObservationController = Depends(get_observation_controller),
+    last_updated: Optional[List[str]] = Query(None, alias="_lastUpdated", description="Repeatable, e.g. ge2024-01-01"),
+    total_mode: str = Query(settings.SEARCH_TOTAL_DEFAULT, alias="_total", pattern="^(none|estimate|accurate)$"),
+    summary: Optional[str] = Query(None, alias="_summary", pattern="^(true|false|count|data)$"),
+    elements: Optional[str] = Query(None, alias="_elements", description="Comma-separated element names"),
+    sort: Optional[str] = Query(None, alias="_sort", description="Comma-separated sort keys, \"-\" for descending"),
+    count: Optional[int] = Query(None, alias="_count", ge=0, le=settings.SEARCH_COUNT_MAX),
+    media_type: str = Depends(response_format),
+    db_target: str = Depends(get_db_target),
     current_user: User = Depends(get_current_user)
 ):
     """Search observations"""
-    observation_repo = SQLAlchemyObservationRepository(db)
-    observation_controller = ObservationController(observation_repo)
+    search_request = ObservationSearchRequest(
+        code=code, date=date, subject=subject,
+        summary=summary, elements=elements.split(",") if elements is not None else None,
+        sort=sort.split(",") if sort else None, count=count, last_updated=last_updated
+    )
 
-    search_request = ObservationSearchRequest(code=code, date=date, subject=subject)
+    def page() -> Response:
+        if summary == "count":
+            # Only the count: no rows are read
+            count_mode = "estimate" if total_mode == "estimate" else "accurate"
+            total = observation_controller.count_observations(search_request, current_user, count_mode)
+            return count_response(total, media_type)
+        total = observation_controller.count_observations(search_request, current_user, total_mode)
+        resources = observation_controller.stream_observations(search_request, current_user)
+        return stream_bundle_response(resources, media_type, total, exclude_unset=elements is not None or summary == "true")
 
     try:
-        return observation_controller.search_observations(search_request, current_user)
+        key = search_key("Observation", current_user.role.value, media_type, {**search_request.model_dump(), "_total": total_mode}, db_target)
+        return cached_search_response(key, page, observation_searches, _http_errors(status.HTTP_400_BAD_REQUEST))
+    except ValidationError:
+        # A stored row that does not convert (first row is read here) is a server fault
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except PermissionError as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -469,10 +540,11 @@ def search_observations(
 
 # Observation update
 @router.put("/fhir/Observation/{observation_id}", response_model=ObservationResponse)
+@query_budget(statements=6)
 def update_observation(
     observation_id: str,
     request: ObservationCreateRequest,
-    db: Session = Depends(get_db),
+    observation_controller: ObservationController = Depends(get_observation_controller),
     current_user: User = Depends(get_current_user)
 ):
     try:
@@ -480,19 +552,17 @@ def update_observation(
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid observation ID format")
 
-    observation_repo = SQLAlchemyObservationRepository(db)
-    observation_controller = ObservationController(observation_repo)
-
     try:
         return observation_controller.update_observation(observation_uuid, request, current_user)
     except PermissionError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
 
 # Observation delete
-@router.delete("/fhir/Observation/{observation_id}")
+@router.delete("/fhir/Observation/{observation_id}", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(statements=3)
 def delete_observation(
     observation_id: str,
-    db: Session = Depends(get_db),
+    observation_controller: ObservationController = Depends(get_observation_controller),
     current_user: User = Depends(get_current_user)
 ):
     try:
@@ -500,35 +570,153 @@ def delete_observation(
     except ValueError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid observation ID format")
 
-    observation_repo = SQLAlchemyObservationRepository(db)
-    observation_controller = ObservationController(observation_repo)
-
     try:
         ok = observation_controller.delete_observation(observation_uuid, current_user)
         if not ok:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Observation not found")
-        return {"deleted": True}
     except PermissionError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
 
-
-    search_request = PatientSearchRequest(name=name, identifier=identifier)
+# Incremental sync feed
+@router.get("/fhir/_changes", response_model=ChangeBundle)
+@query_budget(statements=6)
+def list_changes(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="next cursor of the previous page; omit to start from the beginning"),
+    count: int = Query(settings.CHANGE_FEED_PAGE_SIZE, alias="_count", ge=1, le=settings.SEARCH_COUNT_MAX),
+    types: Optional[str] = Query(None, alias="_type", description="Comma-separated resource types"),
+    change_feed_controller: ChangeFeedController = Depends(get_change_feed_controller),
+    current_user: User = Depends(get_current_user)
+):
+    """Resources created, updated or deleted after a cursor, oldest first"""
+    feed_request = ChangeFeedRequest(cursor=cursor, count=count, types=types.split(",") if types else None)
 
     try:
-        return patient_controller.search_patients(search_request, current_user)
+        return change_feed_controller.list_changes(feed_request, current_user, str(request.url.replace(query="")))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except PermissionError as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=str(e)
         )
 
+# Asynchronous operations (FHIR async request pattern): the kick-off answers
+# 202 with Content-Location pointing at the job's status endpoint
+def _accepted(request: Request, job: Job) -> Response:
+    status_url = str(request.url_for("get_job_status", job_id=str(job.id)))
+    return Response(status_code=status.HTTP_202_ACCEPTED, headers={"Content-Location": status_url})
 
-    search_request = PatientSearchRequest(name=name, identifier=identifier)
+def _job_uuid(job_id: str) -> UUID:
+    try:
+        return UUID(job_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid job ID format")
+
+@router.get("/fhir/$export", status_code=status.HTTP_202_ACCEPTED)
+@query_budget(statements=3)
+@primary_only
+def start_export(
+    request: Request,
+    types: Optional[str] = Query(None, alias="_type", description="Comma-separated resource types"),
+    since: Optional[str] = Query(None, alias="_since", description="Only resources changed after this instant"),
+    job_controller: JobController = Depends(get_job_controller),
+    current_user: User = Depends(get_current_user)
+):
+    """Start a system-level Bulk Data export to NDJSON files"""
+    export_request = ExportRequest(types=types.split(",") if types else None, since=since, request_url=str(request.url))
 
     try:
-        return patient_controller.search_patients(search_request, current_user)
+        return _accepted(request, job_controller.start_export(export_request, current_user))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except PermissionError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e)
-        )
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+@router.post("/fhir/$purge", status_code=status.HTTP_202_ACCEPTED)
+@query_budget(statements=3)
+def start_purge(
+    request: Request,
+    job_controller: JobController = Depends(get_job_controller),
+    current_user: User = Depends(get_current_user)
+):
+    """Purge every tombstone past its retention now, instead of waiting for the purger"""
+    try:
+        return _accepted(request, job_controller.start_purge(current_user))
+    except PermissionError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+@router.get("/fhir/_jobs/{job_id}", name="get_job_status")
+@query_budget(statements=2)
+@primary_only
+def get_job_status(
+    job_id: str,
+    request: Request,
+    job_controller: JobController = Depends(get_job_controller),
+    current_user: User = Depends(get_current_user)
+):
+    """202 with X-Progress while the job runs, then its result (the manifest for exports)"""
+    try:
+        job = job_controller.get_job(_job_uuid(job_id), current_user)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+
+    if job.status in (JobStatus.QUEUED, JobStatus.RUNNING):
+        progress = f"{job.status.value} {job.progress:.0%}"
+        if job.progress_message:
+            progress += f": {job.progress_message}"
+        return Response(status_code=status.HTTP_202_ACCEPTED, headers={
+            "X-Progress": progress,
+            "Retry-After": str(max(int(settings.JOB_POLL_SECONDS), 1)),
+        })
+    if job.status == JobStatus.FAILED:
+        return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content={
+            "resourceType": "OperationOutcome",
+            "issue": [{"severity": "error", "code": "exception", "diagnostics": job.error}]
+        })
+    if job.kind == EXPORT_JOB:
+        manifest = job_controller.export_manifest(job, str(request.url.replace(query="")))
+        return JSONResponse(manifest.model_dump())
+    return JSONResponse(job.result or {})
+
+@router.delete("/fhir/_jobs/{job_id}", status_code=status.HTTP_202_ACCEPTED)
+@query_budget(statements=4)
+def cancel_job(
+    job_id: str,
+    job_controller: JobController = Depends(get_job_controller),
+    current_user: User = Depends(get_current_user)
+):
+    """Cancel a job; a running one stops at its next progress report"""
+    try:
+        job_controller.cancel_job(_job_uuid(job_id), current_user)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    return Response(status_code=status.HTTP_202_ACCEPTED)
+
+@router.get("/fhir/_jobs/{job_id}/{file_name}")
+@query_budget(statements=2)
+@primary_only
+def get_export_file(
+    job_id: str,
+    file_name: str,
+    job_controller: JobController = Depends(get_job_controller),
+    current_user: User = Depends(get_current_user)
+):
+    """One NDJSON file of a completed export"""
+    try:
+        job = job_controller.export_file(_job_uuid(job_id), file_name, current_user)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except PermissionError as e:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+    # The export module is only needed by this route and the job runner; keep it out of worker start-up
+    from src.infrastructure.db.bulk_export import export_path
+
+    return FileResponse(export_path(job.id, file_name), media_type=FHIR_NDJSON)
@@ -0,0 +1,123 @@
+import functools
+import inspect
+import time
+from typing import Callable
+
+from fastapi.routing import APIRoute
+
+from src.domain.bundle.services import JWTService, PasswordService
+from src.domain.fhir.encounter.controller import EncounterController
+from src.domain.fhir.observation.controller import ObservationController
+from src.domain.fhir.patient.controller import PatientController
+from src.infrastructure.db.repositories.auth_repo_sqlalchemy import SQLAlchemyUserRepository
+from src.infrastructure.db.repositories.fhir.encounter_repo_sqlalchemy import SQLAlchemyEncounterRepository
+from src.infrastructure.db.repositories.fhir.observation_repo_sqlalchemy import SQLAlchemyObservationRepository
+from src.infrastructure.db.repositories.fhir.patient_repo_sqlalchemy import SQLAlchemyPatientRepository
+from src.infrastructure.observability.tracing import SPAN_KIND_SERVER, current_span, instrument_class, tracer
+
+# Layers wrapped in Class.method spans when tracing is enabled
+INSTRUMENTED_CLASSES = [
+    (PatientController, {"fhir.resource_type": "Patient"}),
+    (EncounterController, {"fhir.resource_type": "Encounter"}),
+    (ObservationController, {"fhir.resource_type": "Observation"}),
+    (SQLAlchemyPatientRepository, {"fhir.resource_type": "Patient"}),
+    (SQLAlchemyEncounterRepository, {"fhir.resource_type": "Encounter"}),
+    (SQLAlchemyObservationRepository, {"fhir.resource_type": "Observation"}),
+    (SQLAlchemyUserRepository, None),
+    (JWTService, None),
+    (PasswordService, None),
+]
+
+# Set on the server span by the endpoint wrapper, consumed when the response starts
+HANDLER_ENDED_AT = "_handler_ended_at"
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware opening the server span and continuing incoming traceparent"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope["headers"]:
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        attributes = {"http.method": scope["method"], "http.target": scope["path"]}
+        with tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}", attributes, SPAN_KIND_SERVER, traceparent
+        ) as span:
+
+            async def send_traced(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    _record_serialization(span)
+                    message["headers"] = [*message.get("headers", []), (b"traceparent", span.traceparent().encode())]
+                await send(message)
+
+            await self.app(scope, receive, send_traced)
+
+def _record_serialization(span) -> None:
+    """Emit the gap between the handler returning and the response starting"""
+    handler_ended_at = span.attributes.pop(HANDLER_ENDED_AT, None)
+    if handler_ended_at is None:
+        return
+    child = tracer.start_span("response.serialize")
+    child.start_time_unix_nano = handler_ended_at
+    child.end()
+
+
+class TracedRoute(APIRoute):
+    """Route whose endpoint runs in a handler span; the rest is auth and serialization"""
+
+    def get_route_handler(self) -> Callable:
+        if tracer.enabled and not getattr(self.dependant.call, "__traced__", False):
+            self.dependant.call = _trace_endpoint(self.dependant.call, self.path_format)
+        handler = super().get_route_handler()
+        if not tracer.enabled:
+            return handler
+
+        async def traced_handler(request):
+            # Name the server span after the route template, not the raw path
+            span = current_span()
+            span.name = f"{request.method} {self.path_format}"
+            span.set_attribute("http.route", self.path_format)
+            return await handler(request)
+        return traced_handler
+
+def _trace_endpoint(endpoint: Callable, path_format: str) -> Callable:
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def async_wrapper(*args, **kwargs):
+            server_span = current_span()
+            try:
+                with tracer.start_as_current_span("route.handler", {"http.route": path_format}):
+                    return await endpoint(*args, **kwargs)
+            finally:
+                server_span.set_attribute(HANDLER_ENDED_AT, time.time_ns())
+        async_wrapper.__traced__ = True
+        return async_wrapper
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        server_span = current_span()
+        try:
+            with tracer.start_as_current_span("route.handler", {"http.route": path_format}):
+                return endpoint(*args, **kwargs)
+        finally:
+            server_span.set_attribute(HANDLER_ENDED_AT, time.time_ns())
+    wrapper.__traced__ = True
+    return wrapper
+
+
+def instrument_tracing(app) -> None:
+    """Wrap controllers, repositories and auth services in spans and add the middleware"""
+    for cls, attributes in INSTRUMENTED_CLASSES:
+        instrument_class(cls, attributes)
+    app.add_middleware(TracingMiddleware)
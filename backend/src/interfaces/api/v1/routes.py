@@ -3,26 +3,40 @@ from sqlalchemy.orm import Session
 from typing import Optional
 from uuid import UUID
 
-from ..deps import get_db, get_current_user, require_role
-from ...domain.auth.entities import User, UserRole
-from ...domain.auth.controller import AuthController
-from ...domain.auth.view import LoginRequest, TokenResponse, MeResponse
-from ...domain.fhir.patient.controller import PatientController
-from ...domain.fhir.patient.view import PatientCreateRequest, PatientResponse, PatientSearchRequest, Bundle as PatientBundle
-from ...domain.fhir.encounter.controller import EncounterController
-from ...domain.fhir.encounter.view import EncounterCreateRequest, EncounterResponse, EncounterSearchRequest, Bundle as EncounterBundle
-from ...domain.fhir.observation.controller import ObservationController
-from ...domain.fhir.observation.view import ObservationCreateRequest, ObservationResponse, ObservationSearchRequest, Bundle as ObservationBundle
-from ...infrastructure.db.repositories.auth_repo_sqlalchemy import SQLAlchemyUserRepository
-from ...infrastructure.db.repositories.fhir.patient_repo_sqlalchemy import SQLAlchemyPatientRepository
-from ...infrastructure.db.repositories.fhir.encounter_repo_sqlalchemy import SQLAlchemyEncounterRepository
-from ...infrastructure.db.repositories.fhir.observation_repo_sqlalchemy import SQLAlchemyObservationRepository
-from ...domain.bundle.services import PasswordService, JWTService
-
-router = APIRouter()
+from ..deps import (
+    get_auth_controller,
+    get_current_user,
+    get_db,
+    get_encounter_controller,
+    get_jwt_service,
+    get_observation_controller,
+    get_patient_controller,
+    oauth2_scheme,
+    require_role,
+)
+from ....domain.auth.entities import User, UserRole
+from ....domain.auth.controller import AuthController
+from ....domain.auth.view import LoginRequest, TokenResponse, MeResponse
+from ....domain.fhir.patient.controller import PatientController
+from ....domain.fhir.patient.view import PatientCreateRequest, PatientResponse, PatientSearchRequest, Bundle as PatientBundle
+from ....domain.fhir.encounter.controller import EncounterController
+from ....domain.fhir.encounter.view import EncounterCreateRequest, EncounterResponse, EncounterSearchRequest, Bundle as EncounterBundle
+from ....domain.fhir.observation.controller import ObservationController
+from ....domain.fhir.observation.view import ObservationCreateRequest, ObservationResponse, ObservationSearchRequest, Bundle as ObservationBundle
+from ....domain.bundle.services import JWTService, PasswordHashPoolFull
+from ....infrastructure.db.query_budget import query_budget
+from ..capability import router as capability_router
+from ..formats import bundle_response, resource_response, response_format
+from ..tracing import TracedRoute
+
+router = APIRouter(route_class=TracedRoute)
+
+# FHIR CapabilityStatement (/fhir/metadata)
+router.include_router(capability_router)
 
 # Health check
 @router.get("/health")
+@query_budget(statements=1)
 async def health_check(db: Session = Depends(get_db)):
     """Health check endpoint"""
     try:
@@ -33,25 +47,44 @@ async def health_check(db: Session = Depends(get_db)):
 
 # Auth endpoints
 @router.post("/auth/login", response_model=TokenResponse)
+@query_budget(statements=2)
 async def login(
     request: LoginRequest,
-    db: Session = Depends(get_db)
+    auth_controller: AuthController = Depends(get_auth_controller)
 ):
     """Login endpoint"""
-    user_repo = SQLAlchemyUserRepository(db)
-    password_service = PasswordService()
-    jwt_service = JWTService()
-    auth_controller = AuthController(user_repo, password_service, jwt_service)
-
     try:
-        return await auth_controller.login(request)
+        return await auth_controller.login_async(request)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=str(e)
         )
+    except PasswordHashPoolFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+
+@router.post("/auth/logout", status_code=status.HTTP_204_NO_CONTENT)
+@query_budget(statements=2)
+async def logout(
+    token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_user),
+    jwt_service: JWTService = Depends(get_jwt_service)
+):
+    """Revoke the bearer token used for this request"""
+    try:
+        jwt_service.revoke_token(token)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
 @router.get("/auth/me", response_model=MeResponse)
+@query_budget(statements=1)
 async def get_me(current_user: User = Depends(get_current_user)):
     """Get current user profile"""
     return MeResponse(
@@ -63,88 +96,13 @@ async def get_me(current_user: User = Depends(get_current_user)):
         updated_at=current_user.updated_at
     )
 
-# FHIR endpoints
-@router.get("/fhir/metadata")
-async def get_metadata():
-    """FHIR CapabilityStatement endpoint"""
-    from datetime import datetime
-    return {
-        "resourceType": "CapabilityStatement",
-        "status": "active",
-        "date": datetime.now().isoformat(),
-        "publisher": "FHIR Simulation Server",
-        "description": "A lightweight FHIR R4 server for simulation purposes",
-        "fhirVersion": "4.0.1",
-        "kind": "instance",
-        "software": {"name": "FHIR Simulation Server", "version": "1.0.0"},
-        "implementation": {"url": "http://localhost:8000/api/v1/fhir"},
-        "rest": [
-            {
-                "mode": "server",
-                "resource": [
-                    {
-                        "type": "Patient",
-                        "interaction": [
-                            {"code": "read"},
-                            {"code": "vread"},
-                            {"code": "update"},
-                            {"code": "patch"},
-                            {"code": "delete"},
-                            {"code": "history-instance"},
-                            {"code": "create"},
-                            {"code": "search-type"}
-                        ],
-                        "searchParam": [
-                            {"name": "name", "type": "string"},
-                            {"name": "identifier", "type": "token"}
-                        ]
-                    },
-                    {
-                        "type": "Encounter",
-                        "interaction": [
-                            {"code": "read"},
-                            {"code": "vread"},
-                            {"code": "update"},
-                            {"code": "patch"},
-                            {"code": "delete"},
-                            {"code": "history-instance"},
-                            {"code": "create"},
-                            {"code": "search-type"}
-                        ],
-                        "searchParam": [
-                            {"name": "status", "type": "token"},
-                            {"name": "subject", "type": "reference"},
-                            {"name": "date", "type": "date"}
-                        ]
-                    },
-                    {
-                        "type": "Observation",
-                        "interaction": [
-                            {"code": "read"},
-                            {"code": "vread"},
-                            {"code": "update"},
-                            {"code": "patch"},
-                            {"code": "delete"},
-                            {"code": "history-instance"},
-                            {"code": "create"},
-                            {"code": "search-type"}
-                        ],
-                        "searchParam": [
-                            {"name": "code", "type": "token"},
-                            {"name": "date", "type": "date"},
-                            {"name": "subject", "type": "reference"}
-                        ]
-                    }
-                ]
-            }
-        ]
-    }
-
 # Patient endpoints
 @router.get("/fhir/Patient/{patient_id}", response_model=PatientResponse)
+@query_budget(statements=2)
 async def get_patient(
     patient_id: str,
-    db: Session = Depends(get_db),
+    patient_controller: PatientController = Depends(get_patient_controller),
+    media_type: str = Depends(response_format),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific patient by ID"""
@@ -156,11 +114,8 @@ async def get_patient(
             detail="Invalid patient ID format"
         )
 
-    patient_repo = SQLAlchemyPatientRepository(db)
-    patient_controller = PatientController(patient_repo)
-
     try:
-        return await patient_controller.get_patient(patient_uuid, current_user)
+        return resource_response(await patient_controller.get_patient(patient_uuid, current_user), media_type)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -173,15 +128,13 @@ async def get_patient(
         )
 
 @router.post("/fhir/Patient", response_model=PatientResponse)
+@query_budget(statements=3)
 async def create_patient(
     request: PatientCreateRequest,
-    db: Session = Depends(get_db),
+    patient_controller: PatientController = Depends(get_patient_controller),
     current_user: User = Depends(require_role(UserRole.CLINICIAN))
 ):
     """Create a new patient"""
-    patient_repo = SQLAlchemyPatientRepository(db)
-    patient_controller = PatientController(patient_repo)
-
     try:
         return await patient_controller.create_patient(request, current_user)
     except PermissionError as e:
@@ -191,20 +144,19 @@ async def create_patient(
         )
 
 @router.get("/fhir/Patient", response_model=PatientBundle)
+@query_budget(statements=2)
 async def search_patients(
     name: Optional[str] = Query(None),
     identifier: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    patient_controller: PatientController = Depends(get_patient_controller),
+    media_type: str = Depends(response_format),
     current_user: User = Depends(get_current_user)
 ):
     """Search patients"""
-    patient_repo = SQLAlchemyPatientRepository(db)
-    patient_controller = PatientController(patient_repo)
-
     search_request = PatientSearchRequest(name=name, identifier=identifier)
 
     try:
-        return await patient_controller.search_patients(search_request, current_user)
+        return bundle_response(await patient_controller.search_patients(search_request, current_user), media_type)
     except PermissionError as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -213,9 +165,11 @@ async def search_patients(
 
 # Encounter endpoints
 @router.get("/fhir/Encounter/{encounter_id}", response_model=EncounterResponse)
+@query_budget(statements=2)
 async def get_encounter(
     encounter_id: str,
-    db: Session = Depends(get_db),
+    encounter_controller: EncounterController = Depends(get_encounter_controller),
+    media_type: str = Depends(response_format),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific encounter by ID"""
@@ -227,11 +181,8 @@ async def get_encounter(
             detail="Invalid encounter ID format"
         )
 
-    encounter_repo = SQLAlchemyEncounterRepository(db)
-    encounter_controller = EncounterController(encounter_repo)
-
     try:
-        return await encounter_controller.get_encounter(encounter_uuid, current_user)
+        return resource_response(await encounter_controller.get_encounter(encounter_uuid, current_user), media_type)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -244,15 +195,13 @@ async def get_encounter(
         )
 
 @router.post("/fhir/Encounter", response_model=EncounterResponse)
+@query_budget(statements=4)
 async def create_encounter(
     request: EncounterCreateRequest,
-    db: Session = Depends(get_db),
+    encounter_controller: EncounterController = Depends(get_encounter_controller),
     current_user: User = Depends(require_role(UserRole.CLINICIAN))
 ):
     """Create a new encounter"""
-    encounter_repo = SQLAlchemyEncounterRepository(db)
-    encounter_controller = EncounterController(encounter_repo)
-
     try:
         return await encounter_controller.create_encounter(request, current_user)
     except PermissionError as e:
@@ -262,21 +211,21 @@ async def create_encounter(
         )
 
 @router.get("/fhir/Encounter", response_model=EncounterBundle)
+@query_budget(statements=2)
 async def search_encounters(
-    status: Optional[str] = Query(None),
+    # Not named status: that would shadow fastapi.status in the handler
+    encounter_status: Optional[str] = Query(None, alias="status"),
     subject: Optional[str] = Query(None),
     date: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    encounter_controller: EncounterController = Depends(get_encounter_controller),
+    media_type: str = Depends(response_format),
     current_user: User = Depends(get_current_user)
 ):
     """Search encounters"""
-    encounter_repo = SQLAlchemyEncounterRepository(db)
-    encounter_controller = EncounterController(encounter_repo)
-
-    search_request = EncounterSearchRequest(status=status, subject=subject, date=date)
+    search_request = EncounterSearchRequest(status=encounter_status, subject=subject, date=date)
 
     try:
-        return await encounter_controller.search_encounters(search_request, current_user)
+        return bundle_response(await encounter_controller.search_encounters(search_request, current_user), media_type)
     except PermissionError as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -285,9 +234,11 @@ async def search_encounters(
 
 # Observation endpoints
 @router.get("/fhir/Observation/{observation_id}", response_model=ObservationResponse)
+@query_budget(statements=2)
 async def get_observation(
     observation_id: str,
-    db: Session = Depends(get_db),
+    observation_controller: ObservationController = Depends(get_observation_controller),
+    media_type: str = Depends(response_format),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific observation by ID"""
@@ -299,11 +250,8 @@ async def get_observation(
             detail="Invalid observation ID format"
         )
 
-    observation_repo = SQLAlchemyObservationRepository(db)
-    observation_controller = ObservationController(observation_repo)
-
     try:
-        return await observation_controller.get_observation(observation_uuid, current_user)
+        return resource_response(await observation_controller.get_observation(observation_uuid, current_user), media_type)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -316,15 +264,13 @@ async def get_observation(
         )
 
 @router.post("/fhir/Observation", response_model=ObservationResponse)
+@query_budget(statements=5)
 async def create_observation(
     request: ObservationCreateRequest,
-    db: Session = Depends(get_db),
+    observation_controller: ObservationController = Depends(get_observation_controller),
     current_user: User = Depends(require_role(UserRole.CLINICIAN))
 ):
     """Create a new observation"""
-    observation_repo = SQLAlchemyObservationRepository(db)
-    observation_controller = ObservationController(observation_repo)
-
     try:
         return await observation_controller.create_observation(request, current_user)
     except PermissionError as e:
@@ -334,34 +280,22 @@ async def create_observation(
         )
 
 @router.get("/fhir/Observation", response_model=ObservationBundle)
+@query_budget(statements=2)
 async def search_observations(
     code: Optional[str] = Query(None),
     date: Optional[str] = Query(None),
     subject: Optional[str] = Query(None),
-    db: Session = Depends(get_db),
+    observation_controller: ObservationController = Depends(get_observation_controller),
+    media_type: str = Depends(response_format),
     current_user: User = Depends(get_current_user)
 ):
     """Search observations"""
-    observation_repo = SQLAlchemyObservationRepository(db)
-    observation_controller = ObservationController(observation_repo)
-
     search_request = ObservationSearchRequest(code=code, date=date, subject=subject)
 
     try:
-        return await observation_controller.search_observations(search_request, current_user)
-    except PermissionError as e:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=str(e)
-        )
-
-
-    search_request = PatientSearchRequest(name=name, identifier=identifier)
-
-    try:
-        return await patient_controller.search_patients(search_request, current_user)
+        return bundle_response(await observation_controller.search_observations(search_request, current_user), media_type)
     except PermissionError as e:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=str(e)
-        )
+        )
\ No newline at end of file
@@ -0,0 +1,34 @@
+import os
+from pathlib import Path
+
+import pytest
+
+# Tests that need Postgres run against TEST_DATABASE_URL, migrated to head
+# once per session, and are skipped when it is not set. The app's settings
+# are read at import, so they are pointed at it (and background work that
+# would race the tests is turned off) before any src module is imported.
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+os.environ.setdefault("CHECK_SCHEMA_ON_STARTUP", "false")
+os.environ.setdefault("JOB_WORKERS", "0")
+os.environ.setdefault("PURGE_INTERVAL_SECONDS", "0")
+
+
+@pytest.fixture(scope="session")
+def engine():
+    """The app's primary engine on a migrated test database"""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from alembic import command
+    from alembic.config import Config
+
+    from src.infrastructure.db.session import engine
+
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "src/infrastructure/db/migrations"))
+    command.upgrade(config, "head")
+    return engine
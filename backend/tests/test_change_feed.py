@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+from uuid import uuid4
+
+import pytest
+
+from src.domain.auth.entities import User, UserRole
+from src.domain.fhir.changes.controller import ChangeFeedController
+from src.domain.fhir.changes.entities import Change, format_cursor, parse_cursor
+from src.domain.fhir.changes.repositories import ChangeLogRepository
+from src.domain.fhir.changes.view import ChangeFeedRequest
+from src.domain.fhir.errors import CursorExpired
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+USER = User(uuid4(), "reader@fhir.com", "", UserRole.READ_ONLY, True, NOW, NOW)
+
+
+class FakeChangeLog(ChangeLogRepository):
+    def __init__(self, changes: List[Change]):
+        self.changes = changes
+
+    def list_since(self, position, limit, resource_types=None):
+        return [c for c in self.changes if (c.txid, c.seq) > position and c.resource_type in resource_types][:limit]
+
+    def oldest_seq(self) -> Optional[int]:
+        return min((c.seq for c in self.changes), default=None)
+
+
+class FakeResources:
+    """Stands in for the three resource controllers; no changed resource exists any more"""
+
+    def get_patient_resources(self, ids, user):
+        return {}
+
+    get_encounter_resources = get_observation_resources = get_patient_resources
+
+
+def feed(changes: List[Change]) -> ChangeFeedController:
+    resources = FakeResources()
+    return ChangeFeedController(FakeChangeLog(changes), resources, resources, resources)
+
+
+def deleted(txid: int, seq: int) -> Change:
+    return Change(seq, txid, "Patient", uuid4(), "delete", NOW)
+
+
+def test_cursor_round_trip():
+    assert parse_cursor(format_cursor(812, 40)) == (812, 40)
+    assert parse_cursor(None) == (0, 0)
+    assert parse_cursor("") == (0, 0)
+
+
+@pytest.mark.parametrize("cursor", ["12", "a.b", "1.2.3", "-1.2", " 1.2"])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        parse_cursor(cursor)
+
+
+def test_next_link_resumes_after_the_last_change():
+    bundle = feed([deleted(100, 7), deleted(101, 8)]).list_changes(ChangeFeedRequest(count=10), USER, "http://x/_changes")
+    assert [e.request.method for e in bundle.entry] == ["DELETE", "DELETE"]
+    assert "cursor=101.8" in bundle.link[0].url
+
+
+def test_cursor_into_the_purged_part_of_the_log_is_gone():
+    with pytest.raises(CursorExpired):
+        feed([deleted(100, 7)]).list_changes(ChangeFeedRequest(cursor="90.5"), USER, "http://x/_changes")
+
+
+def test_cursor_at_the_oldest_entry_and_fresh_starts_still_read():
+    controller = feed([deleted(100, 7), deleted(101, 8)])
+    assert len(controller.list_changes(ChangeFeedRequest(cursor="100.7"), USER, "u").entry) == 1
+    assert len(controller.list_changes(ChangeFeedRequest(), USER, "u").entry) == 2
@@ -0,0 +1,51 @@
+from datetime import date, datetime, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from src.infrastructure.db import partitions
+from src.infrastructure.db.partitions import ObservationPartitionManager, partition_name
+
+# Far enough ahead that no other data or test has created its partition
+MONTH = date(2091, 3, 1)
+
+
+@pytest.fixture
+def parked_observation(engine):
+    """A live observation in the default partition, for a month without a partition"""
+    patient_id, observation_id = uuid4(), uuid4()
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS fhir.{partition_name(MONTH)}"))
+        conn.execute(
+            text("INSERT INTO fhir.patient (id, resource) VALUES (:id, '{}')"), {"id": patient_id}
+        )
+        conn.execute(text(
+            "INSERT INTO fhir.observation (id, subject_patient_id, effective_datetime, resource) "
+            "VALUES (:id, :patient, :effective, '{}')"
+        ), {"id": observation_id, "patient": patient_id, "effective": datetime(2091, 3, 14, tzinfo=timezone.utc)})
+    partitions._known_months.discard(MONTH)
+    yield observation_id
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS fhir.{partition_name(MONTH)}"))
+        conn.execute(text("DELETE FROM fhir.observation WHERE id = :id"), {"id": observation_id})
+        conn.execute(text("DELETE FROM fhir.patient WHERE id = :id"), {"id": patient_id})
+    partitions._known_months.discard(MONTH)
+
+
+def test_partition_split_leaves_the_change_feed_unchanged(engine, parked_observation):
+    with engine.connect() as conn:
+        last_seq = conn.execute(text("SELECT coalesce(max(seq), 0) FROM fhir.change_log")).scalar()
+
+    assert ObservationPartitionManager(engine).ensure_partition(MONTH)
+
+    with engine.connect() as conn:
+        moved_to = conn.execute(
+            text("SELECT tableoid::regclass::text FROM fhir.observation WHERE id = :id"), {"id": parked_observation}
+        ).scalar()
+        logged = conn.execute(
+            text("SELECT operation FROM fhir.change_log WHERE seq > :seq AND resource_id = :id"),
+            {"seq": last_seq, "id": parked_observation},
+        ).scalars().all()
+    assert moved_to == f"fhir.{partition_name(MONTH)}"
+    assert logged == []
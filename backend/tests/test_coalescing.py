@@ -0,0 +1,159 @@
+import asyncio
+import threading
+from typing import List, Tuple
+
+import pytest
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+
+from src.interfaces.api.coalescing import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def flight(**kwargs) -> SingleFlight:
+    single_flight = SingleFlight("test", **kwargs)
+    single_flight.enabled = True
+    return single_flight
+
+
+async def sent(response: Response) -> Tuple[int, bytes]:
+    """Status and body a response sends"""
+    messages = []
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await response({"type": "http"}, receive, send)
+    return messages[0]["status"], b"".join(message.get("body", b"") for message in messages[1:])
+
+
+async def with_followers(single_flight: SingleFlight, build, followers: int = 3, **kwargs) -> Tuple[List, List]:
+    """A leader whose build() blocks in a worker thread, joined by followers on the event loop"""
+    release = threading.Event()
+    calls = []
+
+    def counted_build():
+        calls.append(threading.current_thread().name)
+        return build()
+
+    def leader_build():
+        calls.append("leader")
+        release.wait(5)
+        return build()
+
+    leader = asyncio.create_task(asyncio.to_thread(single_flight.response, "key", leader_build, **kwargs))
+    while not calls:
+        await asyncio.sleep(0.001)
+    # Followers return at once, without building or holding a thread while they wait
+    responses = [single_flight.response("key", counted_build, **kwargs) for _ in range(followers)]
+    assert calls == ["leader"]
+
+    results = [asyncio.create_task(sent(response)) for response in responses]
+    release.set()
+    outcomes = [await sent(await leader)]
+    for result in results:
+        try:
+            outcomes.append(await result)
+        except Exception as e:
+            outcomes.append(e)
+    return outcomes, calls
+
+
+async def test_followers_share_the_leaders_body():
+    outcomes, calls = await with_followers(flight(), lambda: Response(b"page", media_type="application/fhir+json"))
+    assert calls == ["leader"]
+    assert outcomes == [(200, b"page")] * 4
+
+
+async def test_followers_build_their_own_when_the_body_is_too_large():
+    outcomes, calls = await with_followers(flight(max_body_bytes=3), lambda: Response(b"page"))
+    assert len(calls) == 4
+    assert outcomes == [(200, b"page")] * 4
+
+
+async def test_followers_get_the_leaders_error_as_the_route_maps_it():
+    def fail():
+        raise PermissionError("no")
+
+    single_flight = flight()
+    release = threading.Event()
+
+    def slow_fail():
+        release.wait(5)
+        raise PermissionError("no")
+
+    leader = asyncio.create_task(asyncio.to_thread(single_flight.response, "key", slow_fail))
+    await asyncio.sleep(0.05)
+    follower = asyncio.create_task(sent(single_flight.response("key", fail, errors=lambda e: LookupError(str(e)))))
+    release.set()
+    with pytest.raises(PermissionError):
+        await leader
+    with pytest.raises(LookupError, match="no"):
+        await follower
+
+
+async def test_followers_stop_waiting_for_a_stuck_leader():
+    single_flight = flight(wait_seconds=0.05)
+    single_flight._join("key")
+    assert await sent(single_flight.response("key", lambda: Response(b"own"))) == (200, b"own")
+    # The stuck flight is dropped: the next request leads a new one
+    assert single_flight.response("key", lambda: Response(b"new")).body == b"new"
+
+
+async def test_streamed_body_lands_before_the_leaders_client_reads_it():
+    single_flight = flight()
+
+    async def chunks():
+        yield b"a"
+        yield b"b"
+
+    leader = single_flight.response("key", lambda: StreamingResponse(chunks(), media_type="application/x-ndjson"))
+    follower = single_flight.response("key", lambda: Response(b"own"))
+
+    # The leader's client has taken one chunk and stalls; the follower still gets the whole body
+    assert await leader.body_iterator.__anext__() == b"a"
+    assert await asyncio.wait_for(sent(follower), 1) == (200, b"ab")
+    assert [chunk async for chunk in leader.body_iterator] == [b"b"]
+
+
+async def test_streamed_body_over_the_limit_releases_followers_at_once():
+    single_flight = flight(max_body_bytes=3)
+    more = asyncio.Event()
+
+    async def chunks():
+        yield b"aaaa"
+        await more.wait()
+        yield b"b"
+
+    leader = single_flight.response("key", lambda: StreamingResponse(chunks(), media_type="application/x-ndjson"))
+    follower = single_flight.response("key", lambda: Response(b"own"))
+
+    assert await leader.body_iterator.__anext__() == b"aaaa"
+    assert await asyncio.wait_for(sent(follower), 1) == (200, b"own")
+    more.set()
+    assert [chunk async for chunk in leader.body_iterator] == [b"b"]
+
+
+async def test_a_later_request_starts_a_new_flight():
+    single_flight = flight()
+    bodies = iter([b"first", b"second"])
+    assert single_flight.response("key", lambda: Response(next(bodies))).body == b"first"
+    assert single_flight.response("key", lambda: Response(next(bodies))).body == b"second"
+
+
+async def test_disabled_route_always_builds():
+    single_flight = SingleFlight("not-coalesced")
+    assert not single_flight.enabled
+    calls = []
+    for _ in range(2):
+        single_flight.response("key", lambda: calls.append(1) or Response(b""))
+    assert len(calls) == 2
@@ -0,0 +1,69 @@
+import zlib
+
+import pytest
+
+from src.interfaces.api.compression import CompressionMiddleware, _Encoder, choose_encoding, parse_accept_encoding
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_accept_encoding_q_values():
+    assert parse_accept_encoding("gzip;q=0.5, br , identity;q=0, x;q=bad") == [
+        ("gzip", 0.5), ("br", 1.0), ("identity", 0.0), ("x", 0.0),
+    ]
+
+
+@pytest.mark.parametrize("header, brotli_available, expected", [
+    ("gzip, br", True, "br"),
+    ("gzip, br", False, "gzip"),
+    ("gzip;q=1, br;q=0.5", True, "gzip"),
+    ("br;q=0", False, None),
+    ("*", True, "br"),
+    ("*;q=0.2, gzip;q=0", False, None),
+    ("identity", True, None),
+    ("", True, None),
+])
+def test_choose_encoding(header, brotli_available, expected):
+    assert choose_encoding(header, brotli_available) == expected
+
+
+def test_gzip_encoder_output_decompresses_to_the_input():
+    encoder = _Encoder("gzip", 6, 4)
+    chunks = [b'{"resourceType":"Bundle",', b"", b'"entry":[]}']
+    body = b"".join(encoder.compress(chunk) for chunk in chunks) + encoder.finish()
+    assert zlib.decompress(body, 31) == b"".join(chunks)
+
+
+def test_each_streamed_chunk_decodes_on_arrival():
+    encoder = _Encoder("gzip", 6, 4)
+    decoder = zlib.decompressobj(31)
+    assert decoder.decompress(encoder.compress(b'{"resourceType":"Bundle",')) == b'{"resourceType":"Bundle",'
+    assert decoder.decompress(encoder.compress(b'"entry":[')) == b'"entry":['
+    assert decoder.decompress(encoder.finish(b"]}")) == b"]}"
+    assert decoder.eof
+
+
+@pytest.mark.anyio
+async def test_middleware_sends_each_body_message_decodable():
+    chunks = [b"x" * 2000, b"y" * 10, b"z" * 10]
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/fhir+json")]})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    await CompressionMiddleware(app, minimum_size=1024)(scope, None, send)
+
+    assert (b"content-encoding", b"gzip") in messages[0]["headers"]
+    decoder = zlib.decompressobj(31)
+    assert [decoder.decompress(message["body"]) for message in messages[1:]] == chunks
+    assert decoder.eof
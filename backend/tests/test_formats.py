@@ -0,0 +1,30 @@
+import json
+
+import pytest
+
+from src.interfaces.api.formats import FHIR_JSON, FHIR_NDJSON, count_response
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+async def body(response) -> bytes:
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+@pytest.mark.parametrize("media_type", [FHIR_JSON, "application/json"])
+async def test_count_is_a_bundle_with_the_total(media_type):
+    response = count_response(42, media_type)
+    assert response.media_type == media_type
+    assert json.loads(await body(response)) == {"resourceType": "Bundle", "type": "searchset", "total": 42, "entry": []}
+
+
+@pytest.mark.parametrize("media_type", [FHIR_NDJSON, "application/x-ndjson"])
+async def test_count_requested_as_ndjson_keeps_the_total(media_type):
+    response = count_response(42, media_type)
+    assert response.media_type == FHIR_JSON
+    assert json.loads(await body(response))["total"] == 42
@@ -0,0 +1,30 @@
+"""Cold start of the ASGI app, measured in fresh `python -X importtime` processes
+
+Same measurement as scripts/bench_cold_start.py. The budget here
+(COLD_START_BUDGET_MS, default 2000) is looser than the bench's 800 ms
+median so that slower CI machines do not fail on noise; it catches an
+expensive import added to the startup path, and the lazy module check
+catches one moved there.
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "scripts"))
+
+from bench_cold_start import APP_MODULE, LAZY_MODULES, run_once
+
+BUDGET_MS = float(os.environ.get("COLD_START_BUDGET_MS", "2000"))
+RUNS = 3
+
+
+def test_app_import_stays_within_budget_and_defers_lazy_modules():
+    timings, leaked = [], set()
+    for _ in range(RUNS):
+        elapsed, _, lazy = run_once()
+        timings.append(elapsed * 1000)
+        leaked.update(lazy)
+
+    assert not leaked, f"imported by {APP_MODULE}: {sorted(leaked)}"
+    assert min(timings) <= BUDGET_MS, f"{APP_MODULE} imports in {min(timings):.0f} ms (budget {BUDGET_MS:.0f} ms)"
+
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from src.config.settings import settings
+from src.infrastructure.db import instrumentation
+from src.interfaces.api.metrics import require_scraper
+
+
+@pytest.fixture
+def labels(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_statement_labels", OrderedDict())
+    monkeypatch.setattr(instrumentation, "_labels", set())
+    return instrumentation
+
+
+def test_in_lists_of_every_length_share_one_label(labels):
+    statements = [
+        "SELECT * FROM patient WHERE id IN (" + ", ".join(["?"] * length) + ")" for length in range(1, 600)
+    ]
+    assert {labels._statement_label(statement) for statement in statements} == {
+        "SELECT * FROM patient WHERE id IN (?)"
+    }
+    assert len(labels._labels) == 1
+
+
+def test_distinct_shapes_past_the_cap_are_other(labels, monkeypatch):
+    monkeypatch.setattr(labels, "MAX_STATEMENT_LABELS", 2)
+    monkeypatch.setattr(labels, "MAX_CACHED_STATEMENTS", 3)
+    assert labels._statement_label("SELECT a FROM t") == "SELECT a FROM t"
+    assert labels._statement_label("SELECT b FROM t") == "SELECT b FROM t"
+    assert labels._statement_label("SELECT c FROM t") == "other"
+    # A known shape keeps its label after its raw statement was evicted
+    for statement in ("SELECT d FROM t", "SELECT e FROM t", "SELECT f FROM t"):
+        labels._statement_label(statement)
+    assert "SELECT a FROM t" not in labels._statement_labels
+    assert labels._statement_label("SELECT a FROM t") == "SELECT a FROM t"
+
+
+def scrape(host: str, authorization: str = "") -> Request:
+    headers = [(b"authorization", authorization.encode())] if authorization else []
+    return Request({"type": "http", "method": "GET", "path": "/metrics", "headers": headers, "client": (host, 50000)})
+
+
+@pytest.fixture
+def access(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ALLOWED_NETWORKS", ["127.0.0.0/8", "10.0.0.0/8"])
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+    return settings
+
+
+@pytest.mark.parametrize("host", ["127.0.0.1", "10.1.2.3", "::ffff:10.1.2.3"])
+def test_scrapers_inside_the_allowed_networks_are_admitted(access, host):
+    require_scraper(scrape(host))
+
+
+@pytest.mark.parametrize("host", ["203.0.113.7", "2001:db8::1", "testclient"])
+def test_other_addresses_are_forbidden(access, host):
+    with pytest.raises(HTTPException) as raised:
+        require_scraper(scrape(host))
+    assert raised.value.status_code == 403
+
+
+def test_no_networks_admits_any_address(access):
+    access.METRICS_ALLOWED_NETWORKS = []
+    require_scraper(scrape("203.0.113.7"))
+
+
+def test_a_set_token_is_required(access):
+    access.METRICS_TOKEN = "scrape-secret"
+    require_scraper(scrape("127.0.0.1", "Bearer scrape-secret"))
+    for authorization in ("", "Bearer wrong", "Basic scrape-secret"):
+        with pytest.raises(HTTPException) as raised:
+            require_scraper(scrape("127.0.0.1", authorization))
+        assert raised.value.status_code == 401
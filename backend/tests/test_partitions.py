@@ -0,0 +1,33 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from src.infrastructure.db.partitions import add_months, month_start, partition_name
+
+
+@pytest.mark.parametrize("value, expected", [
+    (date(2024, 2, 29), date(2024, 2, 1)),
+    (datetime(2024, 3, 1, 0, 0), date(2024, 3, 1)),
+    # Months are UTC months: late on Jan 31 in New York is already February
+    (datetime(2024, 1, 31, 22, 0, tzinfo=timezone(timedelta(hours=-5))), date(2024, 2, 1)),
+    (datetime(2024, 2, 1, 3, 0, tzinfo=timezone(timedelta(hours=7))), date(2024, 1, 1)),
+])
+def test_month_start(value, expected):
+    assert month_start(value) == expected
+
+
+@pytest.mark.parametrize("month, months, expected", [
+    (date(2024, 1, 1), 0, date(2024, 1, 1)),
+    (date(2024, 11, 1), 2, date(2025, 1, 1)),
+    (date(2024, 12, 1), 1, date(2025, 1, 1)),
+    (date(2024, 1, 1), -1, date(2023, 12, 1)),
+    (date(2024, 3, 1), -27, date(2021, 12, 1)),
+    (date(2024, 1, 1), 24, date(2026, 1, 1)),
+])
+def test_add_months(month, months, expected):
+    assert add_months(month, months) == expected
+
+
+def test_partition_name():
+    assert partition_name(date(2024, 3, 1)) == "observation_y2024m03"
+    assert partition_name(date(987, 12, 1)) == "observation_y0987m12"
@@ -0,0 +1,143 @@
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from src.config.settings import settings
+from src.infrastructure.db.query_budget import assert_query_budget, enable_query_tracking, track_queries
+from src.infrastructure.db.search_cache import search_cache
+
+PATIENT = {
+    "resourceType": "Patient",
+    "identifier": [{"value": "BUDGET-TEST"}],
+    "name": [{"family": "Budgettest", "given": ["Query"]}],
+    "gender": "unknown",
+    "birthDate": "1990-01-01",
+}
+
+
+def encounter_body(patient_id: str) -> dict:
+    return {
+        "resourceType": "Encounter",
+        "status": "in-progress",
+        "class": [{"coding": [{"code": "AMB"}]}],
+        "subject": {"reference": f"Patient/{patient_id}"},
+        "period": {"start": "2024-01-01T08:00:00+00:00"},
+    }
+
+
+def observation_body(patient_id: str, encounter_id: str) -> dict:
+    return {
+        "resourceType": "Observation",
+        "status": "final",
+        "code": {"coding": [{"system": "http://loinc.org", "code": "8310-5"}]},
+        "subject": {"reference": f"Patient/{patient_id}"},
+        "encounter": {"reference": f"Encounter/{encounter_id}"},
+        "effectiveDateTime": "2024-01-01T08:30:00+00:00",
+        "valueQuantity": {"value": 37.0, "unit": "Cel"},
+    }
+
+
+@pytest.fixture(scope="module")
+def client(engine):
+    if not settings.QUERY_BUDGET_ENABLED:
+        enable_query_tracking(engine)
+    from src.interfaces.api.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="module")
+def headers(engine, client):
+    """Bearer token of an admin user created for this module"""
+    email = f"budget-{uuid4().hex}@test.invalid"
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO auth_user (id, email, hashed_password, role, is_active) "
+            "VALUES (:id, :email, '!', 'admin', true)"
+        ), {"id": uuid4(), "email": email})
+    token = client.app.state.container.jwt_service.create_access_token({"sub": email, "role": "admin"})
+    yield {"Authorization": f"Bearer {token}"}
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM auth_user WHERE email = :email"), {"email": email})
+
+
+@pytest.fixture(scope="module")
+def resources(engine, client, headers):
+    """A patient with one encounter and one observation, removed with everything written for it"""
+    patient = client.post("/api/fhir/Patient", json=PATIENT, headers=headers).json()["id"]
+    encounter = client.post("/api/fhir/Encounter", json=encounter_body(patient), headers=headers).json()["id"]
+    observation = client.post(
+        "/api/fhir/Observation", json=observation_body(patient, encounter), headers=headers
+    ).json()["id"]
+    yield {"Patient": patient, "Encounter": encounter, "Observation": observation}
+    with engine.begin() as conn:
+        conn.execute(text("DELETE FROM fhir.observation WHERE subject_patient_id = :id"), {"id": patient})
+        conn.execute(text("DELETE FROM fhir.encounter WHERE subject_patient_id = :id"), {"id": patient})
+        conn.execute(text("DELETE FROM fhir.patient WHERE id = :id"), {"id": patient})
+
+
+def route_budget(client: TestClient, path: str) -> int:
+    """Statements the GET route declares with @query_budget"""
+    for route in client.app.routes:
+        if getattr(route, "path", None) == f"/api{path}" and "GET" in route.methods:
+            return route.endpoint.__query_budget__.statements
+    raise LookupError(path)
+
+
+@pytest.mark.parametrize("resource_type", ["Patient", "Encounter", "Observation"])
+def test_read_stays_within_budget(client, headers, resources, resource_type):
+    budget = route_budget(client, f"/fhir/{resource_type}/{{{resource_type.lower()}_id}}")
+    with assert_query_budget(statements=budget):
+        response = client.get(f"/api/fhir/{resource_type}/{resources[resource_type]}", headers=headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("resource_type, query", [
+    ("Patient", "name=Budgettest"),
+    ("Patient", "name=Budgettest&_summary=count"),
+    ("Patient", "_sort=-_lastUpdated&_count=5"),
+    ("Encounter", "subject=Patient/{Patient}"),
+    ("Encounter", "subject=Patient/{Patient}&_sort=-date&_total=accurate"),
+    ("Observation", "subject=Patient/{Patient}&code=8310-5"),
+    ("Observation", "subject=Patient/{Patient}&_elements=status&_format=ndjson"),
+])
+def test_search_stays_within_budget(client, headers, resources, resource_type, query):
+    with assert_query_budget(statements=route_budget(client, f"/fhir/{resource_type}")):
+        response = client.get(f"/api/fhir/{resource_type}?{query.format(**resources)}", headers=headers)
+    assert response.status_code == 200
+
+
+def test_other_reads_stay_within_budget(client, headers, resources):
+    with assert_query_budget(statements=route_budget(client, "/auth/me")):
+        assert client.get("/api/auth/me", headers=headers).status_code == 200
+    with assert_query_budget(statements=route_budget(client, "/fhir/_changes")):
+        assert client.get("/api/fhir/_changes?_count=10", headers=headers).status_code == 200
+
+
+@pytest.mark.parametrize("resource_type, query", [
+    ("Encounter", "subject=Patient/{Patient}"),
+    ("Observation", "subject=Patient/{Patient}"),
+])
+def test_search_statements_do_not_grow_with_matches(client, headers, resources, resource_type, query):
+    url = f"/api/fhir/{resource_type}?{query.format(**resources)}&_total=accurate"
+    # Both searches must run their queries, not come from the page cache
+    search_cache.bump(resource_type)
+    with track_queries() as before:
+        first = client.get(url, headers=headers).json()
+
+    for _ in range(5):
+        body = (
+            encounter_body(resources["Patient"]) if resource_type == "Encounter"
+            else observation_body(resources["Patient"], resources["Encounter"])
+        )
+        assert client.post(f"/api/fhir/{resource_type}", json=body, headers=headers).status_code == 200
+
+    with track_queries() as after:
+        second = client.get(url, headers=headers).json()
+
+    assert second["total"] == first["total"] + 5
+    assert len(second["entry"]) == len(first["entry"]) + 5
+    assert after.statements == before.statements
@@ -0,0 +1,154 @@
+"""EXPLAIN every supported search shape and fail on sequential scans
+
+_sort shapes additionally fail when the plan sorts every match instead of
+reading rows in index order.
+
+Plans are checked with the default planner settings against the synthetic
+dataset (scripts/synthetic_data.py), loaded first unless the database
+already holds it (PLAN_CHECK_PATIENTS, default 10000) and analyzed, so the
+planner chooses as it would at scale. The dataset is left in place for the
+next run. Search values come from that data. A single common code matches a
+large share of the observations, where reading the table is the right plan
+for an unpaged search, so that shape is checked as a _count page.
+"""
+import os
+import sys
+import uuid
+from datetime import date
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query, Session
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "scripts"
+PATIENTS = int(os.environ.get("PLAN_CHECK_PATIENTS", "10000"))
+SYNTHETIC_IDENTIFIER = "SYN{:09d}"  # scripts/synthetic_data.py
+DATE = "2024-01-01T00:00:00+00:00"
+CODE = "8310-5"
+
+# (shape, searched table, query built from the repositories and a sample patient)
+SHAPES = [
+    ("Patient?name", "patient", lambda r, s: r.patients.search_query(name=s.name)),
+    ("Patient?identifier", "patient", lambda r, s: r.patients.search_query(identifier=s.identifier)),
+    ("Encounter?status", "encounter", lambda r, s: r.encounters.search_query(status="in-progress")),
+    ("Encounter?subject", "encounter", lambda r, s: r.encounters.search_query(subject=s.subject)),
+    ("Encounter?date", "encounter", lambda r, s: r.encounters.search_query(date=DATE)),
+    ("Encounter?status&date", "encounter", lambda r, s: r.encounters.search_query(status="in-progress", date=DATE)),
+    ("Encounter?subject&date", "encounter", lambda r, s: r.encounters.search_query(subject=s.subject, date=DATE)),
+    ("Observation?code&_count", "observation", lambda r, s: r.observations.ordered_query(code=CODE, limit=20)),
+    ("Observation?subject", "observation", lambda r, s: r.observations.search_query(subject=s.subject)),
+    ("Observation?date", "observation", lambda r, s: r.observations.search_query(date=DATE)),
+    ("Observation?code&date", "observation", lambda r, s: r.observations.search_query(code=CODE, date=DATE)),
+    ("Observation?subject&date", "observation", lambda r, s: r.observations.search_query(subject=s.subject, date=DATE)),
+    ("Observation?subject&code", "observation", lambda r, s: r.observations.search_query(code=CODE, subject=s.subject)),
+    ("Observation?subject&code&date", "observation",
+     lambda r, s: r.observations.search_query(code=CODE, subject=s.subject, date=DATE)),
+    ("Patient?_sort=family&_count", "patient", lambda r, s: r.patients.ordered_query(sort=["family"], limit=20)),
+    ("Patient?_sort=-_lastUpdated&_count", "patient",
+     lambda r, s: r.patients.ordered_query(sort=["-_lastUpdated"], limit=20)),
+    ("Encounter?_sort=-date&_count", "encounter", lambda r, s: r.encounters.ordered_query(sort=["-date"], limit=20)),
+    ("Encounter?subject&_sort=-date&_count", "encounter",
+     lambda r, s: r.encounters.ordered_query(subject=s.subject, sort=["-date"], limit=20)),
+    ("Encounter?status&_sort=date&_count", "encounter",
+     lambda r, s: r.encounters.ordered_query(status="in-progress", sort=["date"], limit=20)),
+    ("Encounter?_sort=_lastUpdated&_count", "encounter",
+     lambda r, s: r.encounters.ordered_query(sort=["_lastUpdated"], limit=20)),
+    ("Observation?_sort=-date&_count", "observation",
+     lambda r, s: r.observations.ordered_query(sort=["-date"], limit=20)),
+    ("Observation?subject&_sort=-date&_count", "observation",
+     lambda r, s: r.observations.ordered_query(subject=s.subject, sort=["-date"], limit=20)),
+    ("Observation?subject&code&_sort=-date&_count", "observation",
+     lambda r, s: r.observations.ordered_query(code=CODE, subject=s.subject, sort=["-date"], limit=20)),
+    ("Observation?_sort=_lastUpdated&_count", "observation",
+     lambda r, s: r.observations.ordered_query(sort=["_lastUpdated"], limit=20)),
+]
+
+
+@pytest.fixture(scope="module")
+def plan_session(engine):
+    """A session on the analyzed synthetic dataset"""
+    db = Session(bind=engine)
+    loaded = db.execute(
+        text("SELECT count(*) FROM fhir.patient WHERE identifier_value LIKE 'SYN%'")
+    ).scalar()
+    if loaded < PATIENTS:
+        sys.path.insert(0, str(SCRIPTS_DIR))
+        from load_seed import load_synthetic_data
+
+        load_synthetic_data(
+            PATIENTS, 42, os.cpu_count() or 4, chunk_size=2000, end_date=date(2025, 1, 1), years=5
+        )
+    db.execute(text("ANALYZE fhir.patient, fhir.encounter, fhir.observation"))
+    db.commit()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+
+
+@pytest.fixture(scope="module")
+def repositories(plan_session):
+    from src.infrastructure.db.repositories.fhir.encounter_repo_sqlalchemy import (
+        SQLAlchemyEncounterRepository,
+    )
+    from src.infrastructure.db.repositories.fhir.observation_repo_sqlalchemy import (
+        SQLAlchemyObservationRepository,
+    )
+    from src.infrastructure.db.repositories.fhir.patient_repo_sqlalchemy import (
+        SQLAlchemyPatientRepository,
+    )
+
+    return SimpleNamespace(
+        patients=SQLAlchemyPatientRepository(plan_session),
+        encounters=SQLAlchemyEncounterRepository(plan_session),
+        observations=SQLAlchemyObservationRepository(plan_session),
+    )
+
+
+@pytest.fixture(scope="module")
+def sample(plan_session):
+    """Search values taken from a patient in the middle of the dataset"""
+    row = plan_session.execute(
+        text("SELECT id, identifier_value, name_family FROM fhir.patient WHERE identifier_value = :identifier"),
+        {"identifier": SYNTHETIC_IDENTIFIER.format(PATIENTS // 2)},
+    ).first()
+    if row is None:
+        return SimpleNamespace(subject=uuid.uuid4(), identifier="SYN", name="smi")
+    return SimpleNamespace(subject=row.id, identifier=row.identifier_value, name=row.name_family)
+
+
+def explain(db: Session, query: Query) -> Dict[str, Any]:
+    compiled = query.statement.compile(dialect=postgresql.dialect())
+    sql = "EXPLAIN (FORMAT JSON) " + str(compiled)
+    return db.connection().exec_driver_sql(sql, compiled.params).scalar()[0]["Plan"]
+
+
+def walk(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from walk(child)
+
+
+def searches(table: str, relation: str) -> bool:
+    """Whether a plan relation is the searched table or one of its partitions"""
+    return relation == table or relation.startswith(f"{table}_")
+
+
+@pytest.mark.parametrize("shape, table, build", SHAPES, ids=[shape for shape, _, _ in SHAPES])
+def test_search_plan_has_no_seq_scan(plan_session, repositories, sample, shape, table, build):
+    plan = explain(plan_session, build(repositories, sample))
+
+    seq_scans = sorted({
+        node["Relation Name"] for node in walk(plan)
+        if node["Node Type"] == "Seq Scan" and searches(table, node.get("Relation Name", ""))
+    })
+    assert not seq_scans, f"{shape}: sequential scan on {', '.join(seq_scans)}"
+
+    if "_sort" in shape:
+        sorts = [node for node in walk(plan) if node["Node Type"] == "Sort"]
+        assert not sorts, f"{shape}: sorts every match ({', '.join(sorts[0].get('Sort Key', []))})"
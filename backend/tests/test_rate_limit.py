@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.infrastructure.db import rate_limit
+from src.infrastructure.db.rate_limit import MemoryRateLimitBackend
+from src.interfaces.api.admission import LOGIN, READ, AdmissionMiddleware, route_class
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", clock)
+    return clock
+
+
+def test_burst_is_admitted_then_the_wait_is_until_the_next_token(clock):
+    backend = MemoryRateLimitBackend()
+    assert [backend.take("user:a", rate=2.0, burst=3.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert backend.take("user:a", rate=2.0, burst=3.0) == pytest.approx(0.5)
+
+
+def test_bucket_refills_at_the_rate_up_to_the_burst(clock):
+    backend = MemoryRateLimitBackend()
+    for _ in range(3):
+        backend.take("user:a", rate=2.0, burst=3.0)
+    clock.now += 0.5
+    assert backend.take("user:a", rate=2.0, burst=3.0) == 0.0
+    assert backend.take("user:a", rate=2.0, burst=3.0) > 0
+
+    clock.now += 60
+    assert [backend.take("user:a", rate=2.0, burst=3.0) for _ in range(4)][-1] > 0
+
+
+def test_buckets_are_per_key_and_the_least_recent_is_evicted(clock):
+    backend = MemoryRateLimitBackend(max_keys=2)
+    backend.take("user:a", rate=1.0, burst=1.0)
+    assert backend.take("user:b", rate=1.0, burst=1.0) == 0.0
+    backend.take("user:c", rate=1.0, burst=1.0)
+    # user:a was evicted, so it starts again with a full bucket
+    assert backend.take("user:a", rate=1.0, burst=1.0) == 0.0
+    assert backend.take("user:c", rate=1.0, burst=1.0) > 0
+
+
+def test_login_is_its_own_route_class():
+    assert route_class("POST", "/api/auth/login") == LOGIN
+    assert route_class("GET", "/api/auth/me") == READ
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.mark.anyio
+async def test_login_attempts_have_their_own_bucket_per_address(clock):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    middleware = AdmissionMiddleware(
+        app, MemoryRateLimitBackend(), {"anonymous": 5.0}, burst_seconds=1.0, concurrency={}, login_rate=1.0
+    )
+
+    async def status(method: str, path: str, host: str = "10.0.0.1") -> int:
+        scope = {
+            "type": "http", "method": method, "path": path, "headers": [],
+            "client": (host, 50000), "app": SimpleNamespace(state=SimpleNamespace()),
+        }
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await middleware(scope, None, send)
+        return messages[0]["status"]
+
+    assert await status("POST", "/api/auth/login") == 200
+    assert await status("POST", "/api/auth/login") == 429
+    # Neither the anonymous bucket of that address nor other addresses are spent by it
+    assert [await status("GET", "/api/health/ready") for _ in range(5)] == [200] * 5
+    assert await status("POST", "/api/auth/login", host="10.0.0.2") == 200
@@ -0,0 +1,96 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.infrastructure.db import read_after_write
+from src.infrastructure.db.read_after_write import MemoryReadAfterWrite, PostgresReadAfterWrite
+from src.infrastructure.db.replicas import Replica, ReplicaRouter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(read_after_write, "time", clock)
+    return clock
+
+
+class CountingSticky(MemoryReadAfterWrite):
+    def __init__(self, sticky_seconds: float):
+        super().__init__(sticky_seconds)
+        self.lookups = 0
+
+    def is_sticky(self, client: str) -> bool:
+        self.lookups += 1
+        return super().is_sticky(client)
+
+
+@pytest.fixture
+def router():
+    replica = Replica("replica0", create_engine("sqlite://"), healthy=True)
+    return ReplicaRouter(create_engine("sqlite://"), [replica], 5.0, CountingSticky(10.0))
+
+
+def test_memory_marks_expire_after_the_window(clock):
+    sticky = MemoryReadAfterWrite(10.0)
+    sticky.wrote("user:a")
+    assert sticky.is_sticky("user:a")
+    assert not sticky.is_sticky("user:b")
+    clock.now += 10
+    assert not sticky.is_sticky("user:a")
+
+
+def test_memory_marks_drop_the_least_recent_client(clock):
+    sticky = MemoryReadAfterWrite(10.0, max_clients=1)
+    sticky.wrote("user:a")
+    sticky.wrote("user:b")
+    assert not sticky.is_sticky("user:a")
+    assert sticky.is_sticky("user:b")
+
+
+def test_reads_of_a_client_that_wrote_go_to_the_primary(router):
+    replica = router.replicas[0].engine
+    assert router.engine_for(False, "user:a") is replica
+    router.wrote("user:a")
+    assert router.engine_for(False, "user:a") is router.primary
+    assert router.engine_for(False, "user:b") is replica
+    assert router.engine_for(True, "user:b") is router.primary
+
+
+def test_stickiness_is_not_looked_up_without_a_healthy_replica(router):
+    router.replicas[0].healthy = False
+    assert router.engine_for(False, "user:a") is router.primary
+    assert router.sticky.lookups == 0
+
+
+def test_a_write_on_one_process_is_sticky_on_another(engine):
+    client = f"user:{uuid4()}"
+    writer, reader = PostgresReadAfterWrite(engine, 10.0), PostgresReadAfterWrite(engine, 10.0)
+    try:
+        assert not reader.is_sticky(client)
+        writer.wrote(client)
+        assert reader.is_sticky(client)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM read_after_write WHERE client = :client"), {"client": client})
+
+
+def test_an_expired_mark_is_not_sticky_on_another_process(engine):
+    client = f"user:{uuid4()}"
+    with engine.begin() as conn:
+        conn.execute(text(
+            "INSERT INTO read_after_write (client, sticky_until) VALUES (:client, now() - interval '1 second')"
+        ), {"client": client})
+    try:
+        assert not PostgresReadAfterWrite(engine, 10.0).is_sticky(client)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM read_after_write WHERE client = :client"), {"client": client})
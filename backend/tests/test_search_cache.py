@@ -0,0 +1,81 @@
+import pytest
+
+from src.infrastructure.db import search_cache as search_cache_module
+from src.infrastructure.db.search_cache import SearchCache, search_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(search_cache_module, "time", clock)
+    return clock
+
+
+def key(name: str):
+    return search_key("Patient", "admin", "application/fhir+json", {"name": name})
+
+
+def test_key_ignores_parameter_order_and_unset_parameters():
+    media_type = "application/fhir+json"
+    assert search_key("Patient", "admin", media_type, {"name": "a", "identifier": None, "_count": 5}) == \
+        search_key("Patient", "admin", media_type, {"_count": 5, "name": "a"})
+    assert search_key("Patient", "admin", media_type, {"name": "a"}) != \
+        search_key("Patient", "admin", media_type, {"name": "a"}, target="replica")
+
+
+def test_least_recently_used_pages_are_evicted_by_size(clock):
+    cache = SearchCache(ttl_seconds=10, max_bytes=10, max_entry_bytes=10)
+    cache.set(key("a"), 0, b"aaaa", "application/fhir+json")
+    cache.set(key("b"), 0, b"bbbb", "application/fhir+json")
+    assert cache.get(key("a")) is not None  # b is now the least recently used
+    cache.set(key("c"), 0, b"cccc", "application/fhir+json")
+
+    assert cache.get(key("b")) is None
+    assert cache.get(key("a")).body == b"aaaa"
+    assert cache.stats() == {"entries": 2, "bytes": 8, "evictions": 1}
+
+
+def test_oversized_pages_are_not_cached(clock):
+    cache = SearchCache(ttl_seconds=10, max_bytes=100, max_entry_bytes=3)
+    cache.set(key("a"), 0, b"aaaa", "application/fhir+json")
+    assert cache.get(key("a")) is None
+
+
+def test_a_write_makes_cached_pages_stale(clock):
+    cache = SearchCache(ttl_seconds=10, max_bytes=100, max_entry_bytes=100)
+    cache.set(key("a"), cache.generation("Patient"), b"old", "application/fhir+json")
+    cache.bump("Patient")
+    assert cache.get(key("a")) is None
+
+
+def test_a_page_read_before_a_write_is_not_stored_after_it(clock):
+    cache = SearchCache(ttl_seconds=10, max_bytes=100, max_entry_bytes=100)
+    generation = cache.generation("Patient")
+    cache.bump("Patient")
+    cache.set(key("a"), generation, b"old", "application/fhir+json")
+    assert cache.get(key("a")) is None
+
+
+def test_pages_expire_after_the_ttl(clock):
+    cache = SearchCache(ttl_seconds=10, max_bytes=100, max_entry_bytes=100)
+    cache.set(key("a"), 0, b"page", "application/fhir+json")
+    clock.now += 9.9
+    assert cache.get(key("a")) is not None
+    clock.now += 0.1
+    assert cache.get(key("a")) is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_a_zero_ttl_disables_the_cache(clock):
+    cache = SearchCache(ttl_seconds=0, max_bytes=100, max_entry_bytes=100)
+    assert not cache.enabled
+    cache.set(key("a"), 0, b"page", "application/fhir+json")
+    assert cache.get(key("a")) is None
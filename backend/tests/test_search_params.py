@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import Column, DateTime
+
+from src.infrastructure.db.search_params import date_clauses
+
+COLUMN = Column("effective_datetime", DateTime(timezone=True))
+
+
+def utc(*parts: int) -> datetime:
+    return datetime(*parts, tzinfo=timezone.utc)
+
+
+def described(values):
+    """(operator, bound value) of each clause"""
+    return [(clause.operator.__name__, clause.right.value) for clause in date_clauses(COLUMN, values, "date")]
+
+
+@pytest.mark.parametrize("value, expected", [
+    # A partial date is the whole period it names
+    ("2024", [("ge", utc(2024, 1, 1)), ("lt", utc(2025, 1, 1))]),
+    ("eq2024-12", [("ge", utc(2024, 12, 1)), ("lt", utc(2025, 1, 1))]),
+    ("2024-02-29", [("ge", utc(2024, 2, 29)), ("lt", utc(2024, 3, 1))]),
+    ("gt2024-01", [("ge", utc(2024, 2, 1))]),
+    ("ge2024-01", [("ge", utc(2024, 1, 1))]),
+    ("lt2024-01", [("lt", utc(2024, 1, 1))]),
+    ("le2024-01", [("lt", utc(2024, 2, 1))]),
+    # A full date-time is an instant; without an offset it is UTC
+    ("2024-01-01T08:30:00Z", [("eq", utc(2024, 1, 1, 8, 30))]),
+    ("gt2024-01-01T08:30:00+07:00", [("gt", utc(2024, 1, 1, 1, 30))]),
+    ("le2024-01-01T08:30:00", [("le", utc(2024, 1, 1, 8, 30))]),
+])
+def test_date_value(value, expected):
+    assert described([value]) == expected
+
+
+def test_repeated_values_are_anded():
+    assert described(["ge2024-01-01", "lt2024-02-01"]) == [("ge", utc(2024, 1, 1)), ("lt", utc(2024, 2, 1))]
+    assert described(None) == []
+
+
+@pytest.mark.parametrize("value", ["2024-13", "2024-02-30", "ne2024", "24-01-01", "2024-01-01Tnoon", "yesterday"])
+def test_invalid_values_are_rejected(value):
+    with pytest.raises(ValueError, match="Invalid date value"):
+        date_clauses(COLUMN, [value], "date")
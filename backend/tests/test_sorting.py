@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Query
+
+from src.config.settings import settings
+from src.infrastructure.db.models.fhir.encounter import Encounter
+from src.infrastructure.db.sorting import apply_sort, index_aligned, parse_sort
+
+SORT_COLUMNS = {"date": "period_start", "_lastUpdated": "updated_at"}
+INDEXES = [("subject_patient_id", "period_start", "id"), ("period_start", "id")]
+
+
+def sql(query: Query) -> str:
+    return str(query.statement.compile(dialect=postgresql.dialect()))
+
+
+def sorted_query(sort, limit, equality_columns=()):
+    return apply_sort(Query(Encounter), Encounter, "Encounter", sort, limit, SORT_COLUMNS, INDEXES, equality_columns)
+
+
+def test_parse_sort():
+    assert parse_sort(["-date", " ", "_lastUpdated"], SORT_COLUMNS, "Encounter") == [
+        ("period_start", True), ("updated_at", False),
+    ]
+    with pytest.raises(ValueError, match="Unsupported _sort parameter for Encounter: status"):
+        parse_sort(["status"], SORT_COLUMNS, "Encounter")
+
+
+@pytest.mark.parametrize("columns, equality_columns, expected", [
+    (["period_start"], [], True),
+    (["period_start", "id"], [], True),
+    # An equality filter on a leading index column leaves the rest in order
+    (["period_start"], ["subject_patient_id"], True),
+    (["updated_at"], [], False),
+    (["id"], [], False),
+])
+def test_index_aligned(columns, equality_columns, expected):
+    assert index_aligned(columns, equality_columns, INDEXES) is expected
+
+
+def test_sort_ends_with_id_in_the_last_key_direction():
+    statement = sql(sorted_query(["-date"], 20))
+    assert "ORDER BY fhir.encounter.period_start DESC, fhir.encounter.id DESC" in statement
+    assert "LIMIT" in statement
+
+
+def test_count_alone_pages_in_id_order():
+    statement = sql(sorted_query(None, 20))
+    assert "ORDER BY fhir.encounter.id" in statement and "LIMIT" in statement
+
+
+def test_unpaged_unsorted_query_is_left_unordered():
+    assert "ORDER BY" not in sql(sorted_query(None, None))
+
+
+def test_sort_without_an_index_is_logged_or_rejected(monkeypatch, caplog):
+    statement = sql(sorted_query(["_lastUpdated"], 20))
+    assert "ORDER BY fhir.encounter.updated_at, fhir.encounter.id" in statement
+    assert "not backed by an index" in caplog.text
+
+    monkeypatch.setattr(settings, "SEARCH_SORT_STRICT", True)
+    with pytest.raises(ValueError, match="not backed by an index"):
+        sorted_query(["_lastUpdated"], 20)
@@ -0,0 +1,42 @@
+import inspect
+
+from src.domain.fhir.observation.view import ObservationSearchRequest
+from src.domain.fhir.patient.view import PatientSearchRequest
+from src.infrastructure.observability.tracing import _call_attributes
+
+
+def attributes(function, *args, **kwargs):
+    return _call_attributes(inspect.signature(function), args, kwargs)
+
+
+def test_patient_demographics_in_a_search_are_not_recorded():
+    def search_patients(self, request, user_id):
+        pass
+
+    request = PatientSearchRequest(name="Budi Santoso", identifier="3171010101900001", summary="true", count=20)
+    assert attributes(search_patients, None, request, user_id=7) == {
+        "fhir.param.summary": "true",
+        "fhir.param.count": 20,
+        "fhir.param.user_id": 7,
+    }
+
+
+def test_demographic_and_credential_arguments_are_not_recorded():
+    def lookup(name, family, birthdate, gender, email, password, resource_type):
+        pass
+
+    assert attributes(
+        lookup, "Budi", "Santoso", "1990-01-01", "male", "budi@example.com", "secret", "Patient"
+    ) == {"fhir.param.resource_type": "Patient"}
+
+
+def test_search_controls_and_references_are_recorded():
+    def search_observations(self, request):
+        pass
+
+    request = ObservationSearchRequest(code="8867-4", subject="Patient/1", count=10)
+    assert attributes(search_observations, None, request) == {
+        "fhir.param.code": "8867-4",
+        "fhir.param.subject": "Patient/1",
+        "fhir.param.count": 10,
+    }
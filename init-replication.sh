@@ -0,0 +1,5 @@
+#!/bin/bash
+# Bootstrap only: lets the optional postgres-replica service (profile "replica")
+# stream WAL from this instance. Runs on the first start of an empty data volume.
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"